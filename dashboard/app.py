@@ -117,7 +117,8 @@ def generate_frames():
             if not system_state['synced_with_main']:
                 count, annotated_frame = detector.detect_vehicles(frame)
                 system_state['vehicle_count'] = count
-                system_state['density'] = analyzer.classify_density(count)
+                system_state['density'] = analyzer.classify_density(
+                    analyzer.frame_demand(detector.last_detections[2], count))
                 system_state['green_time'] = analyzer.calculate_green_time(system_state['density'])
             else:
                 # Just annotate the frame, detection done by main.py
@@ -3,8 +3,9 @@ Flask Dashboard for Traffic Management System - Production Version
 Shows real-time vehicle count, density, and signal status
 """
 
-from flask import Flask, render_template, Response, jsonify
+from flask import Flask, render_template, Response, jsonify, request
 import cv2
+import hmac
 import json
 import time
 from threading import Thread, Lock
@@ -14,9 +15,23 @@ import os
 # Add src directory to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from vehicle_detector import VehicleDetector
 from traffic_density_analyzer import TrafficDensityAnalyzer
 from shared_state import get_state_manager
+from network_camera import open_video_source, is_network_source, get_camera_health
+from frame_broadcaster import FrameBroadcaster
+from cooperative import run_blocking
+from time_series_store import TimeSeriesStore, DEFAULT_HISTORY_FILE, parse_duration
+from history_db import HistoryReader
+from detection_cache import open_detection_cache
+from frame_channel import attach_channel
+from camera_snapshots import CameraFeed, MosaicComposer
+from status_board import StatusBoard
+from frame_pool import FramePool, make_placeholder
+from cpu_resources import load_policy, apply_policy, open_capture
+from model_tuner import select_model
+from event_log import log_event
+from sampling_profiler import profile
+from vehicle_detector import DEFAULT_MODEL, DEFAULT_IMGSZ, detector_config
 
 app = Flask(__name__)
 
@@ -35,10 +50,36 @@ system_state = {
 
 state_lock = Lock()
 
+# Thread counts for OpenCV, decode and (standalone) inference, so they do not
+# oversubscribe the cores Flask and main.py also need
+cpu_policy = load_policy()
+apply_policy(cpu_policy)
+
+# Per-frame detection budget in standalone mode (seconds)
+DETECTION_BUDGET = 0.1
+
+# Detector model/input size tuned for this host by main.py or model_tuner.py
+# (only the cached decision and existing exports are used: the dashboard
+# never benchmarks or exports at startup)
+try:
+    tuned_model = select_model(DETECTION_BUDGET, export=False) or {}
+except Exception as e:
+    log_event('detector.tuning_unavailable', 'warning', error=str(e))
+    tuned_model = {}
+DETECTOR_MODEL = tuned_model.get('model_path', DEFAULT_MODEL)
+DETECTOR_IMGSZ = tuned_model.get('imgsz', DEFAULT_IMGSZ)
+
 # Initialize components
-detector = VehicleDetector()
+# The detector is created lazily: it loads torch + YOLO weights, and is only
+# needed in standalone mode (when main.py is not running)
+detector = None
+detector_status = 'idle'  # idle -> loading -> ready (or failed)
+detector_lock = Lock()
 analyzer = TrafficDensityAnalyzer()
 video_capture = None
+frame_pool = FramePool()  # Decoded frames are reused once every viewer is done with them
+PLACEHOLDER_FRAME, PLACEHOLDER_JPEG = make_placeholder("No Video Source")  # Encoded once
+detection_cache = None  # Detections for the looped video file (shared sidecar with main.py)
 state_manager = get_state_manager()
 
 # Vehicle count accumulator (for the "Vehicles Today" feature)
@@ -46,15 +87,91 @@ vehicle_accumulator = 0
 last_vehicle_update = time.time()
 VEHICLE_UPDATE_RATE = 3.0  # Update every 3 seconds (much slower)
 
+# Traffic history: main.py's snapshot when synced, local samples otherwise
+history_store = TimeSeriesStore()
+controller_history = None
+controller_history_mtime = 0
+last_signal_state = None
+history_db = HistoryReader()  # Durable history written by main.py
+
+# Frames published by main.py (shared memory), served instead of decoding the video
+frame_channel = None
+last_channel_attempt = 0
+last_published_seq = 0
+CHANNEL_RETRY_INTERVAL = 2.0  # Seconds between attach attempts
+CHANNEL_MAX_AGE = 2.0         # Published frames older than this mean main.py stopped
+
+# Detections behind the frame being served (main.py's or our own)
+latest_detections = {'source': None, 'seq': 0, 'timestamp': 0, 'vehicle_count': 0, 'boxes': []}
+
+# Release the detector after main.py has been synced this long (seconds)
+DETECTOR_IDLE_UNLOAD = 300
+last_standalone_time = time.time()
+
+# Background services (video + sync thread) are started on first request
+services_started = False
+services_lock = Lock()
+
+def get_detector():
+    """Get the vehicle detector, loading the model on first use"""
+    global detector, detector_status
+    
+    if detector is not None:
+        return detector
+    
+    with detector_lock:
+        if detector is None:
+            detector_status = 'loading'
+            try:
+                from vehicle_detector import VehicleDetector
+                from tiered_detector import TieredDetector
+                detector = TieredDetector(VehicleDetector(cache=detection_cache, model_path=DETECTOR_MODEL,
+                                                          imgsz=DETECTOR_IMGSZ, pool=frame_pool),
+                                          budget=DETECTION_BUDGET)
+                detector_status = 'ready'
+                print("✓ Vehicle detector loaded")
+            except Exception as e:
+                detector_status = 'failed'
+                log_event('detector.load_failed', 'error', error=str(e))
+                return None
+    return detector
+
+def warm_detector():
+    """Load the detector in the background so requests never wait for it"""
+    if detector_status == 'idle':
+        # run_blocking keeps the model load off the event loop under gevent
+        Thread(target=run_blocking, args=(get_detector,), daemon=True).start()
+
+def release_detector():
+    """Free the detector model (main.py is doing detection)"""
+    global detector, detector_status
+    with detector_lock:
+        if detector is not None:
+            detector = None
+            detector_status = 'idle'
+            log_event('detector.released', reason='synced with main.py')
+
 def init_video(video_path):
     """Initialize video capture"""
-    global video_capture
+    global video_capture, detection_cache
+    
+    # Try a network stream first (set VIDEO_SOURCE=rtsp://...)
+    stream_url = os.environ.get('VIDEO_SOURCE', video_path)
+    if is_network_source(stream_url):
+        video_capture = open_video_source(stream_url, decode_threads=cpu_policy.decode_threads)
+        print(f"✓ Network stream: {video_capture.camera_id}")
+        return True
     
     # Try to open video file
     if os.path.exists(video_path):
-        video_capture = cv2.VideoCapture(video_path)
+        video_capture = open_capture(video_path, cpu_policy.decode_threads)
         if video_capture.isOpened():
             print(f"✓ Video loaded: {video_path}")
+            # The file is looped: analyze each frame once (reuses main.py's sidecar)
+            detection_cache = open_detection_cache(
+                video_path, config=detector_config(DETECTOR_MODEL, DETECTOR_IMGSZ))
+            if detector is not None:
+                detector.cache = detection_cache
             return True
     
     # Try webcam as fallback
@@ -69,7 +186,8 @@ def init_video(video_path):
 
 def sync_with_main():
     """Background thread to sync state with main.py"""
-    global system_state, vehicle_accumulator, last_vehicle_update
+    global system_state, vehicle_accumulator, last_vehicle_update, last_standalone_time
+    global last_signal_state
     
     while True:
         try:
@@ -103,70 +221,187 @@ def sync_with_main():
                     last_vehicle_update = current_time
                 
                 system_state['last_update'] = time.time()
+                # 'main' is this dashboard's own state while main.py is not running
+                main_state = dict(shared, synced=True) if is_synced else dict(system_state, synced=False)
+            
+            # Serialize every camera's status once for /api/cameras (outside state_lock)
+            status_board.refresh({'main': main_state})
+        
+            # Record local history (main.py keeps its own when synced)
+            if not is_synced:
+                phase_changed = last_signal_state is not None and system_state['signal_state'] != last_signal_state
+                history_store.record_state(system_state, phase_changed)
+            last_signal_state = system_state['signal_state']
+            
+            # Standalone mode needs the detector; a long sync frees it
+            if is_synced:
+                if time.time() - last_standalone_time > DETECTOR_IDLE_UNLOAD:
+                    release_detector()
+            else:
+                last_standalone_time = time.time()
+                warm_detector()
         
         except Exception as e:
-            print(f"Sync error: {e}")
+            log_event('dashboard.sync_failed', 'error', error=str(e))
         
         time.sleep(0.5)  # Update twice per second
 
-def generate_frames():
-    """Generate frames for video streaming"""
-    global system_state, video_capture
+def get_frame_channel():
+    """Attach to main.py's frame channel (retried every few seconds)"""
+    global frame_channel, last_channel_attempt, last_published_seq
+    if frame_channel is None and time.time() - last_channel_attempt > CHANNEL_RETRY_INTERVAL:
+        last_channel_attempt = time.time()
+        frame_channel = attach_channel()
+        last_published_seq = 0
+    return frame_channel
+
+def set_latest_detections(source, seq, vehicle_count, boxes, confidences, class_ids, timestamp=None):
+    """Remember the detections for the frame being served"""
+    global latest_detections
+    latest_detections = {
+        'source': source,
+        'seq': seq,
+        'timestamp': timestamp or time.time(),
+        'vehicle_count': int(vehicle_count),
+        'boxes': [{'box': [round(float(v), 1) for v in box], 'confidence': round(float(conf), 3),
+                   'class_id': int(cls)} for box, conf, cls in zip(boxes, confidences, class_ids)]
+    }
+
+def read_published_frame():
+    """
+    Get main.py's latest annotated frame when it is running
+    Returns: (None, JPEG) for a new frame, None if there is nothing new,
+             or False if main.py is not publishing (decode locally instead)
+    """
+    global frame_channel, last_published_seq
+    channel = get_frame_channel()
+    if channel is None:
+        return False
     
-    while True:
-        if video_capture is None or not video_capture.isOpened():
-            # Return placeholder frame
-            import numpy as np
-            placeholder = np.zeros((480, 640, 3), dtype=np.uint8)
-            cv2.putText(placeholder, "No Video Source", (150, 240), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 1.5, (255, 255, 255), 2)
-            ret, buffer = cv2.imencode('.jpg', placeholder)
-            frame = buffer.tobytes()
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
-            time.sleep(0.1)
-            continue
-            
-        ret, frame = video_capture.read()
-        if not ret:
-            # Loop video
-            video_capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
-            continue
-        
-        # Only detect vehicles if NOT synced with main.py
-        with state_lock:
-            if not system_state['synced_with_main']:
-                try:
-                    count, annotated_frame = detector.detect_vehicles(frame)
-                    system_state['vehicle_count'] = count
-                    system_state['density'] = analyzer.classify_density(count)
-                    system_state['green_time'] = 30  # Fixed green time
-                except Exception as e:
-                    print(f"Detection error: {e}")
-                    annotated_frame = frame.copy()
-            else:
-                # Just annotate the frame, detection done by main.py
-                annotated_frame = frame.copy()
-        
-        # Add overlay text
-        cv2.putText(annotated_frame, f"Vehicles: {system_state['vehicle_count']}", 
-                   (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-        
-        # Add sync indicator
-        sync_text = "SYNCED WITH ARDUINO" if system_state['synced_with_main'] else "STANDALONE MODE"
-        sync_color = (0, 255, 0) if system_state['synced_with_main'] else (0, 165, 255)
-        cv2.putText(annotated_frame, sync_text, 
-                   (10, annotated_frame.shape[0] - 20), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, sync_color, 2)
-        
-        # Encode frame
-        ret, buffer = cv2.imencode('.jpg', annotated_frame)
-        frame = buffer.tobytes()
-        
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
-        
-        time.sleep(0.03)  # ~30 FPS
+    seq, timestamp = channel.read_header()
+    if time.time() - timestamp > CHANNEL_MAX_AGE:
+        # main.py stopped (or restarted with a new slot): re-attach later
+        if seq:
+            channel.close()
+            frame_channel = None
+        return False
+    
+    published = channel.read(last_published_seq)
+    if published is None:
+        return None
+    last_published_seq = published.seq
+    set_latest_detections('main', published.seq, published.vehicle_count, published.boxes,
+                          published.confidences, published.class_ids, published.timestamp)
+    return None, published.jpeg
+
+def produce_frame():
+    """
+    Read, analyze and annotate the next video frame
+    Runs once per frame in the broadcaster, shared by all viewers
+    When main.py is running, its published frame is served instead
+    """
+    if system_state['synced_with_main']:
+        published = read_published_frame()
+        if published is not False:
+            return published
+    
+    if video_capture is None or not video_capture.isOpened():
+        # Static placeholder: the same pre-encoded JPEG every time
+        return PLACEHOLDER_FRAME, PLACEHOLDER_JPEG
+    
+    # Decode into a pooled buffer (the broadcaster releases it when replaced)
+    ret, frame = frame_pool.read(video_capture)
+    if not ret:
+        # Loop video (network streams reconnect on their own)
+        video_capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        return None
+    
+    # Only detect vehicles if NOT synced with main.py
+    # Serve plain frames until the detector has finished loading
+    active_detector = detector if detector_status == 'ready' else None
+    if not system_state['synced_with_main'] and active_detector is not None:
+        try:
+            # Detect outside state_lock so /api/status never waits on inference
+            frame_index = None
+            if detection_cache is not None:
+                frame_index = int(video_capture.get(cv2.CAP_PROP_POS_FRAMES)) - 1
+            count, annotated_frame = active_detector.detect_vehicles(frame, frame_index)
+            frame_pool.release(frame)  # Annotated into its own pooled buffer
+            set_latest_detections('dashboard', latest_detections['seq'] + 1, count,
+                                  *active_detector.last_detections)
+            with state_lock:
+                system_state['vehicle_count'] = count
+                system_state['density'] = analyzer.classify_density(
+                    analyzer.frame_demand(active_detector.last_detections[2], count))
+                system_state['green_time'] = 30  # Fixed green time
+        except Exception as e:
+            log_event('detector.detect_failed', 'error', error=str(e))
+            annotated_frame = frame
+    else:
+        # Just annotate the frame, detection done by main.py
+        annotated_frame = frame
+    
+    # Add overlay text
+    cv2.putText(annotated_frame, f"Vehicles: {system_state['vehicle_count']}", 
+               (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+    
+    # Add sync indicator
+    sync_text = "SYNCED WITH ARDUINO" if system_state['synced_with_main'] else "STANDALONE MODE"
+    sync_color = (0, 255, 0) if system_state['synced_with_main'] else (0, 165, 255)
+    cv2.putText(annotated_frame, sync_text, 
+               (10, annotated_frame.shape[0] - 20), 
+               cv2.FONT_HERSHEY_SIMPLEX, 0.6, sync_color, 2)
+    
+    return annotated_frame
+
+# One producer decodes/encodes each frame; every viewer shares the result
+broadcaster = FrameBroadcaster(produce_frame, fps=30, pool=frame_pool)
+
+def generate_frames(width=None, quality=None, fps=None):
+    """Generate frames for video streaming (newest frame, shared by all viewers)"""
+    return broadcaster.stream(width=width, quality=quality, fps=fps)
+
+# Cameras on this host (one main.py each) for snapshots and the mosaic,
+# e.g. TRAFFIC_CAMERAS=main,north,south
+CAMERAS = [camera for camera in os.environ.get('TRAFFIC_CAMERAS', 'main').split(',') if camera]
+MOSAIC_FPS = 5
+MOSAIC_QUALITY = 70
+
+# 'main' falls back to this dashboard's own stream when main.py is not running
+camera_feeds = {camera: CameraFeed(camera, fallback=broadcaster.snapshot if camera == 'main' else None)
+                for camera in CAMERAS}
+mosaic = MosaicComposer(camera_feeds.values())
+# One composite encode per mosaic frame, shared by every overview screen
+mosaic_broadcaster = FrameBroadcaster(mosaic.compose, fps=MOSAIC_FPS, jpeg_quality=MOSAIC_QUALITY)
+# Per-camera status, serialized once per sync tick
+status_board = StatusBoard(CAMERAS)
+
+def run_background_services():
+    """Open the video source, then keep syncing with main.py"""
+    if video_capture is None:
+        video_path = os.path.join(os.path.dirname(__file__), '..', 'videos', 'traffic_video.mp4')
+        if not init_video(video_path):
+            print("⚠ Running without video - dashboard will show placeholder")
+    
+    sync_with_main()
+
+def start_background_services():
+    """Start the background services thread (runs once, never blocks)"""
+    global services_started
+    
+    with services_lock:
+        if services_started:
+            return
+        services_started = True
+    
+    services_thread = Thread(target=run_background_services, daemon=True)
+    services_thread.start()
+
+@app.before_request
+def ensure_background_services():
+    """Start background services lazily (also under gunicorn)"""
+    if not services_started:
+        start_background_services()
 
 @app.route('/')
 def index():
@@ -175,10 +410,53 @@ def index():
 
 @app.route('/video_feed')
 def video_feed():
-    """Video streaming route"""
-    return Response(generate_frames(),
+    """
+    Video streaming route
+    Optional query parameters for weak links: w (width px), q (JPEG quality), fps
+    e.g. /video_feed?w=480&q=60&fps=10
+    """
+    width = request.args.get('w', type=int)
+    quality = request.args.get('q', type=int)
+    fps = request.args.get('fps', type=float)
+    return Response(generate_frames(width, quality, fps),
                    mimetype='multipart/x-mixed-replace; boundary=frame')
 
+@app.route('/api/snapshot/<camera>.jpg')
+def snapshot(camera):
+    """
+    Latest frame of one camera as published (no encoding); send the ETag
+    back in If-None-Match to get 304 Not Modified until it changes
+    """
+    feed = camera_feeds.get(camera)
+    if feed is None:
+        return jsonify({'error': f"unknown camera '{camera}'", 'cameras': CAMERAS}), 404
+    jpeg, etag = feed.latest()
+    if jpeg is None:
+        return jsonify({'error': f"no frame from '{camera}' yet"}), 503
+    response = Response(jpeg, mimetype='image/jpeg')
+    response.headers['ETag'] = etag
+    response.headers['Cache-Control'] = 'no-cache'  # Revalidate every time
+    return response.make_conditional(request)
+
+@app.route('/mosaic_feed')
+def mosaic_feed():
+    """
+    All cameras in one low-resolution MJPEG stream
+    Optional query parameters: w (width px), q (JPEG quality), fps
+    """
+    width = request.args.get('w', type=int)
+    quality = request.args.get('q', type=int)
+    fps = request.args.get('fps', type=float)
+    return Response(mosaic_broadcaster.stream(width, quality, fps),
+                   mimetype='multipart/x-mixed-replace; boundary=frame')
+
+@app.route('/api/streams')
+def stream_stats():
+    """API endpoint for video stream variants and viewers"""
+    mosaic_stats = dict(mosaic_broadcaster.get_stats(), cameras=CAMERAS,
+                        tiles_decoded=mosaic.tiles_decoded)
+    return jsonify(dict(broadcaster.get_stats(), mosaic=mosaic_stats))
+
 @app.route('/api/status')
 def get_status():
     """API endpoint for system status"""
@@ -187,6 +465,91 @@ def get_status():
         status['total_vehicles_today'] = vehicle_accumulator
     return jsonify(status)
 
+@app.route('/api/cameras')
+def list_cameras():
+    """API endpoint for every camera's summary (pre-serialized each sync tick)"""
+    return Response(status_board.cameras_body(), mimetype='application/json')
+
+@app.route('/api/cameras/<camera>/status')
+def camera_status(camera):
+    """API endpoint for one camera's full status (pre-serialized each sync tick)"""
+    body = status_board.status_body(camera)
+    if body is None:
+        if camera not in CAMERAS:
+            return jsonify({'error': f"unknown camera '{camera}'", 'cameras': CAMERAS}), 404
+        return jsonify({'error': f"no status from '{camera}' yet"}), 503
+    return Response(body, mimetype='application/json')
+
+@app.route('/api/detections')
+def get_detections():
+    """API endpoint for the vehicle boxes behind the frame being streamed"""
+    detections = dict(latest_detections)
+    # Which detection tier produced them (yolo, or motion when inference fell behind)
+    detections['tier'] = None
+    if detections['source'] == 'main':
+        detections['tier'] = state_manager.get_state().get('detection_tier')
+    elif detector is not None:
+        detections['tier'] = detector.tier
+        detections['tier_stats'] = detector.get_stats()
+    return jsonify(detections)
+
+@app.route('/api/camera_health')
+def camera_health():
+    """API endpoint for network camera health"""
+    cameras = get_camera_health()
+    
+    # Include the camera used by main.py when synced
+    shared = state_manager.get_state()
+    if 'camera_health' in shared and not state_manager.is_stale(max_age_seconds=3):
+        controller_camera = dict(shared['camera_health'], process='main')
+        cameras.append(controller_camera)
+    
+    return jsonify({'cameras': cameras})
+
+def get_history_store():
+    """Get main.py's history snapshot when synced, else the dashboard's own"""
+    global controller_history, controller_history_mtime
+    
+    if system_state['synced_with_main'] and os.path.exists(DEFAULT_HISTORY_FILE):
+        mtime = os.path.getmtime(DEFAULT_HISTORY_FILE)
+        if mtime != controller_history_mtime:
+            try:
+                controller_history = TimeSeriesStore.load(DEFAULT_HISTORY_FILE)
+                controller_history_mtime = mtime
+            except Exception as e:
+                log_event('history.load_failed', 'error', error=str(e))
+        if controller_history is not None:
+            return controller_history
+    return history_store
+
+@app.route('/api/history')
+def get_history():
+    """
+    API endpoint for pre-aggregated traffic history
+    range: how far back (e.g. 3600, 30m, 24h, 7d); step: seconds per point (e.g. 60, 5m)
+    """
+    range_seconds = parse_duration(request.args.get('range'), 3600)
+    step = parse_duration(request.args.get('step'), 60)
+    range_seconds = min(max(range_seconds, 1), 30 * 86400)
+    step = max(step, 1)
+    return jsonify(get_history_store().query(range_seconds, step))
+
+@app.route('/api/rollups')
+def get_rollups():
+    """
+    API endpoint for durable hourly/daily rollups written by main.py
+    period: hourly or daily; range: how far back (e.g. 7d); camera: optional camera id
+    """
+    period = request.args.get('period', 'hourly')
+    if period not in ('hourly', 'daily'):
+        return jsonify({'error': 'period must be hourly or daily'}), 400
+    range_seconds = parse_duration(request.args.get('range'), 7 * 86400)
+    if not history_db.exists():
+        return jsonify({'period': period, 'rollups': []})
+    rollups = history_db.query_rollups(period, start=time.time() - range_seconds,
+                                       camera_id=request.args.get('camera'))
+    return jsonify({'period': period, 'rollups': rollups})
+
 @app.route('/api/reset')
 def reset_stats():
     """Reset statistics"""
@@ -195,24 +558,69 @@ def reset_stats():
         vehicle_accumulator = 0
     return jsonify({'status': 'reset', 'message': 'Statistics reset successfully'})
 
+# Token for the /debug routes, sent as the X-Debug-Token header
+# (unset = the debug routes do not exist)
+DEBUG_TOKEN = os.environ.get('DEBUG_TOKEN')
+MAX_PROFILE_SECONDS = 60
+profile_lock = Lock()  # One profile at a time
+
+@app.route('/debug/profile')
+def debug_profile():
+    """
+    Sample every thread of the live process for ?seconds=N (default 10) and
+    return collapsed stacks (feed to flamegraph.pl or speedscope); admin only
+    """
+    if not DEBUG_TOKEN:
+        return jsonify({'error': 'not found'}), 404
+    token = request.headers.get('X-Debug-Token', '')
+    if not hmac.compare_digest(token.encode(), DEBUG_TOKEN.encode()):
+        return jsonify({'error': 'forbidden'}), 403
+    try:
+        seconds = float(request.args.get('seconds', 10))
+        interval = float(request.args.get('interval_ms', 10)) / 1000
+    except ValueError:
+        return jsonify({'error': 'seconds and interval_ms must be numbers'}), 400
+    seconds = min(max(seconds, 0.1), MAX_PROFILE_SECONDS)
+    interval = min(max(interval, 0.001), 1.0)
+    
+    if not profile_lock.acquire(blocking=False):
+        return jsonify({'error': 'a profile is already running'}), 409
+    try:
+        profiler = profile(seconds, interval)
+    finally:
+        profile_lock.release()
+    log_event('debug.profiled', seconds=seconds, samples=profiler.samples)
+    
+    filename = f"dashboard-{int(time.time())}.folded"
+    return Response(profiler.collapsed(), mimetype='text/plain',
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
+def is_ready():
+    """Ready once frames can be analyzed (by main.py or the local detector)"""
+    return services_started and (system_state['synced_with_main'] or detector_status == 'ready')
+
 @app.route('/health')
 def health():
-    """Health check endpoint"""
-    return jsonify({'status': 'healthy', 'timestamp': time.time()})
+    """Health check endpoint (liveness, with readiness reported separately)"""
+    return jsonify({
+        'status': 'healthy',
+        'live': True,
+        'ready': is_ready(),
+        'detector': detector_status,
+        'synced_with_main': system_state['synced_with_main'],
+        'viewers': broadcaster.viewers,
+        'timestamp': time.time()
+    })
+
+@app.route('/health/ready')
+def readiness():
+    """Readiness probe: 503 until detection is available"""
+    ready = is_ready()
+    return jsonify({'ready': ready, 'detector': detector_status}), (200 if ready else 503)
 
 if __name__ == '__main__':
-    # Initialize with default video
-    video_path = os.path.join(os.path.dirname(__file__), '..', 'videos', 'traffic_video.mp4')
-    
-    # Try to initialize video
-    video_initialized = init_video(video_path)
-    
-    if not video_initialized:
-        print("⚠ Running without video - dashboard will show placeholder")
-    
-    # Start sync thread
-    sync_thread = Thread(target=sync_with_main, daemon=True)
-    sync_thread.start()
+    # Open video and start sync thread in the background
+    start_background_services()
     
     print("=" * 60)
     print("🚦 Traffic Management Dashboard Starting...")
@@ -0,0 +1,23 @@
+"""
+Gunicorn configuration for the dashboard (production)
+A single gevent worker holds hundreds of long-lived /video_feed streams as
+cheap greenlets instead of one OS thread each
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+# One process on purpose: the video source, detector and frame broadcaster
+# live in the worker, and every viewer shares them. More workers would each
+# decode (and detect on) the video again.
+workers = 1
+
+# Greenlet worker: each open MJPEG stream costs a greenlet, not a thread.
+# Blocking decode/inference runs on gevent's native threadpool (see cooperative.py)
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gevent')
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', '1000'))
+
+# The model loads in the background, so workers boot fast
+timeout = 30
+graceful_timeout = 10
@@ -6,6 +6,8 @@ Sends signal commands to Arduino to control LED lights
 import serial
 import time
 
+from event_log import log_event
+
 class ArduinoController:
     def __init__(self, port='COM3', baud_rate=9600):
         """
@@ -29,13 +31,13 @@ class ArduinoController:
         if self.arduino and self.arduino.is_open:
             try:
                 self.arduino.write(state.encode())
-                print(f"Sent '{state}' to Arduino")
+                log_event('arduino.signal_sent', signal=state)
                 return True
             except Exception as e:
-                print(f"Error sending to Arduino: {e}")
+                log_event('arduino.send_failed', 'error', signal=state, error=str(e))
                 return False
         else:
-            print("Arduino not connected")
+            log_event('arduino.not_connected', 'warning', signal=state)
             return False
     
     def close(self):
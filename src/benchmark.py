@@ -0,0 +1,1195 @@
+"""
+Performance Benchmark Suite
+Measures detector, post-processing, shared state, dashboard and end-to-end
+performance, stores JSON baselines and fails when a result regresses
+
+Usage:
+    python benchmark.py --save-baseline     # record a baseline for this host
+    python benchmark.py                     # run and compare against baseline
+    python benchmark.py --only postprocess shared_state --quick
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+from threading import Thread, Event
+
+import cv2
+import numpy as np
+
+SRC_DIR = Path(__file__).parent
+BASE_DIR = SRC_DIR.parent
+DEFAULT_BASELINE = SRC_DIR / "benchmark_baseline.json"
+BUNDLED_VIDEO = BASE_DIR / "videos" / "traffic_video.mp4"
+
+# Registered benchmarks: name -> function(quick) returning {metric: (value, unit, higher_is_better)}
+BENCHMARKS = {}
+
+
+class BenchmarkSkipped(Exception):
+    """Raised when a benchmark cannot run on this host (e.g. missing package)"""
+
+
+def benchmark(name):
+    """
+    Register a benchmark function
+    It returns {metric: (value, unit, higher_is_better)}; higher_is_better
+    None marks an informational metric (a reference measurement, a size or
+    a count) that is reported but never compared against the baseline
+    """
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+def time_calls(func, repeat, warmup=2):
+    """
+    Time repeated calls of func
+    Returns: list of durations in seconds
+    """
+    for _ in range(warmup):
+        func()
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def synthetic_frame(width, height, seed=0):
+    """Create a deterministic synthetic road-like frame"""
+    rng = np.random.default_rng(seed)
+    frame = np.full((height, width, 3), 90, dtype=np.uint8)
+    for _ in range(12):
+        x = int(rng.integers(0, max(width - 80, 1)))
+        y = int(rng.integers(0, max(height - 50, 1)))
+        color = tuple(int(c) for c in rng.integers(0, 255, 3))
+        cv2.rectangle(frame, (x, y), (x + 80, y + 50), color, -1)
+    return frame
+
+
+def synthetic_detections(count, width=1280, height=720, seed=0):
+    """
+    Create random detection arrays (boxes, confidences, class IDs)
+    Half of the boxes are vehicles, the rest other COCO classes
+    """
+    rng = np.random.default_rng(seed)
+    x1 = rng.uniform(0, width - 100, count)
+    y1 = rng.uniform(0, height - 100, count)
+    boxes = np.stack([x1, y1, x1 + rng.uniform(20, 100, count),
+                      y1 + rng.uniform(20, 100, count)], axis=1).astype(np.float32)
+    confidences = rng.uniform(0.25, 1.0, count).astype(np.float32)
+    class_ids = rng.choice([0, 1, 2, 3, 5, 7, 9], count).astype(np.int32)
+    return boxes, confidences, class_ids
+
+
+def get_video_path():
+    """
+    Get the bundled traffic video, or write a short synthetic clip
+    Returns: path to a readable video file
+    """
+    if BUNDLED_VIDEO.exists():
+        return str(BUNDLED_VIDEO)
+
+    path = os.path.join(tempfile.gettempdir(), "benchmark_clip.avi")
+    if not os.path.exists(path):
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 25, (640, 480))
+        for i in range(100):
+            writer.write(synthetic_frame(640, 480, seed=i))
+        writer.release()
+    return path
+
+
+def load_detector():
+    """Load the vehicle detector or skip the benchmark"""
+    try:
+        from vehicle_detector import VehicleDetector
+        return VehicleDetector()
+    except ImportError as e:
+        raise BenchmarkSkipped(f"detector unavailable ({e})")
+
+
+def percentile_ms(durations, q):
+    """Get a percentile of durations in milliseconds"""
+    return float(np.percentile(durations, q) * 1000)
+
+
+# ---------------------------------------------------------------------------
+# Benchmarks
+# ---------------------------------------------------------------------------
+
+@benchmark("detector")
+def bench_detector(quick):
+    """Detector FPS at several resolutions and batch sizes"""
+    detector = load_detector()
+    resolutions = [(640, 480), (1280, 720)] if quick else [(640, 480), (1280, 720), (1920, 1080)]
+    batch_sizes = [1, 4]
+    repeat = 3 if quick else 10
+
+    metrics = {}
+    for width, height in resolutions:
+        for batch in batch_sizes:
+            frames = [synthetic_frame(width, height, seed=i) for i in range(batch)]
+            if batch == 1:
+                durations = time_calls(lambda: detector.detect_vehicles(frames[0]), repeat)
+            else:
+                durations = time_calls(lambda: detector.detect_batch(frames), repeat)
+            fps = batch / float(np.median(durations))
+            metrics[f"fps_{width}x{height}_b{batch}"] = (fps, "frames/s", True)
+    return metrics
+
+
+@benchmark("model_tuning")
+def bench_model_tuning(quick):
+    """Detection round time by model variant and input size (the auto-tuner's search space)"""
+    try:
+        from model_tuner import Candidate, measure_candidate
+        import ultralytics  # noqa: F401
+    except ImportError as e:
+        raise BenchmarkSkipped(f"detector unavailable ({e})")
+
+    frames = [synthetic_frame(1280, 720, seed=i) for i in range(4)]
+    metrics = {}
+    for model in (['yolov8n'] if quick else ['yolov8n', 'yolov8s']):
+        for imgsz in [320, 480, 640]:
+            latency = measure_candidate(Candidate(model, imgsz, 1, 'pytorch'), frames, 1,
+                                        repeat=5 if quick else 20)
+            metrics[f"{model}_{imgsz}_p95_ms"] = (latency * 1000, "ms", False)
+    return metrics
+
+
+@benchmark("tiled_detector")
+def bench_tiled_detector(quick):
+    """Far-field tiling cost versus scaling up the whole frame (1920x1080)"""
+    detector = load_detector()
+    frame = synthetic_frame(1920, 1080)
+    repeat = 3 if quick else 10
+
+    full = time_calls(lambda: detector.model(frame, verbose=False), repeat)
+    upscaled = time_calls(lambda: detector.model(frame, imgsz=1280, verbose=False), repeat)
+    detector.tile_roi = (0.3, 0.0, 0.7, 0.35)
+    tiled = time_calls(lambda: detector.run_model(frame), repeat)
+    return {
+        "ms_full_640": (percentile_ms(full, 50), "ms", False),
+        "ms_full_1280": (percentile_ms(upscaled, 50), "ms", False),
+        "ms_tiled_roi": (percentile_ms(tiled, 50), "ms", False),
+        "tiles": (len(detector.get_tiles(frame.shape)), "tiles", None)
+    }
+
+
+@benchmark("nms")
+def bench_nms(quick):
+    """Cross-tile NMS cost versus box count"""
+    from vehicle_detector import non_max_suppression
+
+    repeat = 20 if quick else 200
+    metrics = {}
+    for count in [10, 100, 500]:
+        boxes, confidences, class_ids = synthetic_detections(count)
+        durations = time_calls(lambda: non_max_suppression(boxes, confidences, class_ids), repeat)
+        metrics[f"us_{count}_boxes"] = (float(np.median(durations) * 1e6), "us", False)
+    return metrics
+
+
+@benchmark("postprocess")
+def bench_postprocess(quick):
+    """Post-processing (filter + draw) cost versus box count"""
+    try:
+        from vehicle_detector import VehicleDetector
+    except ImportError as e:
+        raise BenchmarkSkipped(f"detector module unavailable ({e})")
+
+    detector = VehicleDetector.__new__(VehicleDetector)
+    detector.vehicle_classes = [2, 3, 5, 7]
+    names = {0: 'person', 1: 'bicycle', 2: 'car', 3: 'motorcycle',
+             5: 'bus', 7: 'truck', 9: 'traffic light'}
+    frame = synthetic_frame(1280, 720)
+    repeat = 20 if quick else 100
+
+    metrics = {}
+    for count in [0, 10, 100, 1000]:
+        boxes, confidences, class_ids = synthetic_detections(count)
+
+        def postprocess():
+            filtered = detector.filter_vehicles(boxes, confidences, class_ids)
+            detector.draw_detections(frame, *filtered, names)
+
+        durations = time_calls(postprocess, repeat)
+        metrics[f"us_per_frame_{count}_boxes"] = (float(np.median(durations) * 1e6), "us", False)
+    return metrics
+
+
+@benchmark("consumers")
+def bench_consumers(quick):
+    """Extra post-processing per frame for each analytic sharing the inference"""
+    from detection_consumers import PedestrianWaiting, CyclistCounter
+
+    consumers = [PedestrianWaiting(zone=(0.0, 0.6, 0.3, 1.0)), CyclistCounter()]
+    shape = (720, 1280, 3)
+    repeat = 50 if quick else 500
+
+    metrics = {}
+    for count in [10, 100]:
+        boxes, confidences, class_ids = synthetic_detections(count)
+        for consumer in consumers:
+            durations = time_calls(lambda: consumer.consume(boxes, confidences, class_ids, shape), repeat)
+            metrics[f"{consumer.name}_us_{count}_boxes"] = (float(np.median(durations) * 1e6), "us", False)
+    return metrics
+
+
+@benchmark("motion_tier")
+def bench_motion_tier(quick):
+    """Fallback motion blob counter cost per frame (the tier used when YOLO is over budget)"""
+    from tiered_detector import BlobCounter
+
+    repeat = 50 if quick else 300
+    metrics = {}
+    for width, height in [(640, 480), (1280, 720)]:
+        counter = BlobCounter()
+        frames = [synthetic_frame(width, height, seed=i) for i in range(10)]
+        index = iter(range(10 ** 9))
+        durations = time_calls(lambda: counter.count(frames[next(index) % 10]), repeat)
+        metrics[f"ms_{width}x{height}"] = (percentile_ms(durations, 50), "ms", False)
+    return metrics
+
+
+@benchmark("frame_lifecycle")
+def bench_frame_lifecycle(quick):
+    """Per-frame allocation and decode cost with and without the frame pool, and placeholder cost"""
+    from frame_pool import FramePool, make_placeholder
+    from frame_broadcaster import FrameBroadcaster
+
+    path = get_video_path()
+    num_frames = 50 if quick else 200
+
+    def decode(read):
+        # Returns (ms per frame, KB of new frame buffers per frame)
+        capture = cv2.VideoCapture(path)
+        previous = read(capture)  # Warm up (first allocation)
+        allocated = 0
+        frames = 0
+        start = time.perf_counter()
+        for _ in range(num_frames):
+            frame = read(capture)
+            if frame is None:
+                capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                continue
+            # The previous frame is still referenced, so a different buffer is a new allocation
+            if frame.ctypes.data != previous.ctypes.data:
+                allocated += frame.nbytes
+            previous = frame
+            frames += 1
+        elapsed = time.perf_counter() - start
+        capture.release()
+        return elapsed / max(frames, 1) * 1000, allocated / max(frames, 1) / 1024
+
+    def plain_read(capture):
+        ret, frame = capture.read()
+        return frame if ret else None
+
+    pool = FramePool()
+
+    def pooled_read(capture):
+        ret, frame = pool.read(capture)
+        pool.release(frame)  # Consumer done: the buffer goes back for the next decode
+        return frame if ret else None
+
+    plain_ms, plain_kb = decode(plain_read)
+    pooled_ms, pooled_kb = decode(pooled_read)
+
+    # Placeholder: allocate + draw + encode every frame versus pre-encoded once
+    def placeholder_per_frame():
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        cv2.putText(frame, "No Video Source", (150, 240), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (255, 255, 255), 2)
+        return frame
+
+    placeholder = make_placeholder("No Video Source")
+    repeat = 50 if quick else 300
+    timings = {}
+    for name, produce in [("old", placeholder_per_frame), ("new", lambda: placeholder)]:
+        broadcaster = FrameBroadcaster(produce, jpeg_quality=80)
+
+        def tick():
+            produced = produce()
+            broadcaster._publish(*(produced if isinstance(produced, tuple) else (produced, None)))
+            broadcaster.get_jpeg(quality=80)
+            broadcaster.get_jpeg(width=320, quality=50)
+
+        timings[name] = time_calls(tick, repeat)
+
+    return {
+        "decode_ms_plain": (plain_ms, "ms", None),
+        "decode_ms_pooled": (pooled_ms, "ms", False),
+        "alloc_kb_per_frame_plain": (plain_kb, "KB", None),
+        "alloc_kb_per_frame_pooled": (pooled_kb, "KB", False),
+        "placeholder_tick_us_old": (float(np.median(timings["old"]) * 1e6), "us", None),
+        "placeholder_tick_us": (float(np.median(timings["new"]) * 1e6), "us", False)
+    }
+
+
+@benchmark("cpu_threads")
+def bench_cpu_threads(quick):
+    """Frame latency and jitter with library default threads vs the CPU policy, next to a busy decoder"""
+    from cpu_resources import apply_policy, default_policy, open_capture, ThreadPolicy
+
+    path = get_video_path()
+    frame = synthetic_frame(1280, 720)
+    repeat = 30 if quick else 150
+
+    def process():
+        # The OpenCV side of one frame: resize, blur, encode
+        small = cv2.resize(frame, (640, 360), interpolation=cv2.INTER_AREA)
+        cv2.GaussianBlur(small, (9, 9), 0)
+        cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
+
+    def measure(policy, decode_threads):
+        apply_policy(policy, pin=False)
+        stop = Event()
+
+        def decoder():
+            capture = open_capture(path, decode_threads)
+            while not stop.is_set():
+                if not capture.read()[0]:
+                    capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            capture.release()
+
+        thread = Thread(target=decoder, daemon=True)
+        thread.start()
+        durations = time_calls(process, repeat)
+        stop.set()
+        thread.join()
+        return durations
+
+    cores = os.cpu_count() or 1
+    previous_threads = cv2.getNumThreads()
+    # Library defaults: every pool sized to the whole machine
+    unmanaged = measure(ThreadPolicy(cores, cores, 0), 0)
+    policy = default_policy()
+    managed = measure(policy, policy.decode_threads)
+    cv2.setNumThreads(previous_threads)
+
+    return {
+        "default_p50_ms": (percentile_ms(unmanaged, 50), "ms", None),
+        "default_p95_ms": (percentile_ms(unmanaged, 95), "ms", None),
+        "default_jitter_ms": (float(np.std(unmanaged) * 1000), "ms", None),
+        "policy_p50_ms": (percentile_ms(managed, 50), "ms", False),
+        "policy_p95_ms": (percentile_ms(managed, 95), "ms", False),
+        "policy_jitter_ms": (float(np.std(managed) * 1000), "ms", False)
+    }
+
+
+@benchmark("detection_cache")
+def bench_detection_cache(quick):
+    """DetectionCache lookup cost by frame index and by content hash"""
+    from detection_cache import DetectionCache
+
+    cache = DetectionCache("benchmark", capacity=1000)
+    frames = [synthetic_frame(640, 480, seed=i) for i in range(20)]
+    for i, frame in enumerate(frames):
+        cache.put(synthetic_detections(10), i, frame)
+    repeat = 200 if quick else 2000
+
+    index_hits = time_calls(lambda: cache.get(7, frames[7]), repeat)
+    hash_hits = time_calls(lambda: cache.get(None, frames[7]), repeat)
+    misses = time_calls(lambda: cache.get(None, frames[0][::-1]), repeat)
+    return {
+        "index_hit_us": (float(np.median(index_hits) * 1e6), "us", False),
+        "hash_hit_us": (float(np.median(hash_hits) * 1e6), "us", False),
+        "miss_us": (float(np.median(misses) * 1e6), "us", False)
+    }
+
+
+@benchmark("frame_channel")
+def bench_frame_channel(quick):
+    """Publish and read one 640x480 annotated frame through shared memory"""
+    from frame_channel import FrameChannel
+
+    ret, jpeg = cv2.imencode('.jpg', synthetic_frame(640, 480), [cv2.IMWRITE_JPEG_QUALITY, 90])
+    boxes, confidences, class_ids = synthetic_detections(20)
+    name = f"benchmark_frame_slot_{os.getpid()}"
+    publisher = FrameChannel(name, create=True)
+    reader = FrameChannel(name)
+    repeat = 200 if quick else 2000
+    try:
+        publish = time_calls(lambda: publisher.publish(jpeg, boxes, confidences, class_ids), repeat)
+        read = time_calls(lambda: (publisher.publish(jpeg, boxes, confidences, class_ids),
+                                   reader.read()), repeat)
+    finally:
+        reader.close()
+        publisher.close()
+    return {
+        "publish_us": (float(np.median(publish) * 1e6), "us", False),
+        "publish_read_us": (float(np.median(read) * 1e6), "us", False)
+    }
+
+
+@benchmark("shared_state")
+def bench_shared_state(quick):
+    """SharedStateManager.update_state operations per second"""
+    from shared_state import SharedStateManager
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = SharedStateManager(state_file=os.path.join(tmp, "state.json"))
+        repeat = 200 if quick else 2000
+        durations = time_calls(lambda: manager.update_state(vehicle_count=5, density='LOW',
+                                                            time_remaining=10), repeat)
+    return {
+        "update_ops_per_sec": (1.0 / float(np.median(durations)), "ops/s", True),
+        "update_p99_ms": (percentile_ms(durations, 99), "ms", False)
+    }
+
+
+@benchmark("phase_timing")
+def bench_phase_timing(quick):
+    """Phase transition lateness: frame-loop checks vs the deadline scheduler, idle and under load"""
+    from phase_scheduler import PhaseScheduler
+
+    phases = 10 if quick else 40
+    phase_length = 0.05
+    frame = synthetic_frame(1280, 720)
+
+    def inference_load(stop):
+        # Stand-in for detection: OpenCV work (releases the GIL) plus Python post-processing
+        while not stop.is_set():
+            cv2.GaussianBlur(frame, (31, 31), 0)
+            sum(i * i for i in range(20000))
+
+    def scheduler_lateness(loaded):
+        stop = Event()
+        if loaded:
+            Thread(target=inference_load, args=(stop,), daemon=True).start()
+        remaining = [phases]
+
+        def next_phases():
+            remaining[0] -= 1
+            return [("GREEN", phase_length)] if remaining[0] >= 0 else []
+
+        scheduler = PhaseScheduler(next_phases, lambda state, duration: None)
+        scheduler.start()
+        scheduler._thread.join()
+        stop.set()
+        return scheduler.get_stats()
+
+    def frame_loop_overrun(frame_time):
+        # The old run_for_duration: elapsed time checked between frames (+ waitKey(30))
+        overruns = []
+        for _ in range(max(phases // 4, 3)):
+            start = time.monotonic()
+            while time.monotonic() - start < phase_length:
+                time.sleep(frame_time + 0.03)
+            overruns.append(time.monotonic() - start - phase_length)
+        return float(np.mean(overruns) * 1000)
+
+    idle = scheduler_lateness(False)
+    loaded = scheduler_lateness(True)
+    return {
+        "frame_loop_overrun_ms": (frame_loop_overrun(0.06), "ms", False),
+        "scheduler_p95_ms_idle": (idle['p95_ms'], "ms", False),
+        "scheduler_p95_ms_loaded": (loaded['p95_ms'], "ms", False),
+        "scheduler_max_ms_loaded": (loaded['max_ms'], "ms", False)
+    }
+
+
+@benchmark("preemption")
+def bench_preemption(quick):
+    """Emergency trigger to lamp command latency, idle and under detection-like load"""
+    from phase_scheduler import PhaseScheduler
+    from preemption import Preemption
+
+    triggers = 10 if quick else 50
+    frame = synthetic_frame(1280, 720)
+
+    def inference_load(stop):
+        while not stop.is_set():
+            cv2.GaussianBlur(frame, (31, 31), 0)
+            sum(i * i for i in range(20000))
+
+    def response_latency(loaded):
+        stop = Event()
+        load = Thread(target=inference_load, args=(stop,), daemon=True)
+        if loaded:
+            load.start()
+        scheduler = PhaseScheduler(lambda: [("GREEN", 60)], None)
+        preemption = Preemption(scheduler, yellow_time=60, all_red_time=0, hold_time=60)
+        scheduler.on_transition = lambda state, duration: preemption.lamp_changed(state)
+        scheduler.start()
+        for _ in range(triggers):
+            preemption.trigger('benchmark')
+            time.sleep(0.02)
+        scheduler.stop()
+        stop.set()
+        if loaded:
+            load.join()
+        return preemption.get_stats()
+
+    idle = response_latency(False)
+    loaded = response_latency(True)
+    return {
+        "response_p95_ms_idle": (idle['response_p95_ms'], "ms", False),
+        "response_p95_ms_loaded": (loaded['response_p95_ms'], "ms", False),
+        "response_max_ms_loaded": (loaded['response_max_ms'], "ms", False)
+    }
+
+
+@benchmark("event_log")
+def bench_event_log(quick):
+    """Caller cost of a log line: synchronous print vs the queued event log, with a slow consumer"""
+    from event_log import EventLogger
+
+    class SlowStream:
+        # Like a stdout pipe whose reader (e.g. gunicorn's log capture) lags behind
+        def write(self, text):
+            time.sleep(0.002)
+
+        def flush(self):
+            pass
+
+    repeat = 200 if quick else 2000
+    stream = SlowStream()
+    printed = time_calls(lambda: print("Sent 'G' to Arduino", file=stream, flush=True), repeat // 10)
+
+    logger = EventLogger(stream=stream, queue_size=1000)
+    logged = time_calls(lambda: logger.log('arduino.signal_sent', signal='G'), repeat)
+    errors = time_calls(lambda: logger.log('state.write_failed', 'error', error='disk full'), repeat)
+
+    return {
+        "print_p50_us": (percentile_ms(printed, 50) * 1000, "us", None),
+        "log_p50_us": (percentile_ms(logged, 50) * 1000, "us", False),
+        "log_p99_us": (percentile_ms(logged, 99) * 1000, "us", False),
+        "rate_limited_error_p50_us": (percentile_ms(errors, 50) * 1000, "us", False)
+    }
+
+
+@benchmark("sampling_profiler")
+def bench_sampling_profiler(quick):
+    """Cost of one stack sample and the slowdown of a busy loop while the profiler runs"""
+    from sampling_profiler import SamplingProfiler
+
+    frame = synthetic_frame(640, 480)
+
+    def work():
+        # Python post-processing plus OpenCV, like one frame of the main loop
+        cv2.GaussianBlur(frame, (15, 15), 0)
+        sum(i * i for i in range(5000))
+
+    repeat = 50 if quick else 300
+    baseline = time_calls(work, repeat)
+    profiler = SamplingProfiler().start()
+    profiled = time_calls(work, repeat)
+    profiler.stop()
+
+    sample_cost = time_calls(SamplingProfiler().sample, 20 if quick else 200)
+    overhead = (np.median(profiled) - np.median(baseline)) / np.median(baseline) * 100
+    return {
+        "sample_us": (percentile_ms(sample_cost, 50) * 1000, "us", False),
+        "loop_overhead_pct": (max(float(overhead), 0.0), "%", False)
+    }
+
+
+@benchmark("history_db")
+def bench_history_db(quick):
+    """HistoryDatabase ingest for 8 cameras at 30 fps (record cost and write throughput)"""
+    from history_db import HistoryDatabase
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = HistoryDatabase(os.path.join(tmp, "history.db"), flush_interval=0.05)
+        num_records = 8 * 30 * (10 if quick else 60)
+        now = time.time()
+        start = time.perf_counter()
+        for i in range(num_records):
+            db.record_detection(f"cam{i % 8}", i % 20, timestamp=now + i / 240)
+        record_time = time.perf_counter() - start
+        db.flush(timeout=60)
+        total_time = time.perf_counter() - start
+        stats = db.get_stats()
+        db.close()
+    return {
+        "record_us": (record_time / num_records * 1e6, "µs", False),
+        "ingest_records_per_sec": (stats['written'] / total_time, "records/s", True),
+        "dropped_records": (stats['dropped'], "records", None)
+    }
+
+
+@benchmark("simulator")
+def bench_simulator(quick):
+    """Simulated seconds per wall-clock second for the current controller policy"""
+    from traffic_simulator import TrafficSimulator, PoissonArrivals, ControllerPolicy
+
+    duration = 86400 if quick else 7 * 86400
+    simulator = TrafficSimulator(ControllerPolicy(), PoissonArrivals(600, seed=1))
+    start = time.perf_counter()
+    simulator.run(duration)
+    elapsed = time.perf_counter() - start
+    return {
+        "speedup": (duration / elapsed, "x real time", True),
+        "day_ms": (elapsed / (duration / 86400) * 1000, "ms", False)
+    }
+
+
+def start_dashboard_server():
+    """
+    Start the production dashboard on a free local port
+    Returns: (server, base_url)
+    """
+    sys.path.insert(0, str(BASE_DIR / "dashboard"))
+    try:
+        import app_production
+    except ImportError as e:
+        raise BenchmarkSkipped(f"dashboard unavailable ({e})")
+    from werkzeug.serving import make_server
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    app_production.init_video(get_video_path())
+    server = make_server('127.0.0.1', 0, app_production.app, threaded=True)
+    Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def run_clients(num_clients, duration, client_func):
+    """
+    Run client_func(stop_event) on several threads for a duration
+    Returns: list of per-client results
+    """
+    stop = Event()
+    results = [None] * num_clients
+
+    def worker(index):
+        results[index] = client_func(stop)
+
+    threads = [Thread(target=worker, args=(i,), daemon=True) for i in range(num_clients)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=10)
+    return [r for r in results if r is not None]
+
+
+def status_client(base_url):
+    """Poll /api/status until stopped, returning request latencies"""
+    def client(stop):
+        latencies = []
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(f"{base_url}/api/status", timeout=5) as response:
+                    response.read()
+            except OSError:
+                continue
+            latencies.append(time.perf_counter() - start)
+        return latencies
+    return client
+
+
+def stream_client(url):
+    """Read an MJPEG stream until stopped, returning the number of frames received"""
+    def client(stop):
+        frames = 0
+        try:
+            with urllib.request.urlopen(url, timeout=10) as response:
+                while not stop.is_set():
+                    chunk = response.readline()
+                    if not chunk:
+                        break
+                    if chunk.startswith(b'--frame'):
+                        frames += 1
+        except OSError:
+            pass
+        return frames
+    return client
+
+
+@benchmark("stream_variants")
+def bench_stream_variants(quick):
+    """Encode cost and size per stream variant (full, 640/q70, 320/q50)"""
+    from frame_broadcaster import FrameBroadcaster
+
+    frame = synthetic_frame(1280, 720)
+    repeat = 10 if quick else 50
+    metrics = {}
+    for name, width, quality in [("full", None, 95), ("640_q70", 640, 70), ("320_q50", 320, 50)]:
+        durations = time_calls(lambda: FrameBroadcaster._encode(frame, width, quality), repeat)
+        size = len(FrameBroadcaster._encode(frame, width, quality))
+        metrics[f"encode_ms_{name}"] = (float(np.median(durations) * 1000), "ms", False)
+        metrics[f"frame_kb_{name}"] = (size / 1024, "KB", None)
+    return metrics
+
+
+@benchmark("wallboard")
+def bench_wallboard(quick):
+    """Overview of 9 cameras, per frame: one full stream per tile vs one mosaic encode"""
+    from camera_snapshots import MosaicComposer
+    from frame_broadcaster import FrameBroadcaster
+
+    cameras = 9
+    frames = [synthetic_frame(1280, 720, seed=i) for i in range(cameras)]
+    jpegs = [FrameBroadcaster._encode(frame, None, 90) for frame in frames]
+
+    class StaticFeed:
+        # Stand-in for a published camera whose frame changes on every call
+        def __init__(self, index):
+            self.camera_id = f"cam{index}"
+            self.calls = 0
+        def latest(self):
+            self.calls += 1
+            return jpegs[int(self.camera_id[3:])], f'"{self.camera_id}-{self.calls}"'
+
+    mosaic = MosaicComposer([StaticFeed(i) for i in range(cameras)])
+    repeat = 5 if quick else 20
+
+    def per_tile_streams():
+        for frame in frames:
+            FrameBroadcaster._encode(frame, None, 95)
+
+    def mosaic_frame():
+        FrameBroadcaster._encode(mosaic.compose(), None, 70)
+
+    tiles = time_calls(per_tile_streams, repeat)
+    composite = time_calls(mosaic_frame, repeat)
+    return {
+        "per_tile_streams_ms": (percentile_ms(tiles, 50), "ms", None),
+        "mosaic_ms": (percentile_ms(composite, 50), "ms", False),
+        "mosaic_kb": (len(FrameBroadcaster._encode(mosaic.canvas, None, 70)) / 1024, "KB", None),
+        "per_tile_streams_kb": (sum(len(jpeg) for jpeg in jpegs) / 1024, "KB", None)
+    }
+
+
+@benchmark("camera_status")
+def bench_camera_status(quick):
+    """Per-camera status: serialized per request under the state lock vs cached bytes"""
+    sys.path.insert(0, str(BASE_DIR / "dashboard"))
+    try:
+        import app_production
+    except ImportError as e:
+        raise BenchmarkSkipped(f"dashboard unavailable ({e})")
+    from status_board import StatusBoard
+
+    cameras = [f"cam{i}" for i in range(16)]
+    board = StatusBoard(cameras)
+    state = dict(app_production.system_state, synced=True,
+                 load_shedding={'level': 1, 'cameras': [{'camera': c, 'level': 0} for c in cameras]})
+    states = {camera: dict(state) for camera in cameras}
+    board.publish(states)
+    client = app_production.app.test_client()
+    previous, app_production.status_board = app_production.status_board, board
+    repeat = 300 if quick else 2000
+
+    # The frame generator and sync thread take the state lock many times a second
+    stop = Event()
+    def contend():
+        while not stop.is_set():
+            with app_production.state_lock:
+                time.sleep(0.0005)
+            time.sleep(0.0005)
+    contender = Thread(target=contend, daemon=True)
+    contender.start()
+    try:
+        locked = time_calls(lambda: client.get('/api/status'), repeat)
+        cached = time_calls(lambda: client.get('/api/cameras/cam3/status'), repeat)
+        listing = time_calls(lambda: client.get('/api/cameras'), repeat)
+    finally:
+        stop.set()
+        contender.join()
+        app_production.status_board = previous
+    tick = time_calls(lambda: board.publish(states), 20 if quick else 100)
+    return {
+        "locked_status_p95_us": (percentile_ms(locked, 95) * 1000, "us", None),
+        "cached_status_p95_us": (percentile_ms(cached, 95) * 1000, "us", False),
+        "cached_status_rps": (len(cached) / sum(cached), "req/s", True),
+        "camera_list_p95_us": (percentile_ms(listing, 95) * 1000, "us", False),
+        "tick_serialize_16_cameras_ms": (percentile_ms(tick, 50), "ms", False)
+    }
+
+
+@benchmark("telemetry")
+def bench_telemetry(quick):
+    """Binary telemetry: bytes per record vs JSON state, aggregator ingest rate"""
+    from telemetry import TelemetryPublisher, RECORD_DTYPE, HEADER
+    from telemetry_aggregator import TelemetryAggregator, synthetic_batches
+
+    nodes = 2000 if quick else 10000
+    json_record = json.dumps({'signal_state': 'GREEN', 'vehicle_count': 12, 'density': 'MEDIUM',
+                              'demand_pcu': 14.5, 'time_remaining': 21, 'cycle_count': 4211,
+                              'preempted': False, 'shed_level': 0, 'last_update': time.time(),
+                              'node': 'host-1/main'}).encode()
+
+    # In-process ingest: one round of batches (5 records each) from every intersection
+    aggregator = TelemetryAggregator(port=0)
+    batches = synthetic_batches(nodes)
+    rounds = [[next(batches)[1] for _ in range(nodes)] for _ in range(3)]
+    start = time.perf_counter()
+    for round_batches in rounds:
+        for data in round_batches:
+            aggregator.ingest(data)
+    ingest_seconds = time.perf_counter() - start
+    aggregator.stop()
+
+    # End to end over loopback UDP: publishers' encoding + datagrams + aggregator thread
+    aggregator = TelemetryAggregator(port=0).start()
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sent = 0
+    start = time.perf_counter()
+    for data in rounds[0] * (1 if quick else 3):
+        sender.sendto(data, ('127.0.0.1', aggregator.port))
+        sent += 1
+        if sent % 200 == 0:
+            time.sleep(0.001)  # Paced like many independent senders
+    deadline = time.time() + 5
+    while aggregator.batches < sent and time.time() < deadline:
+        time.sleep(0.01)
+    udp_seconds = time.perf_counter() - start
+    received = aggregator.batches
+    aggregator.stop()
+    sender.close()
+
+    # Publisher hot path: record() from the frame loop
+    publisher = TelemetryPublisher("udp://127.0.0.1:9", "bench", flush_interval=0.5)
+    record_times = time_calls(lambda: publisher.record("GREEN", 12, "MEDIUM", demand=14.5), 2000)
+    publisher.close()
+
+    records_per_batch = (len(rounds[0][0]) - HEADER.size) // RECORD_DTYPE.itemsize
+    return {
+        "binary_bytes_per_record": (RECORD_DTYPE.itemsize + HEADER.size / records_per_batch, "B", None),
+        "json_bytes_per_record": (len(json_record), "B", None),
+        "ingest_batches_per_s": (len(rounds) * nodes / ingest_seconds, "batches/s", True),
+        "udp_batches_per_s": (received / udp_seconds, "batches/s", True),
+        "udp_delivered_pct": (100.0 * received / sent, "%", None),
+        "record_call_us": (percentile_ms(record_times, 50) * 1000, "us", False)
+    }
+
+
+@benchmark("dashboard")
+def bench_dashboard(quick):
+    """/api/status and /video_feed throughput under concurrent clients"""
+    server, base_url = start_dashboard_server()
+    duration = 2.0 if quick else 5.0
+    metrics = {}
+    try:
+        for clients in [1, 8]:
+            latencies = run_clients(clients, duration, status_client(base_url))
+            total = sum(len(l) for l in latencies)
+            all_latencies = [x for l in latencies for x in l] or [0.0]
+            metrics[f"status_rps_{clients}_clients"] = (total / duration, "req/s", True)
+            metrics[f"status_p95_ms_{clients}_clients"] = (percentile_ms(all_latencies, 95), "ms", False)
+
+        for viewers in [1, 4]:
+            frames = run_clients(viewers, duration, stream_client(f"{base_url}/video_feed"))
+            metrics[f"video_feed_fps_{viewers}_viewers"] = (sum(frames) / duration, "frames/s", True)
+
+        # Status polling while viewers are streaming
+        stop = Event()
+        viewer_threads = [Thread(target=stream_client(f"{base_url}/video_feed"), args=(stop,), daemon=True)
+                          for _ in range(4)]
+        for thread in viewer_threads:
+            thread.start()
+        latencies = run_clients(4, duration, status_client(base_url))
+        stop.set()
+        total = sum(len(l) for l in latencies)
+        metrics["status_rps_with_4_viewers"] = (total / duration, "req/s", True)
+    finally:
+        server.shutdown()
+    return metrics
+
+
+@benchmark("viewer_capacity")
+def bench_viewer_capacity(quick):
+    """Concurrent /video_feed viewers held at >= 5 fps (see load_test.py)"""
+    from load_test import run_load_test
+
+    server, base_url = start_dashboard_server()
+    levels = [10, 50] if quick else [10, 50, 100, 200]
+    try:
+        results, capacity = run_load_test(base_url, levels, duration=3.0 if quick else 10.0)
+    finally:
+        server.shutdown()
+    return {
+        "max_viewers": (capacity, "viewers", True),
+        "fps_per_viewer_at_max_level": (results[-1]['fps_mean'], "frames/s", True)
+    }
+
+
+@benchmark("dashboard_startup")
+def bench_dashboard_startup(quick):
+    """Dashboard process start to first /health response"""
+    code = (f"import sys; sys.path.insert(0, {str(BASE_DIR / 'dashboard')!r}); "
+            "import app_production; from werkzeug.serving import make_server; "
+            "server = make_server('127.0.0.1', 0, app_production.app); "
+            "print(server.server_port, flush=True); server.serve_forever()")
+
+    durations = []
+    for _ in range(2 if quick else 5):
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE,
+                                   stderr=subprocess.DEVNULL, text=True)
+        try:
+            line = process.stdout.readline()
+            if not line.strip().isdigit():
+                raise BenchmarkSkipped("dashboard did not start")
+            with urllib.request.urlopen(f"http://127.0.0.1:{line.strip()}/health", timeout=30) as response:
+                response.read()
+            durations.append(time.perf_counter() - start)
+        finally:
+            process.kill()
+            process.wait()
+    return {"first_response_ms": (percentile_ms(durations, 50), "ms", False)}
+
+
+@benchmark("density")
+def bench_density(quick):
+    """Density classification of many samples: per-sample calls vs one vectorized call"""
+    from traffic_density_analyzer import TrafficDensityAnalyzer
+
+    analyzer = TrafficDensityAnalyzer()
+    samples = 1000 if quick else 10000
+    counts = np.random.default_rng(0).integers(0, 6, (samples, len(analyzer.pcu_table)))
+    demand = analyzer.demand(counts)
+    repeat = 5 if quick else 20
+
+    def per_sample():
+        for value in demand:
+            analyzer.calculate_green_time(analyzer.classify_density(value))
+
+    def vectorized():
+        analyzer.green_times_for(analyzer.classify_levels(analyzer.demand(counts)))
+
+    loop = time_calls(per_sample, repeat)
+    batch = time_calls(vectorized, repeat)
+    return {
+        "per_sample_us": (float(np.median(loop)) / samples * 1e6, "us", None),
+        "vectorized_us": (float(np.median(batch)) / samples * 1e6, "us", False)
+    }
+
+
+@benchmark("load_shedding")
+def bench_load_shedding(quick):
+    """Critical camera's frame time on an oversubscribed node, without and with load shedding"""
+    from load_shedder import NodeLoadTable, LoadShedder
+
+    cameras = 4
+    seconds = 1.5 if quick else 5.0
+    frame = synthetic_frame(1280, 720)
+
+    def detection(scale):
+        # Stand-in for inference: cost follows the input area
+        size = (int(640 * scale), int(360 * scale))
+        cv2.GaussianBlur(cv2.resize(frame, size), (31, 31), 0)
+
+    work = time_calls(lambda: detection(1.0), 10)
+    capacity = float(os.cpu_count() or 1)
+    # Frame rate at which the cameras together need twice the node's cores
+    interval = max(float(np.median(work)) * cameras / (2 * capacity), 0.01)
+
+    def run(shedding):
+        table = NodeLoadTable(name=f"bench_node_load_{os.getpid()}_{int(shedding)}")
+        frame_times = []
+        stop = Event()
+
+        def camera(index):
+            shedder = LoadShedder(index, f"cam{index}", table=table, capacity=capacity,
+                                  budget=interval, interval=0.2) if shedding else None
+            frame_number = 0
+            while not stop.is_set():
+                start = time.perf_counter()
+                frame_number += 1
+                if shedder is None or shedder.should_detect(frame_number):
+                    detection(shedder.scale if shedder else 1.0)
+                    if shedder is not None:
+                        # Camera 0 is about to be decided; the others are far from it
+                        shedder.report(time.perf_counter() - start, interval,
+                                       decision_in=1.0 if index == 0 else 30.0 + index)
+                if index == 0:
+                    frame_times.append(time.perf_counter() - start)
+                time.sleep(max(interval - (time.perf_counter() - start), 0))
+
+        threads = [Thread(target=camera, args=(i,), daemon=True) for i in range(cameras)]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        table.unlink()
+        table.close()
+        return frame_times[len(frame_times) // 4:]  # After the levels settle
+
+    overloaded = run(False)
+    shed = run(True)
+    return {
+        "work_ms": (percentile_ms(work, 50), "ms", None),
+        "critical_p95_ms_no_shedding": (percentile_ms(overloaded, 95), "ms", None),
+        "critical_p95_ms_shedding": (percentile_ms(shed, 95), "ms", False)
+    }
+
+
+@benchmark("end_to_end")
+def bench_end_to_end(quick):
+    """Capture-to-decision latency (read, detect, classify, timing decision)"""
+    from traffic_density_analyzer import TrafficDensityAnalyzer
+    from traffic_signal_controller import TrafficSignalController
+
+    detector = load_detector()
+    analyzer = TrafficDensityAnalyzer()
+    controller = TrafficSignalController()
+
+    cap = cv2.VideoCapture(get_video_path())
+    if not cap.isOpened():
+        raise BenchmarkSkipped("could not open benchmark video")
+
+    def capture_to_decision():
+        ret, frame = cap.read()
+        if not ret:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = cap.read()
+        count, _ = detector.detect_vehicles(frame)
+        density = analyzer.classify_density(count)
+        controller.get_signal_timing(density, has_vehicles=count > 0)
+
+    durations = time_calls(capture_to_decision, 10 if quick else 50)
+    cap.release()
+    return {
+        "latency_p50_ms": (percentile_ms(durations, 50), "ms", False),
+        "latency_p95_ms": (percentile_ms(durations, 95), "ms", False)
+    }
+
+
+# ---------------------------------------------------------------------------
+# Runner and regression check
+# ---------------------------------------------------------------------------
+
+def run_benchmarks(names=None, quick=False):
+    """
+    Run the selected benchmarks
+    Returns: dictionary of metric name -> {value, unit, higher_is_better}
+    """
+    results = {}
+    for name, func in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        print(f"▶ {name}: {func.__doc__}")
+        try:
+            metrics = func(quick)
+        except BenchmarkSkipped as e:
+            print(f"  ⚠ skipped: {e}")
+            continue
+        for metric, (value, unit, higher_is_better) in metrics.items():
+            results[f"{name}.{metric}"] = {
+                'value': round(value, 3),
+                'unit': unit,
+                'higher_is_better': higher_is_better
+            }
+            print(f"  {metric:32s} {value:12.2f} {unit}" + ("  (info)" if higher_is_better is None else ""))
+    return results
+
+
+def compare_results(results, baseline, threshold=0.2):
+    """
+    Compare results against a baseline
+    threshold: allowed relative slowdown (0.2 = 20%)
+    Returns: list of (metric, baseline_value, value, change) regressions
+    """
+    regressions = []
+    for metric, result in results.items():
+        base = baseline.get(metric)
+        if base is None or base['value'] == 0 or result['higher_is_better'] is None:
+            continue  # New, zero or informational metric
+        change = (result['value'] - base['value']) / base['value']
+        worse = -change if result['higher_is_better'] else change
+        if worse > threshold:
+            regressions.append((metric, base['value'], result['value'], change))
+    return regressions
+
+
+def host_info():
+    """Describe the host the benchmarks ran on"""
+    return {
+        'hostname': socket.gethostname(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'cpu_count': os.cpu_count(),
+        'opencv': cv2.__version__,
+        'numpy': np.__version__
+    }
+
+
+# Host properties a baseline is only comparable across when they match
+COMPARABLE_HOST_KEYS = ('hostname', 'platform', 'cpu_count')
+
+
+def host_differences(baseline_host, host):
+    """Host properties that differ from the baseline's: list of (key, baseline value, value)"""
+    return [(key, baseline_host.get(key), host.get(key)) for key in COMPARABLE_HOST_KEYS
+            if baseline_host.get(key) != host.get(key)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Traffic Signal AI benchmark suite")
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help="benchmarks to run")
+    parser.add_argument('--quick', action='store_true', help="fewer iterations")
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help="baseline JSON file")
+    parser.add_argument('--save-baseline', action='store_true', help="store results as the new baseline")
+    parser.add_argument('--threshold', type=float, default=0.2, help="allowed regression (0.2 = 20%%)")
+    parser.add_argument('--output', help="also write results to this JSON file")
+    parser.add_argument('--any-host', action='store_true',
+                        help="compare even if the baseline was recorded on another host")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.only, args.quick)
+    report = {'host': host_info(), 'timestamp': time.time(), 'metrics': results}
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        baseline_path = Path(args.baseline)
+        if baseline_path.exists():
+            # Keep metrics from benchmarks that were not run this time
+            with open(baseline_path) as f:
+                previous = json.load(f).get('metrics', {})
+            report['metrics'] = {**previous, **results}
+        with open(baseline_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Baseline saved to {baseline_path}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\n⚠ No baseline at {args.baseline} - run with --save-baseline first")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    differences = host_differences(baseline.get('host', {}), report['host'])
+    if differences:
+        print(f"\n⚠ Baseline {args.baseline} was recorded on another host:")
+        for key, base, value in differences:
+            print(f"  {key}: {base} -> {value}")
+        if not args.any_host:
+            print("  Not comparing (timings do not carry over); record a baseline here "
+                  "with --save-baseline, or pass --any-host")
+            return 0
+    regressions = compare_results(results, baseline.get('metrics', {}), args.threshold)
+
+    if regressions:
+        print(f"\n✗ {len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for metric, base, value, change in regressions:
+            print(f"  {metric}: {base:.2f} -> {value:.2f} ({change:+.1%})")
+        return 1
+
+    print(f"\n✓ No regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""
+Camera Snapshots and Mosaic
+Latest-frame access for wallboards and overview screens, built on the JPEGs
+each camera's main.py already publishes (no encoding per request):
+
+    CameraFeed     the newest JPEG of one camera plus an ETag, so a polling
+                   client gets 304 Not Modified until the frame changes
+    MosaicComposer one low-resolution grid of many cameras: each tile is
+                   decoded at reduced scale only when its camera has a new
+                   frame, and the whole grid is encoded once per frame for
+                   every viewer (through a FrameBroadcaster)
+"""
+
+import math
+import time
+from threading import Lock
+
+import cv2
+import numpy as np
+
+from frame_channel import attach_channel, channel_name
+
+# Published frames older than this mean the camera's main.py stopped (seconds)
+MAX_AGE = 2.0
+# Seconds between attach attempts for a camera that is not publishing
+ATTACH_RETRY = 2.0
+
+# Reduced-size JPEG decodes, smallest first: (imdecode flag, scale divisor)
+REDUCED_DECODES = [(cv2.IMREAD_REDUCED_COLOR_8, 8), (cv2.IMREAD_REDUCED_COLOR_4, 4),
+                   (cv2.IMREAD_REDUCED_COLOR_2, 2), (cv2.IMREAD_COLOR, 1)]
+
+
+class CameraFeed:
+    def __init__(self, camera_id, fallback=None):
+        """
+        camera_id: camera whose main.py publishes the frames
+        fallback: optional callable returning (sequence number, JPEG or None,
+                  time.time() it was produced) while the camera is not
+                  publishing (e.g. the dashboard's own FrameBroadcaster.snapshot)
+        """
+        self.camera_id = camera_id
+        self.fallback = fallback
+        self._lock = Lock()
+        self._channel = None
+        self._last_attempt = 0.0
+        self.seq = 0
+        self.timestamp = 0.0
+        self.jpeg = None
+        self.etag = None
+
+    def _get_channel(self):
+        if self._channel is None and time.time() - self._last_attempt > ATTACH_RETRY:
+            self._last_attempt = time.time()
+            self._channel = attach_channel(channel_name(self.camera_id))
+        return self._channel
+
+    def latest(self):
+        """
+        Get the newest frame, copying it out of shared memory only when it changed
+        Returns: (JPEG bytes or None, ETag or None)
+        """
+        with self._lock:
+            channel = self._get_channel()
+            if channel is not None:
+                seq, timestamp = channel.read_header()
+                if time.time() - timestamp <= MAX_AGE:
+                    if (seq, timestamp) != (self.seq, self.timestamp) or self.jpeg is None:
+                        published = channel.read(0)
+                        if published is not None:
+                            self._set(published.seq, published.timestamp, published.jpeg)
+                    return self.jpeg, self.etag
+                if seq:
+                    # Publisher stopped (or restarted with a new slot): attach again later
+                    channel.close()
+                    self._channel = None
+
+            if self.fallback is not None:
+                seq, jpeg, timestamp = self.fallback()
+                if jpeg is not None and time.time() - timestamp <= MAX_AGE:
+                    if jpeg is not self.jpeg:
+                        self._set(seq, timestamp, jpeg)
+                    return self.jpeg, self.etag
+            return None, None
+
+    def _set(self, seq, timestamp, jpeg):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.jpeg = jpeg
+        # Sequence numbers restart with main.py, so the publish time is part of the tag
+        self.etag = f'"{self.camera_id}-{seq}-{int(timestamp * 1000)}"'
+
+    def close(self):
+        with self._lock:
+            if self._channel is not None:
+                self._channel.close()
+                self._channel = None
+
+
+class MosaicComposer:
+    def __init__(self, feeds, tile_width=320, tile_height=180, columns=None):
+        """
+        feeds: CameraFeeds in display order
+        tile_width / tile_height: size of each camera's tile (pixels)
+        columns: tiles per row (default: a near-square grid)
+        """
+        self.feeds = list(feeds)
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+        self.columns = columns or max(math.ceil(math.sqrt(len(self.feeds))), 1)
+        rows = max(math.ceil(len(self.feeds) / self.columns), 1)
+        self.canvas = np.zeros((rows * tile_height, self.columns * tile_width, 3), np.uint8)
+        self._tile_tags = [False] * len(self.feeds)  # ETag each tile shows (False = not drawn)
+        self._source_sizes = [None] * len(self.feeds)  # Full frame size per camera
+        self.tiles_decoded = 0
+
+    def _tile(self, index):
+        """View of a camera's tile in the canvas"""
+        row, column = divmod(index, self.columns)
+        y, x = row * self.tile_height, column * self.tile_width
+        return self.canvas[y:y + self.tile_height, x:x + self.tile_width]
+
+    def _draw_tile(self, index, feed, jpeg):
+        """Decode a camera's JPEG at reduced scale into its tile"""
+        tile = self._tile(index)
+        # libjpeg scales by 1/2, 1/4 or 1/8 while decoding, far cheaper than a
+        # full decode; the largest reduction that still covers the tile is used
+        source_size = self._source_sizes[index]
+        flag, factor = cv2.IMREAD_REDUCED_COLOR_2, 2
+        if source_size is not None:
+            width, height = source_size
+            for flag, factor in REDUCED_DECODES:
+                if width // factor >= self.tile_width and height // factor >= self.tile_height:
+                    break
+        frame = cv2.imdecode(np.frombuffer(jpeg, np.uint8), flag)
+        if frame is None:
+            tile[:] = 0
+        else:
+            self._source_sizes[index] = (frame.shape[1] * factor, frame.shape[0] * factor)
+            tile[:] = cv2.resize(frame, (self.tile_width, self.tile_height), interpolation=cv2.INTER_AREA)
+        self._label(tile, feed.camera_id)
+        self.tiles_decoded += 1
+
+    @staticmethod
+    def _label(tile, text, color=(255, 255, 255)):
+        cv2.putText(tile, text, (8, 22), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+
+    def compose(self):
+        """
+        Update the tiles whose camera has a new frame
+        Returns: a new mosaic frame (BGR), or None if no camera has a new frame
+        """
+        changed = False
+        for index, feed in enumerate(self.feeds):
+            jpeg, etag = feed.latest()
+            if etag == self._tile_tags[index]:
+                continue
+            self._tile_tags[index] = etag
+            changed = True
+            if jpeg is None:
+                tile = self._tile(index)
+                tile[:] = 40
+                self._label(tile, f"{feed.camera_id}: no video", (0, 165, 255))
+            else:
+                self._draw_tile(index, feed, jpeg)
+        # The canvas is reused: hand the broadcaster a copy it can keep
+        return self.canvas.copy() if changed else None
@@ -0,0 +1,26 @@
+"""
+Cooperative Blocking Calls
+Runs blocking work (video decode, inference, JPEG encode) without stalling
+a gevent worker, and calls it directly everywhere else
+"""
+
+try:
+    from gevent import monkey, get_hub
+except ImportError:
+    monkey = None
+
+
+def is_gevent_active():
+    """Check if threading has been monkey-patched by gevent (e.g. gunicorn gevent worker)"""
+    return monkey is not None and monkey.is_module_patched('threading')
+
+
+def run_blocking(func, *args):
+    """
+    Call func(*args), off the event loop when running under gevent
+    Returns: whatever func returns
+    """
+    if is_gevent_active():
+        # Runs on a native thread; other greenlets keep serving meanwhile
+        return get_hub().threadpool.apply(func, args)
+    return func(*args)
@@ -0,0 +1,259 @@
+"""
+CPU Resource Manager
+One policy for how many threads inference (torch), OpenCV and video decode
+(FFmpeg) may use, and which cores each camera worker is pinned to, so the
+libraries stop oversubscribing the CPU (the main source of latency jitter)
+
+Usage:
+    python cpu_resources.py                          # show the policy for this host
+    python cpu_resources.py --calibrate              # measure thread splits, save the best
+    python cpu_resources.py --calibrate --workers 4  # one worker's share of 4 cameras
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import cv2
+import numpy as np
+
+DEFAULT_POLICY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cpu_policy.json")
+
+
+def available_cores():
+    """CPU cores this process may run on"""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def host_fingerprint():
+    """Identify the host a calibration is valid for"""
+    return f"{platform.node()}|{platform.machine()}|{platform.processor()}|{os.cpu_count()}"
+
+
+class ThreadPolicy:
+    def __init__(self, inference_threads=1, opencv_threads=1, decode_threads=1, reserved_cores=0):
+        """
+        Thread counts for one camera worker
+        inference_threads: torch intra-op threads (YOLO)
+        opencv_threads: cv2 parallel_for threads (resize, colour conversion, encoding)
+        decode_threads: FFmpeg threads per video capture
+        reserved_cores: cores left out of pinning for the dashboard/Flask and the OS
+        """
+        self.inference_threads = inference_threads
+        self.opencv_threads = opencv_threads
+        self.decode_threads = decode_threads
+        self.reserved_cores = reserved_cores
+
+    def __repr__(self):
+        return (f"ThreadPolicy(inference={self.inference_threads}, opencv={self.opencv_threads}, "
+                f"decode={self.decode_threads}, reserved_cores={self.reserved_cores})")
+
+    def to_dict(self):
+        return {
+            'inference_threads': self.inference_threads,
+            'opencv_threads': self.opencv_threads,
+            'decode_threads': self.decode_threads,
+            'reserved_cores': self.reserved_cores
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['inference_threads'], data['opencv_threads'],
+                   data['decode_threads'], data.get('reserved_cores', 0))
+
+
+def default_policy(num_workers=1, cores=None):
+    """
+    Split the cores without measuring anything
+    One core is reserved for the dashboard when there are more than two; each
+    worker gets one decode thread, one OpenCV thread and the rest of its share
+    for inference
+    """
+    count = len(cores) if cores is not None else len(available_cores())
+    reserved = 1 if count > 2 else 0
+    share = max((count - reserved) // max(num_workers, 1), 1)
+    return ThreadPolicy(inference_threads=max(share - 1, 1), opencv_threads=1,
+                        decode_threads=1, reserved_cores=reserved)
+
+
+def worker_cores(worker_index, num_workers, policy, cores=None):
+    """
+    Cores for one camera worker: the unreserved cores are split into equal
+    contiguous slices (workers share cores round-robin when there are too few)
+    Returns: list of core IDs
+    """
+    cores = list(cores) if cores is not None else available_cores()
+    usable = cores[policy.reserved_cores:] or cores
+    share = len(usable) // num_workers
+    if share == 0:
+        return [usable[worker_index % len(usable)]]
+    return usable[worker_index * share:(worker_index + 1) * share]
+
+
+def apply_policy(policy, worker_index=0, num_workers=1, pin=None):
+    """
+    Apply a policy to this process
+    Call it before the detector and video capture are created: torch and
+    FFmpeg start their thread pools on first use, and new threads inherit
+    the affinity of the thread that creates them
+    pin: pin to this worker's cores (default: only with several workers)
+    Returns: the cores this worker runs on
+    """
+    cores = available_cores()
+    if pin is None:
+        pin = num_workers > 1
+    if pin and hasattr(os, 'sched_setaffinity'):
+        cores = worker_cores(worker_index, num_workers, policy, cores)
+        os.sched_setaffinity(0, cores)
+
+    cv2.setNumThreads(policy.opencv_threads)
+
+    # Read by torch/OpenMP when they load (torch is imported lazily by the
+    # detector, so loading it here would only slow startup down)
+    for variable in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS'):
+        os.environ[variable] = str(policy.inference_threads)
+    torch = sys.modules.get('torch')
+    if torch is None:
+        return cores
+    torch.set_num_threads(policy.inference_threads)
+    try:
+        torch.set_num_interop_threads(1)  # Only allowed before any inference ran
+    except RuntimeError:
+        pass
+    return cores
+
+
+def open_capture(source, decode_threads=0):
+    """
+    Open a video file with a bounded number of FFmpeg decode threads
+    decode_threads: 0 leaves FFmpeg's default (one thread per core)
+    """
+    if decode_threads and isinstance(source, str):
+        capture = cv2.VideoCapture(source, cv2.CAP_ANY, [cv2.CAP_PROP_N_THREADS, decode_threads])
+        if capture.isOpened():
+            return capture
+        capture.release()  # Backend without thread control: open it normally
+    return cv2.VideoCapture(source)
+
+
+def load_policy(num_workers=1, path=DEFAULT_POLICY_FILE):
+    """
+    Get the calibrated policy for this host and worker count
+    Returns: ThreadPolicy (the default split when nothing was calibrated)
+    """
+    try:
+        with open(path) as f:
+            saved = json.load(f)
+        return ThreadPolicy.from_dict(saved[host_fingerprint()][str(num_workers)])
+    except (OSError, ValueError, KeyError):
+        return default_policy(num_workers)
+
+
+def save_policy(policy, num_workers=1, path=DEFAULT_POLICY_FILE):
+    """Store a policy for this host and worker count"""
+    try:
+        with open(path) as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        saved = {}
+    saved.setdefault(host_fingerprint(), {})[str(num_workers)] = policy.to_dict()
+    with open(path, 'w') as f:
+        json.dump(saved, f, indent=2)
+
+
+def candidate_policies(cores_per_worker, reserved_cores=0):
+    """Thread splits worth measuring for a worker with this many cores"""
+    counts = sorted({1, 2, 4, 8, cores_per_worker} & set(range(1, cores_per_worker + 1)))
+    candidates = []
+    for inference in counts:
+        for opencv in sorted({1, max(cores_per_worker - inference, 1)}):
+            for decode in sorted({1, min(2, cores_per_worker)}):
+                candidates.append(ThreadPolicy(inference, opencv, decode, reserved_cores))
+    return candidates
+
+
+def calibrate(workload, candidates, frames=30, warmup=3):
+    """
+    Measure each candidate policy
+    workload: callable(policy) returning a step function that processes one
+              frame (created after the policy is applied)
+    Returns: list of (policy, p50 seconds, p95 seconds), best (lowest p95) first
+    """
+    results = []
+    for policy in candidates:
+        apply_policy(policy, pin=False)
+        step = workload(policy)
+        for _ in range(warmup):
+            step()
+        durations = []
+        for _ in range(frames):
+            start = time.perf_counter()
+            step()
+            durations.append(time.perf_counter() - start)
+        results.append((policy, float(np.percentile(durations, 50)), float(np.percentile(durations, 95))))
+    # p95 first: jitter is what breaks signal timing; p50 breaks ties
+    results.sort(key=lambda result: (round(result[2], 3), result[1]))
+    return results
+
+
+def detection_workload(video_path):
+    """Calibration workload: decode a frame of the video and run YOLO on it"""
+    from vehicle_detector import VehicleDetector
+
+    detector = VehicleDetector()
+
+    def make_step(policy):
+        capture = open_capture(video_path, policy.decode_threads)
+        if not capture.isOpened():
+            raise RuntimeError(f"Could not open video: {video_path}")
+
+        def step():
+            ret, frame = capture.read()
+            if not ret:
+                capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                ret, frame = capture.read()
+            detector.run_model(frame)
+        return step
+    return make_step
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show or calibrate the CPU thread policy")
+    parser.add_argument('--calibrate', action='store_true', help="measure thread splits and save the best")
+    parser.add_argument('--workers', type=int, default=1, help="camera workers sharing this host")
+    parser.add_argument('--video', default="../videos/traffic_video.mp4")
+    parser.add_argument('--frames', type=int, default=30, help="frames timed per candidate")
+    parser.add_argument('--policy-file', default=DEFAULT_POLICY_FILE)
+    args = parser.parse_args()
+
+    cores = available_cores()
+    print(f"Host: {host_fingerprint()}  ({len(cores)} usable cores)")
+
+    if not args.calibrate:
+        policy = load_policy(args.workers, args.policy_file)
+        print(f"Policy for {args.workers} worker(s): {policy}")
+        for worker in range(args.workers):
+            print(f"  worker {worker}: cores {worker_cores(worker, args.workers, policy, cores)}")
+    else:
+        # Each worker is calibrated on its own slice of cores
+        base = default_policy(args.workers, cores)
+        slice_cores = worker_cores(0, args.workers, base, cores)
+        if hasattr(os, 'sched_setaffinity'):
+            os.sched_setaffinity(0, slice_cores)
+        candidates = candidate_policies(len(slice_cores), base.reserved_cores)
+        print(f"Calibrating {len(candidates)} splits on cores {slice_cores}...")
+
+        results = calibrate(detection_workload(args.video), candidates, args.frames)
+        print(f"{'inference':>9} {'opencv':>6} {'decode':>6} {'p50 ms':>8} {'p95 ms':>8}")
+        for policy, p50, p95 in results:
+            print(f"{policy.inference_threads:9d} {policy.opencv_threads:6d} {policy.decode_threads:6d} "
+                  f"{p50 * 1000:8.1f} {p95 * 1000:8.1f}")
+
+        best = results[0][0]
+        save_policy(best, args.workers, args.policy_file)
+        print(f"\n✓ Saved {best} to {args.policy_file}")
@@ -0,0 +1,228 @@
+"""
+Detection Cache
+Memoizes raw detections per frame so looped footage is only analyzed once.
+Frames are keyed by (source ID, frame index), with a content hash fallback,
+held in a bounded LRU and optionally persisted to a binary sidecar file
+"""
+
+import hashlib
+import os
+import struct
+from collections import OrderedDict
+from threading import Lock
+
+import cv2
+import numpy as np
+
+from event_log import log_event
+from network_camera import is_network_source
+
+# Sidecar layout (little endian):
+#   header: magic, version, source ID length, entry count, source ID (utf-8)
+#   entry:  frame index (-1 = unknown), content hash, detection count,
+#           boxes (n x 4 float32), confidences (n float32), class IDs (n int16)
+SIDECAR_MAGIC = b'DETC'
+SIDECAR_VERSION = 1
+SIDECAR_HEADER = struct.Struct('<4sHHI')
+SIDECAR_ENTRY = struct.Struct('<q16sI')
+SIDECAR_SUFFIX = '.detections'
+
+# Every HASH_STRIDE-th pixel in each direction goes into the content hash
+HASH_STRIDE = 8
+
+# New entries after which the sidecar is rewritten, so a crash loses at most these
+AUTOSAVE_EVERY = 500
+
+
+def source_id_for(source):
+    """
+    Build a stable ID for a video file (path, size and modification time)
+    Returns: ID string, or None for live sources that should not be cached
+    """
+    if is_network_source(source) or not isinstance(source, str) or not os.path.isfile(source):
+        return None
+    stat = os.stat(source)
+    return f"{os.path.abspath(source)}:{stat.st_size}:{int(stat.st_mtime)}"
+
+
+def frame_hash(frame):
+    """Hash a subsampled view of a frame (16 bytes)"""
+    height, width = frame.shape[:2]
+    # Nearest-neighbour resize is a much faster subsample than strided slicing
+    sample = cv2.resize(frame, (max(width // HASH_STRIDE, 1), max(height // HASH_STRIDE, 1)),
+                        interpolation=cv2.INTER_NEAREST)
+    digest = hashlib.blake2b(sample.data, digest_size=16)
+    digest.update(struct.pack('<3I', *frame.shape[:2], frame.shape[2] if frame.ndim > 2 else 1))
+    return digest.digest()
+
+
+class DetectionCache:
+    def __init__(self, source_id, capacity=10000, sidecar_path=None, autosave_every=AUTOSAVE_EVERY):
+        """
+        Create a cache for one video source
+        source_id: from source_id_for(); frame indexes are only valid within it
+        capacity: maximum number of frames kept (least recently used are evicted)
+        sidecar_path: binary file to load from (if it exists) and save() to
+        autosave_every: save to the sidecar after this many new entries (None = only on save())
+        """
+        self.source_id = source_id
+        self.capacity = capacity
+        self.sidecar_path = sidecar_path
+        self.autosave_every = autosave_every
+        self.unsaved = 0  # Entries added since the last save
+
+        # content hash -> (frame index, boxes, confidences, class IDs)
+        self._entries = OrderedDict()
+        self._by_index = {}  # frame index -> content hash
+        self._lock = Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if sidecar_path and os.path.exists(sidecar_path):
+            self.load(sidecar_path)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, frame_index=None, frame=None):
+        """
+        Look up detections by frame index, falling back to the frame's content
+        Returns: ((boxes, confidences, class IDs) or None, content hash or None)
+        The hash is returned so a following put() does not compute it again
+        """
+        content_hash = self._by_index.get(frame_index) if frame_index is not None else None
+        if content_hash not in self._entries and frame is not None:
+            content_hash = frame_hash(frame)  # Hashed outside the lock
+        with self._lock:
+            entry = self._entries.get(content_hash)
+            if entry is None:
+                self.misses += 1
+                return None, content_hash
+            self._entries.move_to_end(content_hash)
+            if frame_index is not None:
+                self._by_index[frame_index] = content_hash
+            self.hits += 1
+            return entry[1:], content_hash
+
+    def put(self, detections, frame_index=None, frame=None, content_hash=None):
+        """Store detections for a frame (content_hash as returned by get())"""
+        if content_hash is None:
+            content_hash = frame_hash(frame)
+        boxes, confidences, class_ids = detections
+        entry = (-1 if frame_index is None else frame_index,
+                 np.asarray(boxes, dtype=np.float32).reshape(-1, 4),
+                 np.asarray(confidences, dtype=np.float32),
+                 np.asarray(class_ids, dtype=np.int32))
+        with self._lock:
+            self._insert(content_hash, entry)
+            self.unsaved += 1
+            due = self.autosave_every and self.unsaved >= self.autosave_every
+        if due and self.sidecar_path:
+            try:
+                self.save()
+            except OSError as e:
+                log_event('detection_cache.save_failed', 'error', path=self.sidecar_path, error=str(e))
+
+    def _insert(self, content_hash, entry):
+        """Add an entry and evict the least recently used ones (lock held)"""
+        self._entries[content_hash] = entry
+        self._entries.move_to_end(content_hash)
+        if entry[0] >= 0:
+            self._by_index[entry[0]] = content_hash
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        # Drop index aliases of evicted frames once they pile up
+        if len(self._by_index) > 2 * self.capacity:
+            self._by_index = {index: h for index, h in self._by_index.items() if h in self._entries}
+
+    def get_stats(self):
+        """Get hit/miss statistics"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'capacity': self.capacity,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'evictions': self.evictions
+        }
+
+    def save(self, path=None):
+        """Write all entries to the binary sidecar (atomic replace)"""
+        path = path or self.sidecar_path
+        if not path:
+            return False
+        source = self.source_id.encode('utf-8')
+        with self._lock:
+            entries = list(self._entries.items())
+            self.unsaved = 0
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(SIDECAR_HEADER.pack(SIDECAR_MAGIC, SIDECAR_VERSION, len(source), len(entries)))
+            f.write(source)
+            for content_hash, (frame_index, boxes, confidences, class_ids) in entries:
+                f.write(SIDECAR_ENTRY.pack(frame_index, content_hash, len(class_ids)))
+                f.write(boxes.astype('<f4').tobytes())
+                f.write(confidences.astype('<f4').tobytes())
+                f.write(class_ids.astype('<i2').tobytes())
+        os.replace(temp_path, path)
+        return True
+
+    def load(self, path):
+        """
+        Load entries from a sidecar written by save()
+        Sidecars for another source (or another version of the file) are ignored
+        Returns: number of entries loaded
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+        try:
+            magic, version, source_length, count = SIDECAR_HEADER.unpack_from(data)
+            offset = SIDECAR_HEADER.size
+            source = data[offset:offset + source_length].decode('utf-8')
+        except (struct.error, UnicodeDecodeError):
+            return 0
+        if magic != SIDECAR_MAGIC or version != SIDECAR_VERSION or source != self.source_id:
+            return 0
+        offset += source_length
+
+        # Parse everything first: a truncated or corrupt sidecar loads nothing
+        entries = []
+        try:
+            for _ in range(count):
+                frame_index, content_hash, n = SIDECAR_ENTRY.unpack_from(data, offset)
+                offset += SIDECAR_ENTRY.size
+                boxes = np.frombuffer(data, '<f4', n * 4, offset).reshape(n, 4)
+                offset += n * 16
+                confidences = np.frombuffer(data, '<f4', n, offset)
+                offset += n * 4
+                class_ids = np.frombuffer(data, '<i2', n, offset).astype(np.int32)
+                offset += n * 2
+                entries.append((content_hash, (frame_index, boxes, confidences, class_ids)))
+        except (struct.error, ValueError):
+            return 0
+
+        with self._lock:
+            for content_hash, entry in entries:
+                self._insert(content_hash, entry)
+        loaded = len(entries)
+        return loaded
+
+
+def open_detection_cache(source, capacity=10000, persist=True, config=None):
+    """
+    Create a cache for a video file, backed by '<video>.detections'
+    config: detector settings that change the results (a sidecar saved with
+            different settings is ignored)
+    Returns: DetectionCache, or None for live sources
+    """
+    source_id = source_id_for(source)
+    if source_id is None:
+        return None
+    if config:
+        source_id = f"{source_id}|{config}"
+    sidecar_path = source + SIDECAR_SUFFIX if persist else None
+    return DetectionCache(source_id, capacity, sidecar_path)
@@ -0,0 +1,114 @@
+"""
+Detection Consumers
+Analytics that share the detector's single inference per frame. Each
+consumer subscribes to a set of COCO classes and receives only those
+detections (selected with one vectorized lookup), so adding an analytic
+adds post-processing cost, never another model pass.
+
+Register them on a VehicleDetector (or TieredDetector):
+    detector.add_consumer(PedestrianWaiting(zone=(0.0, 0.6, 0.3, 1.0)))
+    detector.add_consumer(CyclistCounter())
+    ...
+    detector.consumer_results  # {'pedestrians': {...}, 'cyclists': {...}}
+"""
+
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+# COCO class IDs
+PERSON = 0
+BICYCLE = 1
+
+
+class DetectionConsumer(ABC):
+    def __init__(self, name, classes, min_confidence=0.25):
+        """
+        name: key of this consumer's result in detector.consumer_results
+        classes: COCO class IDs this consumer receives
+        min_confidence: weaker detections are left out
+        """
+        self.name = name
+        self.classes = sorted(classes)
+        self.min_confidence = min_confidence
+        # Class ID -> wanted; the last slot (False) catches IDs beyond the table
+        self._wanted = np.zeros(max(self.classes) + 2, dtype=bool)
+        self._wanted[self.classes] = True
+
+    def select(self, confidences, class_ids):
+        """Mask of the detections this consumer receives"""
+        wanted = self._wanted[np.minimum(class_ids, len(self._wanted) - 1)]
+        return wanted & (confidences >= self.min_confidence)
+
+    def consume(self, boxes, confidences, class_ids, frame_shape):
+        """Filter one frame's detections and process them"""
+        mask = self.select(confidences, class_ids)
+        return self.process(boxes[mask], confidences[mask], class_ids[mask], frame_shape)
+
+    @abstractmethod
+    def process(self, boxes, confidences, class_ids, frame_shape):
+        """
+        Analyze this consumer's detections in one frame
+        Returns: result dictionary (stored in detector.consumer_results)
+        """
+
+    def reset(self):
+        """Forget state carried across frames (frames without classes were skipped)"""
+
+
+class PedestrianWaiting(DetectionConsumer):
+    def __init__(self, zone=None, min_frames=3, name='pedestrians', min_confidence=0.35):
+        """
+        Detect pedestrians waiting to cross (input for a walk phase)
+        zone: waiting area at the crosswalk (x1, y1, x2, y2 as fractions of
+              the frame); a person counts when their feet are inside.
+              None = the whole frame
+        min_frames: consecutive frames with someone in the zone before
+                    'waiting' is reported (filters people walking past)
+        """
+        super().__init__(name, [PERSON], min_confidence)
+        self.zone = zone
+        self.min_frames = min_frames
+        self.frames_occupied = 0
+
+    def process(self, boxes, confidences, class_ids, frame_shape):
+        if self.zone is None:
+            in_zone = len(boxes)
+        else:
+            height, width = frame_shape[:2]
+            zone = np.array(self.zone) * [width, height, width, height]
+            feet_x = (boxes[:, 0] + boxes[:, 2]) / 2
+            feet_y = boxes[:, 3]
+            in_zone = int(np.count_nonzero((feet_x >= zone[0]) & (feet_x <= zone[2]) &
+                                           (feet_y >= zone[1]) & (feet_y <= zone[3])))
+        self.frames_occupied = self.frames_occupied + 1 if in_zone else 0
+        return {
+            'count': len(boxes),
+            'in_zone': in_zone,
+            'waiting': self.frames_occupied >= self.min_frames
+        }
+
+    def reset(self):
+        self.frames_occupied = 0
+
+
+class CyclistCounter(DetectionConsumer):
+    def __init__(self, name='cyclists', min_confidence=0.3):
+        """
+        Count bicycles, and how many of them have a rider
+        (a person whose feet are within the bicycle's box)
+        """
+        super().__init__(name, [PERSON, BICYCLE], min_confidence)
+
+    def process(self, boxes, confidences, class_ids, frame_shape):
+        bicycles = boxes[class_ids == BICYCLE]
+        people = boxes[class_ids == PERSON]
+        ridden = 0
+        if len(bicycles) and len(people):
+            feet_x = (people[:, 0] + people[:, 2]) / 2
+            feet_y = people[:, 3]
+            # Bicycles x people: is this person's feet point inside this bicycle?
+            on_bicycle = ((feet_x[None, :] >= bicycles[:, 0:1]) & (feet_x[None, :] <= bicycles[:, 2:3]) &
+                          (feet_y[None, :] >= bicycles[:, 1:2]) & (feet_y[None, :] <= bicycles[:, 3:4]))
+            ridden = int(np.count_nonzero(on_bicycle.any(axis=1)))
+        return {'count': len(bicycles), 'ridden': ridden}
@@ -0,0 +1,172 @@
+"""
+Event Log
+Structured logging (JSON lines) for the hot paths. log_event() only puts the
+event on a bounded in-memory queue; formatting and I/O happen on a
+background thread, so logging never blocks frame processing or the signal
+loop. Repeated warnings/errors are rate-limited, and events that do not fit
+in the queue are counted instead of waiting. Under gevent the writer is a
+greenlet, so the blocking write itself is run on a native thread
+
+Event names (shared by main.py, the dashboard and the modules they use):
+    signal.phase_changed     arduino.signal_sent      arduino.send_failed
+    arduino.not_connected    state.read_failed        state.write_failed
+    history.save_failed      history.load_failed      history.write_failed
+    detector.tier_changed    detector.load_failed     detector.detect_failed
+    detector.released        dashboard.sync_failed    stream.producer_failed
+    profile.written          profile.failed           debug.profiled
+    signal.preempted         load.shed_changed        detection_cache.save_failed
+    log.dropped
+"""
+
+import atexit
+import json
+import os
+import sys
+import time
+from queue import Queue, Full, Empty
+from threading import Thread, Lock
+
+from cooperative import run_blocking
+
+# Log file (in addition to stdout), e.g. TRAFFIC_LOG_FILE=traffic_events.jsonl
+LOG_FILE_ENV = 'TRAFFIC_LOG_FILE'
+
+# Levels that are rate-limited per event name
+RATE_LIMITED_LEVELS = ('warning', 'error')
+
+
+class EventLogger:
+    def __init__(self, stream=None, path=None, queue_size=10000, rate_limit_interval=10.0,
+                 process=None):
+        """
+        stream: text stream the events are written to (default: stdout)
+        path: optional JSON-lines file the events are also appended to
+        queue_size: events buffered before new ones are dropped
+        rate_limit_interval: a repeated warning/error is written at most once per
+                             interval (seconds); the next one reports how many
+                             were suppressed
+        process: name added to every event (e.g. 'main', 'dashboard')
+        """
+        self.stream = stream if stream is not None else sys.stdout
+        self.path = path
+        self.rate_limit_interval = rate_limit_interval
+        self.process = process or os.path.basename(sys.argv[0]).rsplit('.', 1)[0] or 'python'
+
+        self._queue = Queue(maxsize=queue_size)
+        self._limits = {}  # event -> [last written time, suppressed count]
+        self._limits_lock = Lock()
+        self.dropped = 0
+        self.suppressed = 0
+        self.written = 0
+        self._reported_drops = 0
+
+        self._file = open(path, 'a', encoding='utf-8') if path else None
+        self._thread = Thread(target=self._writer_loop, daemon=True, name="event-log")
+        self._thread.start()
+
+    def log(self, event, level='info', **fields):
+        """
+        Queue an event (never blocks)
+        Returns: True if queued, False if rate-limited or dropped
+        """
+        now = time.time()
+        if level in RATE_LIMITED_LEVELS:
+            with self._limits_lock:
+                limit = self._limits.get(event)
+                if limit is not None and now - limit[0] < self.rate_limit_interval:
+                    limit[1] += 1
+                    self.suppressed += 1
+                    return False
+                if limit is not None and limit[1]:
+                    fields['suppressed'] = limit[1]
+                self._limits[event] = [now, 0]
+
+        try:
+            self._queue.put_nowait((now, level, event, fields))
+            return True
+        except Full:
+            self.dropped += 1
+            return False
+
+    def _writer_loop(self):
+        """Format and write queued events in batches"""
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < 500:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except Empty:
+                    break
+            run_blocking(self._write, batch)  # A blocked stream must not stall the gevent hub
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write(self, batch):
+        """Write a batch of events as JSON lines"""
+        lines = []
+        for timestamp, level, event, fields in batch:
+            record = {'ts': round(timestamp, 3), 'level': level, 'event': event,
+                      'process': self.process}
+            record.update(fields)
+            lines.append(json.dumps(record, default=str))
+
+        # Drops are reported from the writer, since the queue was full when they happened
+        dropped = self.dropped
+        if dropped > self._reported_drops:
+            lines.append(json.dumps({'ts': round(time.time(), 3), 'level': 'warning',
+                                     'event': 'log.dropped', 'process': self.process,
+                                     'count': dropped - self._reported_drops}))
+            self._reported_drops = dropped
+
+        text = "\n".join(lines) + "\n"
+        for target in (self.stream, self._file):
+            if target is None:
+                continue
+            try:
+                target.write(text)
+                target.flush()
+            except (OSError, ValueError):
+                pass  # Closed or broken stream: nothing sensible left to log to
+        self.written += len(batch)
+
+    def flush(self, timeout=2.0):
+        """Wait until the queued events are written (up to timeout seconds)"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.005)
+
+    def close(self):
+        """Write what is queued and close the log file"""
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def get_stats(self):
+        """Get queue and drop statistics"""
+        return {
+            'queued': self._queue.qsize(),
+            'written': self.written,
+            'dropped': self.dropped,
+            'suppressed': self.suppressed
+        }
+
+
+# Process-wide logger
+_logger = None
+_logger_lock = Lock()
+
+
+def get_logger():
+    """Get or create the process-wide event logger"""
+    global _logger
+    with _logger_lock:
+        if _logger is None:
+            _logger = EventLogger(path=os.environ.get(LOG_FILE_ENV))
+            atexit.register(_logger.close)
+    return _logger
+
+
+def log_event(event, level='info', **fields):
+    """Queue an event on the process-wide logger (never blocks)"""
+    return get_logger().log(event, level, **fields)
@@ -0,0 +1,300 @@
+"""
+Frame Broadcaster
+Produces each video frame once (decode, annotate) and shares it with every
+connected viewer, encoding each stream variant (size/quality) once per frame.
+Frames are only produced while someone watches a stream or polls snapshots
+"""
+
+import time
+from threading import Thread, Lock
+
+import cv2
+import numpy as np
+
+from cooperative import run_blocking
+from event_log import log_event
+
+# Variant limits (parameters are snapped to a grid so clients cannot
+# create an unbounded number of variants)
+MIN_WIDTH = 160
+WIDTH_STEP = 32
+MIN_QUALITY = 20
+MAX_QUALITY = 95
+QUALITY_STEP = 5
+MAX_VARIANTS = 16
+
+# A snapshot() poll keeps the producer running this long, like a viewer (seconds)
+POLL_HOLD = 5.0
+
+
+class StreamVariant:
+    def __init__(self, width, quality):
+        """One encoding of the stream (None width = full resolution)"""
+        self.width = width
+        self.quality = quality
+        self.lock = Lock()
+        self.seq = 0
+        self.jpeg = None
+        self.source_jpeg = None  # Pre-encoded frame the JPEG was made from
+        self.viewers = 0
+        self.frames_encoded = 0
+
+
+class FrameBroadcaster:
+    def __init__(self, produce_frame, fps=30, jpeg_quality=95, pool=None):
+        """
+        Create a broadcaster
+        produce_frame: callable returning the next BGR frame (or None to skip),
+                       or a (frame or None, JPEG bytes) tuple for a frame that
+                       is already encoded (decoded only if a variant needs it);
+                       returning the same JPEG object again (e.g. a placeholder)
+                       costs no encoding at all
+        fps: maximum production rate
+        jpeg_quality: quality of the default (full resolution) variant
+        pool: FramePool the produced frames come from; the broadcaster takes
+              over the producer's ownership and releases each frame once it
+              is replaced and no encoder is using it
+        """
+        self.produce_frame = produce_frame
+        self.fps = fps
+        self.interval = 1.0 / fps
+        self.jpeg_quality = jpeg_quality
+        self.pool = pool
+
+        # Latest frame: (sequence number, BGR frame, pre-encoded JPEG)
+        # Replaced as a whole tuple; the lock only pairs a swap with retain()
+        self._latest = (0, None, None)
+        self._latest_lock = Lock()
+        self._decode_lock = Lock()
+        self._produce_lock = Lock()
+        self.published = 0.0  # time.time() of the latest frame
+
+        self._variants = {}
+        self._variants_lock = Lock()
+
+        self.viewers = 0
+        self.frames_produced = 0
+        self._viewers_lock = Lock()
+        self._last_poll = 0.0
+        self._thread = None
+
+    def start(self):
+        """Start the producer thread (once)"""
+        if self._thread is None:
+            self._thread = Thread(target=self._run, daemon=True, name="frame-broadcaster")
+            self._thread.start()
+
+    def _active(self):
+        """Whether anyone is watching a stream or polled recently"""
+        return self.viewers > 0 or time.monotonic() - self._last_poll < POLL_HOLD
+
+    def _run(self):
+        """Producer loop: one decode per frame, shared by all viewers"""
+        while True:
+            start = time.monotonic()
+
+            # Nobody is watching: don't decode
+            if not self._active():
+                time.sleep(self.interval)
+                continue
+
+            self._produce()
+            elapsed = time.monotonic() - start
+            time.sleep(max(self.interval - elapsed, 0.001))
+
+    def _produce(self):
+        """Produce and publish one frame (producer thread, or a poll while paused)"""
+        with self._produce_lock:
+            try:
+                produced = run_blocking(self.produce_frame)
+                if produced is not None:
+                    frame, jpeg = produced if isinstance(produced, tuple) else (produced, None)
+                    self._publish(frame, jpeg)
+            except Exception as e:
+                log_event('stream.producer_failed', 'error', error=str(e))
+
+    def _publish(self, frame, jpeg):
+        """Make a produced frame the latest one and release the one it replaces"""
+        with self._latest_lock:
+            replaced = self._latest[1]
+            self._latest = (self._latest[0] + 1, frame, jpeg)
+        self.published = time.time()
+        self.frames_produced += 1
+        if self.pool is not None and replaced is not frame:
+            self.pool.release(replaced)
+
+    def _hold_latest(self):
+        """Get the latest frame with an extra pool reference (release when done)"""
+        with self._latest_lock:
+            latest = self._latest
+            if self.pool is not None:
+                self.pool.retain(latest[1])
+        return latest
+
+    def latest(self):
+        """
+        Get the most recent frame
+        Pooled frames are reused after being replaced: copy the frame to keep it
+        Returns: (sequence number, BGR frame or None)
+        """
+        seq, frame, jpeg = self._latest
+        if frame is None and jpeg is not None:
+            frame = self._decode(seq, jpeg)
+        return seq, frame
+
+    def _decode(self, seq, jpeg):
+        """Decode a pre-encoded frame once (shared by every variant that needs pixels)"""
+        with self._decode_lock:
+            latest_seq, frame, latest_jpeg = self._latest
+            if latest_seq == seq and frame is not None:
+                return frame
+            frame = run_blocking(cv2.imdecode, np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+            with self._latest_lock:
+                # Keep the decoded pixels unless a newer frame arrived meanwhile
+                if self._latest[0] == seq and self._latest[1] is None:
+                    self._latest = (seq, frame, self._latest[2])
+            return frame
+
+    def normalize_variant(self, width=None, quality=None):
+        """
+        Snap requested stream parameters to the supported grid
+        Returns: (width or None for full resolution, quality)
+        """
+        if quality is None:
+            quality = self.jpeg_quality
+        quality = int(min(max(quality, MIN_QUALITY), MAX_QUALITY))
+        quality -= quality % QUALITY_STEP
+
+        if width is not None:
+            width = max(int(width), MIN_WIDTH)
+            width -= width % WIDTH_STEP
+        return width, quality
+
+    def _get_variant(self, width, quality):
+        """Get or create a variant (falls back to the default when too many exist)"""
+        key = (width, quality)
+        with self._variants_lock:
+            variant = self._variants.get(key)
+            if variant is None:
+                # Drop variants nobody watches before refusing new ones
+                if len(self._variants) >= MAX_VARIANTS:
+                    for idle_key in [k for k, v in self._variants.items() if v.viewers == 0]:
+                        del self._variants[idle_key]
+                if len(self._variants) >= MAX_VARIANTS:
+                    key = (None, self.jpeg_quality)
+                    variant = self._variants.get(key)
+                if variant is None:
+                    variant = StreamVariant(*key)
+                    self._variants[key] = variant
+            return variant
+
+    @staticmethod
+    def _encode(frame, width, quality):
+        """Resize (if narrower) and JPEG-encode a frame"""
+        if width is not None and width < frame.shape[1]:
+            height = int(frame.shape[0] * width / frame.shape[1])
+            frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+        ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        return buffer.tobytes() if ret else None
+
+    def _variant_jpeg(self, variant):
+        """
+        Get the variant's JPEG for the latest frame, encoding it at most once
+        Returns: (sequence number, JPEG bytes or None)
+        """
+        seq, frame, jpeg = self._latest
+        if (frame is None and jpeg is None) or variant.seq == seq:
+            return variant.seq, variant.jpeg
+
+        with variant.lock:
+            # Another viewer may have encoded this frame while we waited
+            if variant.seq == seq:
+                return variant.seq, variant.jpeg
+
+            seq, held, jpeg = self._hold_latest()
+            try:
+                if jpeg is not None and jpeg is variant.source_jpeg:
+                    pass  # Same static image as last time (e.g. placeholder)
+                elif jpeg is not None and variant.width is None and variant.quality == self.jpeg_quality:
+                    # Default variant of a pre-encoded frame: serve it as is
+                    variant.jpeg = jpeg
+                else:
+                    frame = held if held is not None else self._decode(seq, jpeg)
+                    variant.jpeg = run_blocking(self._encode, frame, variant.width, variant.quality)
+                    variant.frames_encoded += 1
+                variant.source_jpeg = jpeg
+                variant.seq = seq
+            finally:
+                if self.pool is not None:
+                    self.pool.release(held)
+            return variant.seq, variant.jpeg
+
+    def get_jpeg(self, width=None, quality=None):
+        """
+        Get the latest frame encoded for a variant
+        Returns: (sequence number, JPEG bytes or None)
+        """
+        variant = self._get_variant(*self.normalize_variant(width, quality))
+        return self._variant_jpeg(variant)
+
+    def snapshot(self):
+        """
+        Get the latest full-resolution JPEG for a polling client (snapshots,
+        mosaic tiles). A poll keeps frames coming for POLL_HOLD seconds; if
+        the producer was paused, a current frame is produced first
+        Returns: (sequence number, JPEG bytes or None, time.time() it was produced)
+        """
+        paused = not self._active()
+        self._last_poll = time.monotonic()
+        if paused:
+            self._produce()
+        self.start()
+        seq, jpeg = self.get_jpeg()
+        return seq, jpeg, self.published
+
+    def stream(self, width=None, quality=None, fps=None):
+        """
+        Yield multipart MJPEG chunks for one viewer
+        width / quality / fps select a lighter variant for weak links
+        Always sends the newest frame; a slow viewer simply skips frames
+        """
+        variant = self._get_variant(*self.normalize_variant(width, quality))
+        fps = min(max(fps or self.fps, 1), self.fps)
+        interval = 1.0 / fps
+
+        with self._viewers_lock:
+            self.viewers += 1
+            variant.viewers += 1
+        self.start()
+
+        try:
+            last_seq = 0
+            while True:
+                start = time.monotonic()
+                seq, jpeg = self._variant_jpeg(variant)
+                if seq != last_seq and jpeg is not None:
+                    last_seq = seq
+                    yield (b'--frame\r\n'
+                           b'Content-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n')
+                elapsed = time.monotonic() - start
+                time.sleep(max(interval - elapsed, 0.001))
+        finally:
+            with self._viewers_lock:
+                self.viewers -= 1
+                variant.viewers -= 1
+
+    def get_stats(self):
+        """Get broadcaster and per-variant statistics"""
+        with self._variants_lock:
+            variants = [{
+                'width': v.width or 'full',
+                'quality': v.quality,
+                'viewers': v.viewers,
+                'frames_encoded': v.frames_encoded
+            } for v in self._variants.values()]
+        return {
+            'viewers': self.viewers,
+            'frames_produced': self.frames_produced,
+            'sequence': self._latest[0],
+            'variants': variants
+        }
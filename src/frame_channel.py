@@ -0,0 +1,160 @@
+"""
+Frame Channel
+Shared-memory slot through which main.py publishes its latest annotated
+frame (JPEG) and detections, so the dashboard can serve exactly what drove
+the signal without decoding the video or running a second model
+"""
+
+import os
+import struct
+import time
+from collections import namedtuple
+from multiprocessing import shared_memory, resource_tracker
+
+import numpy as np
+
+DEFAULT_CHANNEL = "traffic_frame_slot"
+
+# Header: magic, version, box capacity, write counter, timestamp, JPEG length,
+#         box count, frame width, frame height, vehicle count
+# The write counter is odd while a frame is being written (seqlock);
+# the published sequence number is counter // 2
+HEADER = struct.Struct('<4sHHQdIIIII')
+MAGIC = b'TFRM'
+VERSION = 1
+
+MAX_JPEG_BYTES = 4 * 1024 * 1024
+MAX_BOXES = 512
+# One detection: xyxy box, confidence, class ID
+RECORD_DTYPE = np.dtype([('box', '<f4', 4), ('conf', '<f4'), ('cls', '<i4')])
+BOX_BYTES = RECORD_DTYPE.itemsize
+
+# Slots created by this process (their tracker registration must be kept)
+_owned = set()
+
+PublishedFrame = namedtuple('PublishedFrame', [
+    'seq', 'timestamp', 'jpeg', 'boxes', 'confidences', 'class_ids',
+    'width', 'height', 'vehicle_count'
+])
+
+
+class FrameChannel:
+    def __init__(self, name=DEFAULT_CHANNEL, create=False,
+                 max_jpeg_bytes=MAX_JPEG_BYTES, max_boxes=MAX_BOXES):
+        """
+        Open the frame slot
+        create: True in the publishing process (replaces a stale slot),
+                False to attach as a reader (raises FileNotFoundError if absent)
+        """
+        self.name = name
+        self.owner = create
+
+        if create:
+            size = HEADER.size + max_boxes * BOX_BYTES + max_jpeg_bytes
+            try:
+                stale = shared_memory.SharedMemory(name=name)
+                stale.close()
+                stale.unlink()
+            except FileNotFoundError:
+                pass
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            _owned.add(name)
+            self.max_boxes = max_boxes
+            self.max_jpeg_bytes = max_jpeg_bytes
+            self._counter = 0
+            HEADER.pack_into(self._shm.buf, 0, MAGIC, VERSION, max_boxes, 0, 0.0, 0, 0, 0, 0, 0)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+            # Readers must not unlink the slot when they exit (POSIX only)
+            if os.name == 'posix' and name not in _owned:
+                resource_tracker.unregister(self._shm._name, 'shared_memory')
+            magic, version, max_boxes = struct.unpack_from('<4sHH', self._shm.buf, 0)
+            if magic != MAGIC or version != VERSION:
+                self._shm.close()
+                raise ValueError(f"Shared memory '{name}' is not a frame channel")
+            self.max_boxes = max_boxes
+            self.max_jpeg_bytes = self._shm.size - HEADER.size - max_boxes * BOX_BYTES
+
+        self._boxes_offset = HEADER.size
+        self._jpeg_offset = HEADER.size + self.max_boxes * BOX_BYTES
+
+    def publish(self, jpeg, boxes, confidences, class_ids, width=0, height=0, vehicle_count=0):
+        """
+        Write a new frame into the slot (publisher only)
+        jpeg: encoded frame (bytes or the array from cv2.imencode); boxes / confidences / class_ids: detections
+        Returns: the new sequence number (0 if the frame did not fit)
+        """
+        jpeg = np.frombuffer(jpeg, dtype=np.uint8)  # Flat view, no copy
+        if len(jpeg) > self.max_jpeg_bytes:
+            return 0
+        count = min(len(class_ids), self.max_boxes)
+        records = np.empty(count, dtype=RECORD_DTYPE)
+        records['box'] = boxes[:count]
+        records['conf'] = confidences[:count]
+        records['cls'] = class_ids[:count]
+
+        buf = self._shm.buf
+        self._counter += 1  # Odd: write in progress
+        struct.pack_into('<Q', buf, 8, self._counter)
+        buf[self._boxes_offset:self._boxes_offset + records.nbytes] = records.tobytes()
+        buf[self._jpeg_offset:self._jpeg_offset + len(jpeg)] = jpeg
+        struct.pack_into('<dIIIII', buf, 16, time.time(), len(jpeg), count, width, height, vehicle_count)
+        self._counter += 1  # Even: frame complete (written last)
+        struct.pack_into('<Q', buf, 8, self._counter)
+        return self._counter // 2
+
+    def read_header(self):
+        """
+        Get the slot's sequence number and publish time without copying the frame
+        Returns: (sequence number, timestamp)
+        """
+        _, _, _, counter, timestamp, *_ = HEADER.unpack_from(self._shm.buf, 0)
+        return counter // 2, timestamp
+
+    def read(self, last_seq=0, retries=5):
+        """
+        Copy the latest frame if it is newer than last_seq
+        Returns: PublishedFrame, or None if there is nothing new
+        """
+        buf = self._shm.buf
+        for _ in range(retries):
+            _, _, _, counter, timestamp, jpeg_length, count, width, height, vehicles = \
+                HEADER.unpack_from(buf, 0)
+            if counter % 2:
+                time.sleep(0)  # Writer is mid-frame
+                continue
+            if counter // 2 <= last_seq:
+                return None
+
+            jpeg = bytes(buf[self._jpeg_offset:self._jpeg_offset + jpeg_length])
+            records = np.frombuffer(buf, dtype=RECORD_DTYPE, count=count,
+                                    offset=self._boxes_offset).copy()
+
+            # The frame is consistent only if no write started while copying
+            if struct.unpack_from('<Q', buf, 8)[0] == counter:
+                return PublishedFrame(counter // 2, timestamp, jpeg, records['box'],
+                                      records['conf'], records['cls'], width, height, vehicles)
+        return None
+
+    def close(self):
+        """Detach (the publisher also removes the slot)"""
+        self._shm.close()
+        if self.owner:
+            _owned.discard(self.name)
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def channel_name(camera_id):
+    """Shared memory name of a camera's frame slot ('main' keeps the original name)"""
+    return DEFAULT_CHANNEL if camera_id == "main" else f"{DEFAULT_CHANNEL}_{camera_id}"
+
+
+def attach_channel(name=DEFAULT_CHANNEL):
+    """Attach to a published channel, or return None if no publisher is running"""
+    try:
+        return FrameChannel(name)
+    except (FileNotFoundError, ValueError):
+        return None
@@ -0,0 +1,127 @@
+"""
+Frame Buffer Pool
+Reusable frame buffers with explicit ownership, so the video loop decodes
+into the same few arrays instead of allocating a new frame every time.
+
+Ownership rules:
+- acquire() hands out a buffer owned by the caller (reference count 1)
+- anyone who keeps the frame beyond the owner's lifetime calls retain()
+- every owner calls release() when done; at zero the buffer is reused
+Arrays that did not come from the pool are ignored by retain()/release()
+"""
+
+from threading import Lock
+
+import cv2
+import numpy as np
+
+
+class FramePool:
+    def __init__(self, max_free=4):
+        """
+        Create an empty pool
+        max_free: spare buffers kept per frame shape (extra ones are freed)
+        """
+        self.max_free = max_free
+        self._free = {}   # (shape, dtype) -> list of arrays
+        self._refs = {}   # id(array) -> [array, reference count]
+        self._lock = Lock()
+
+        self.allocations = 0
+        self.reuses = 0
+
+    def acquire(self, shape, dtype=np.uint8):
+        """Get a buffer of the given shape (contents are undefined)"""
+        key = (tuple(shape), np.dtype(dtype).str)
+        with self._lock:
+            free = self._free.get(key)
+            if free:
+                frame = free.pop()
+                self.reuses += 1
+            else:
+                frame = np.empty(shape, dtype=dtype)
+                self.allocations += 1
+            self._refs[id(frame)] = [frame, 1]
+        return frame
+
+    def adopt(self, frame):
+        """Take ownership of an array allocated elsewhere (reference count 1)"""
+        with self._lock:
+            self._refs[id(frame)] = [frame, 1]
+        return frame
+
+    def retain(self, frame):
+        """Add an owner to a pooled frame"""
+        if frame is None:
+            return frame
+        with self._lock:
+            entry = self._refs.get(id(frame))
+            if entry is not None and entry[0] is frame:
+                entry[1] += 1
+        return frame
+
+    def release(self, frame):
+        """Drop an owner; the last release returns the buffer to the pool"""
+        if frame is None:
+            return
+        with self._lock:
+            entry = self._refs.get(id(frame))
+            if entry is None or entry[0] is not frame:
+                return
+            entry[1] -= 1
+            if entry[1] > 0:
+                return
+            del self._refs[id(frame)]
+            free = self._free.setdefault((frame.shape, frame.dtype.str), [])
+            if len(free) < self.max_free:
+                free.append(frame)
+
+    def read(self, capture, shape=None):
+        """
+        Read the next frame from a cv2.VideoCapture into a pooled buffer
+        shape: expected frame shape (defaults to the capture's size)
+        Returns: (ret, frame) like capture.read(); the caller owns the frame
+        """
+        if not isinstance(capture, cv2.VideoCapture):
+            # Other sources (e.g. NetworkCamera) hand out their own frames,
+            # which are simply not pooled
+            return capture.read()
+
+        if shape is None:
+            shape = (int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                     int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)), 3)
+        buffer = self.acquire(shape) if shape[0] and shape[1] else None
+        ret, frame = capture.read(buffer) if buffer is not None else capture.read()
+        if not ret:
+            self.release(buffer)
+            return False, None
+        if frame is not buffer:
+            # Decoder allocated a new array (size changed): own that one instead
+            self.release(buffer)
+            self.adopt(frame)
+        return True, frame
+
+    def get_stats(self):
+        """Get allocation statistics"""
+        with self._lock:
+            return {
+                'allocations': self.allocations,
+                'reuses': self.reuses,
+                'in_use': len(self._refs),
+                'free': sum(len(free) for free in self._free.values())
+            }
+
+
+def make_placeholder(text, size=(640, 480), quality=80):
+    """
+    Build a static placeholder frame and encode it once
+    Returns: (BGR frame, JPEG bytes)
+    """
+    width, height = size
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    (text_width, _), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 1.5, 2)
+    cv2.putText(frame, text, ((width - text_width) // 2, height // 2),
+                cv2.FONT_HERSHEY_SIMPLEX, 1.5, (255, 255, 255), 2)
+    ret, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    frame.flags.writeable = False  # Shared by every caller: never annotate it
+    return frame, jpeg.tobytes()
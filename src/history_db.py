@@ -0,0 +1,323 @@
+"""
+Historical Traffic Database
+Durable SQLite (WAL) store for detections, phase changes and cycle statistics.
+Writes are queued and batched on a background thread, so recording never
+blocks the frame loop; hourly and daily rollups are maintained on write.
+"""
+
+import queue
+import sqlite3
+import time
+from collections import defaultdict
+from pathlib import Path
+from threading import Thread, Event
+
+from event_log import log_event
+
+DEFAULT_DB_FILE = Path(__file__).parent / "traffic_history.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS detection_intervals (
+    camera_id TEXT NOT NULL,
+    interval_start INTEGER NOT NULL,      -- unix seconds
+    samples INTEGER NOT NULL,
+    vehicle_sum REAL NOT NULL,
+    vehicle_max INTEGER NOT NULL,
+    PRIMARY KEY (camera_id, interval_start)
+);
+CREATE INDEX IF NOT EXISTS idx_detection_intervals_time ON detection_intervals (interval_start);
+
+CREATE TABLE IF NOT EXISTS phase_changes (
+    ts REAL NOT NULL,
+    camera_id TEXT NOT NULL,
+    from_state TEXT,
+    to_state TEXT NOT NULL,
+    duration REAL                         -- seconds spent in from_state
+);
+CREATE INDEX IF NOT EXISTS idx_phase_changes_camera_time ON phase_changes (camera_id, ts);
+CREATE INDEX IF NOT EXISTS idx_phase_changes_time ON phase_changes (ts);
+
+CREATE TABLE IF NOT EXISTS cycles (
+    ts REAL NOT NULL,
+    camera_id TEXT NOT NULL,
+    cycle_number INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    avg_vehicles REAL
+);
+CREATE INDEX IF NOT EXISTS idx_cycles_camera_time ON cycles (camera_id, ts);
+CREATE INDEX IF NOT EXISTS idx_cycles_time ON cycles (ts);
+"""
+
+ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS {table} (
+    camera_id TEXT NOT NULL,
+    period_start INTEGER NOT NULL,        -- unix seconds
+    samples INTEGER NOT NULL DEFAULT 0,
+    vehicle_sum REAL NOT NULL DEFAULT 0,
+    vehicle_max INTEGER NOT NULL DEFAULT 0,
+    phase_changes INTEGER NOT NULL DEFAULT 0,
+    green_seconds REAL NOT NULL DEFAULT 0,
+    cycles INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (camera_id, period_start)
+);
+CREATE INDEX IF NOT EXISTS idx_{table}_time ON {table} (period_start);
+"""
+
+# Rollup table -> period length in seconds
+ROLLUPS = {'hourly_rollups': 3600, 'daily_rollups': 86400}
+
+ROLLUP_UPSERT = """
+INSERT INTO {table} (camera_id, period_start, samples, vehicle_sum, vehicle_max,
+                     phase_changes, green_seconds, cycles)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (camera_id, period_start) DO UPDATE SET
+    samples = samples + excluded.samples,
+    vehicle_sum = vehicle_sum + excluded.vehicle_sum,
+    vehicle_max = MAX(vehicle_max, excluded.vehicle_max),
+    phase_changes = phase_changes + excluded.phase_changes,
+    green_seconds = green_seconds + excluded.green_seconds,
+    cycles = cycles + excluded.cycles
+"""
+
+INTERVAL_UPSERT = """
+INSERT INTO detection_intervals (camera_id, interval_start, samples, vehicle_sum, vehicle_max)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (camera_id, interval_start) DO UPDATE SET
+    samples = samples + excluded.samples,
+    vehicle_sum = vehicle_sum + excluded.vehicle_sum,
+    vehicle_max = MAX(vehicle_max, excluded.vehicle_max)
+"""
+
+
+def connect(db_path):
+    """Open a connection configured for concurrent readers and fast writes"""
+    connection = sqlite3.connect(str(db_path), timeout=10)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+class HistoryReader:
+    def __init__(self, db_path=DEFAULT_DB_FILE):
+        """
+        Read-only access to the history database (e.g. from the dashboard)
+        Each query uses its own connection; WAL lets reads run during writes
+        """
+        self.db_path = db_path
+
+    def exists(self):
+        """Check if the database has been created"""
+        return Path(self.db_path).exists()
+
+    def query_rollups(self, period='hourly', start=None, end=None, camera_id=None):
+        """
+        Get hourly or daily rollups in a time range
+        Returns: list of dictionaries ordered by camera and period
+        """
+        table = f"{period}_rollups"
+        if table not in ROLLUPS:
+            raise ValueError(f"Unknown rollup period: {period}")
+        return self._query(
+            f"SELECT camera_id, period_start, samples, vehicle_sum, vehicle_max, "
+            f"phase_changes, green_seconds, cycles FROM {table} "
+            f"WHERE period_start >= ? AND period_start < ?"
+            + (" AND camera_id = ?" if camera_id else "")
+            + " ORDER BY camera_id, period_start",
+            start, end, camera_id,
+            transform=lambda row: dict(row, avg_vehicles=row['vehicle_sum'] / row['samples']
+                                       if row['samples'] else None))
+
+    def query_intervals(self, start=None, end=None, camera_id=None):
+        """Get per-second detection intervals in a time range (avg_vehicles per second)"""
+        return self._query(
+            "SELECT camera_id, interval_start, samples, vehicle_sum, vehicle_max FROM detection_intervals "
+            "WHERE interval_start >= ? AND interval_start < ?"
+            + (" AND camera_id = ?" if camera_id else "") + " ORDER BY interval_start",
+            start, end, camera_id,
+            transform=lambda row: dict(row, avg_vehicles=row['vehicle_sum'] / row['samples']))
+
+    def query_phase_changes(self, start=None, end=None, camera_id=None):
+        """Get phase changes in a time range"""
+        return self._query(
+            "SELECT ts, camera_id, from_state, to_state, duration FROM phase_changes "
+            "WHERE ts >= ? AND ts < ?" + (" AND camera_id = ?" if camera_id else "") + " ORDER BY ts",
+            start, end, camera_id)
+
+    def query_cycles(self, start=None, end=None, camera_id=None):
+        """Get completed cycles in a time range"""
+        return self._query(
+            "SELECT ts, camera_id, cycle_number, duration, avg_vehicles FROM cycles "
+            "WHERE ts >= ? AND ts < ?" + (" AND camera_id = ?" if camera_id else "") + " ORDER BY ts",
+            start, end, camera_id)
+
+    def _query(self, sql, start, end, camera_id, transform=dict):
+        """Run a time-range query and return rows as dictionaries"""
+        params = [start if start is not None else 0, end if end is not None else time.time() + 1]
+        if camera_id:
+            params.append(camera_id)
+        connection = sqlite3.connect(str(self.db_path), timeout=10)
+        connection.row_factory = sqlite3.Row
+        try:
+            return [transform(row) for row in connection.execute(sql, params)]
+        finally:
+            connection.close()
+
+
+class HistoryDatabase(HistoryReader):
+    def __init__(self, db_path=DEFAULT_DB_FILE, queue_size=20000,
+                 batch_size=1000, flush_interval=1.0):
+        """
+        Open (or create) the history database and start the writer thread
+        queue_size: records buffered before new ones are dropped
+        batch_size / flush_interval: write when this many records are queued
+                                     or this many seconds have passed
+        """
+        super().__init__(db_path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=queue_size)
+
+        self.records_written = 0
+        self.records_dropped = 0
+        self.batches_written = 0
+        self.last_error = None
+
+        # Create the schema up front so readers never see a missing table
+        connection = connect(db_path)
+        with connection:
+            connection.executescript(SCHEMA)
+            for table in ROLLUPS:
+                connection.executescript(ROLLUP_SCHEMA.format(table=table))
+        connection.close()
+
+        self._stop = Event()
+        self._thread = Thread(target=self._writer_loop, daemon=True, name="history-writer")
+        self._thread.start()
+
+    # ------------------------------------------------------------------
+    # Recording (called from the hot path: never blocks)
+    # ------------------------------------------------------------------
+
+    def _put(self, record):
+        """Queue a record, dropping it if the writer has fallen behind"""
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.records_dropped += 1
+
+    def record_detection(self, camera_id, vehicle_count, timestamp=None):
+        """Record one frame's vehicle count"""
+        self._put(('detection', timestamp or time.time(), camera_id, vehicle_count))
+
+    def record_phase_change(self, camera_id, from_state, to_state, duration, timestamp=None):
+        """Record a signal phase change (duration = seconds spent in from_state)"""
+        self._put(('phase', timestamp or time.time(), camera_id, from_state, to_state, duration))
+
+    def record_cycle(self, camera_id, cycle_number, duration, avg_vehicles=None, timestamp=None):
+        """Record a completed signal cycle"""
+        self._put(('cycle', timestamp or time.time(), camera_id, cycle_number, duration, avg_vehicles))
+
+    # ------------------------------------------------------------------
+    # Writer thread
+    # ------------------------------------------------------------------
+
+    def _writer_loop(self):
+        """Collect records into batches and write each batch in one transaction"""
+        connection = connect(self.db_path)
+        while not (self._stop.is_set() and self.queue.empty()):
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            if not batch:
+                continue
+            try:
+                self._write_batch(connection, batch)
+                self.records_written += len(batch)
+                self.batches_written += 1
+            except sqlite3.Error as e:
+                self.last_error = str(e)
+                log_event('history.write_failed', 'error', error=str(e), records=len(batch))
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+        connection.close()
+
+    def _write_batch(self, connection, batch):
+        """Aggregate a batch in memory, then upsert intervals, events and rollups"""
+        intervals = defaultdict(lambda: [0, 0.0, 0])            # (camera, second) -> samples, sum, max
+        rollups = {table: defaultdict(lambda: [0, 0.0, 0, 0, 0.0, 0]) for table in ROLLUPS}
+        phases = []
+        cycles = []
+
+        for record in batch:
+            kind, ts, camera_id = record[0], record[1], record[2]
+            if kind == 'detection':
+                count = record[3]
+                interval = intervals[(camera_id, int(ts))]
+                interval[0] += 1
+                interval[1] += count
+                interval[2] = max(interval[2], count)
+            elif kind == 'phase':
+                phases.append((ts, camera_id, record[3], record[4], record[5]))
+            elif kind == 'cycle':
+                cycles.append((ts, camera_id, record[3], record[4], record[5]))
+
+            for table, period in ROLLUPS.items():
+                rollup = rollups[table][(camera_id, int(ts // period) * period)]
+                if kind == 'detection':
+                    rollup[0] += 1
+                    rollup[1] += record[3]
+                    rollup[2] = max(rollup[2], record[3])
+                elif kind == 'phase':
+                    rollup[3] += 1
+                    if record[3] == 'GREEN' and record[5]:
+                        rollup[4] += record[5]
+                elif kind == 'cycle':
+                    rollup[5] += 1
+
+        with connection:
+            connection.executemany(INTERVAL_UPSERT,
+                                   [(camera, start, *values) for (camera, start), values in intervals.items()])
+            if phases:
+                connection.executemany(
+                    "INSERT INTO phase_changes (ts, camera_id, from_state, to_state, duration) "
+                    "VALUES (?, ?, ?, ?, ?)", phases)
+            if cycles:
+                connection.executemany(
+                    "INSERT INTO cycles (ts, camera_id, cycle_number, duration, avg_vehicles) "
+                    "VALUES (?, ?, ?, ?, ?)", cycles)
+            for table, rows in rollups.items():
+                connection.executemany(ROLLUP_UPSERT.format(table=table),
+                                       [(camera, start, *values) for (camera, start), values in rows.items()])
+
+    # ------------------------------------------------------------------
+
+    def flush(self, timeout=10.0):
+        """Wait until every queued record has been written"""
+        deadline = time.monotonic() + timeout
+        while self.queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return self.queue.unfinished_tasks == 0
+
+    def get_stats(self):
+        """Get writer statistics"""
+        return {
+            'queued': self.queue.qsize(),
+            'written': self.records_written,
+            'dropped': self.records_dropped,
+            'batches': self.batches_written,
+            'last_error': self.last_error
+        }
+
+    def close(self):
+        """Write everything still queued and stop the writer thread"""
+        self._stop.set()
+        self._thread.join(timeout=30)
@@ -0,0 +1,256 @@
+"""
+Load Shedder
+Node-level degradation for several cameras sharing one host (one main.py
+process per camera). Each process reports its camera's detection cost and
+priority to a small shared-memory table; every process runs the same
+deterministic policy over that table and applies its own camera's level.
+When the node's CPU is oversubscribed, the lowest-priority streams detect
+less often and then at a lower input size, one step at a time, so
+cameras whose approach is about to be decided keep their full rate.
+Exported models (ONNX, OpenVINO) have a fixed input size: those cameras
+only detect less often.
+
+Priority: a camera is critical while its signal's next decision is within
+the decision window (or a preemption runs); critical cameras are never
+shed. Among the others, the one whose decision is furthest away sheds first
+"""
+
+import os
+import time
+from multiprocessing import shared_memory, resource_tracker
+
+import numpy as np
+
+from event_log import log_event
+
+DEFAULT_TABLE = "traffic_node_load"
+MAX_CAMERAS = 16
+
+# Shedding levels: (detect every Nth frame, input size scale)
+SHED_LEVELS = [(1, 1.0), (2, 1.0), (2, 0.75), (4, 0.75), (4, 0.5)]
+# Share of a camera's full-quality detection load left at each level
+LEVEL_FACTORS = np.array([scale * scale / stride for stride, scale in SHED_LEVELS])
+# The same for a camera whose input size is fixed (only the stride applies)
+STRIDE_FACTORS = np.array([1.0 / stride for stride, _ in SHED_LEVELS])
+
+# Rows not updated for this long belong to stopped cameras (seconds)
+STALE_AFTER = 5.0
+
+# One camera: written only by its own process
+ROW_DTYPE = np.dtype([
+    ('heartbeat', '<f8'),    # time.time() of the last report (0 = free)
+    ('camera', 'S24'),
+    ('critical', '<f8'),     # 1 while the next decision is near
+    ('decision_in', '<f8'),  # seconds until its next signal decision
+    ('cores', '<f8'),        # full-quality detection load in cores (EWMA)
+    ('late', '<f8'),         # share of recent detections over budget (EWMA)
+    ('level', '<f8'),        # current shedding level
+    ('fixed_size', '<f8'),   # 1 if the input size cannot shrink (exported model)
+])
+
+
+class NodeLoadTable:
+    def __init__(self, name=DEFAULT_TABLE, max_cameras=MAX_CAMERAS):
+        """
+        Open (or create) the node's load table
+        The table is shared by equal peers, so nobody unlinks it on exit; it
+        is a few hundred bytes and stale rows expire on their own
+        """
+        self.name = name
+        size = ROW_DTYPE.itemsize * max_cameras
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            self._shm.buf[:size] = bytes(size)
+        except FileExistsError:
+            self._shm = shared_memory.SharedMemory(name=name)
+        if os.name == 'posix':
+            resource_tracker.unregister(self._shm._name, 'shared_memory')
+        self.rows = np.ndarray((self._shm.size // ROW_DTYPE.itemsize,), dtype=ROW_DTYPE,
+                               buffer=self._shm.buf)
+
+    def snapshot(self, now=None):
+        """Copy of the active rows and their slot numbers"""
+        now = time.time() if now is None else now
+        rows = self.rows.copy()
+        active = np.flatnonzero(now - rows['heartbeat'] < STALE_AFTER)
+        return rows[active], active
+
+    def close(self):
+        self.rows = None
+        self._shm.close()
+
+    def unlink(self):
+        """Remove the table (tests and tools only)"""
+        try:
+            if os.name == 'posix':
+                resource_tracker.register(self._shm._name, 'shared_memory')  # unlink() unregisters
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def level_factors(fixed_size):
+    """Share of full-quality load left per camera (rows) and level (columns)"""
+    return np.where(np.asarray(fixed_size)[:, None] > 0, STRIDE_FACTORS, LEVEL_FACTORS)
+
+
+def required_levels(cores, critical, decision_in, capacity, factors=None):
+    """
+    Lowest levels that fit the load into `capacity` cores
+    Non-critical cameras are shed step by step, furthest decision first
+    factors: level_factors() of the cameras (default: all resizable)
+    Returns: level per camera
+    """
+    if factors is None:
+        factors = level_factors(np.zeros(len(cores)))
+    levels = np.zeros(len(cores), dtype=int)
+    load = cores * factors[:, 0]
+    order = [i for i in np.argsort(-decision_in, kind='stable') if not critical[i]]
+    for i in order:
+        while load.sum() > capacity and levels[i] < len(SHED_LEVELS) - 1:
+            levels[i] += 1
+            load[i] = cores[i] * factors[i, levels[i]]
+        if load.sum() <= capacity:
+            break
+    return levels
+
+
+def plan_levels(rows, capacity, high=0.9, low=0.7):
+    """
+    Shedding levels for the node's cameras (same result in every process)
+    Levels rise when the load exceeds `high` x capacity and fall only once
+    it fits under `low` x capacity, so they do not oscillate. A critical
+    camera falling behind its budget sheds one more step elsewhere
+    Returns: level per row
+    """
+    critical = rows['critical'] > 0
+    current = rows['level'].astype(int)
+    factors = level_factors(rows['fixed_size'])
+    must = required_levels(rows['cores'], critical, rows['decision_in'], capacity * high, factors)
+    may = required_levels(rows['cores'], critical, rows['decision_in'], capacity * low, factors)
+    if not np.any(critical & (rows['late'] > 0.5)):
+        return np.clip(current, must, may)
+
+    # A critical stream is late, so the capacity estimate is off: keep the
+    # current shedding and free more time for it
+    levels = np.maximum(current, must)
+    for i in np.argsort(-rows['decision_in'], kind='stable'):
+        if not critical[i] and levels[i] < len(SHED_LEVELS) - 1 and levels[i] <= current[i]:
+            levels[i] = current[i] + 1
+            break
+    return levels
+
+
+class LoadShedder:
+    def __init__(self, slot, camera_id, table=None, capacity=None, budget=0.1, threads=1,
+                 interval=1.0, decision_window=5.0, smoothing=0.2, on_level=None, resizable=True):
+        """
+        slot: this camera's row (its worker index on the node, below MAX_CAMERAS)
+        capacity: cores the cameras may use together (default: all of them)
+        budget: per-frame detection latency budget (seconds)
+        threads: cores one inference keeps busy (the inference thread count)
+        interval: how often the levels are re-planned (seconds)
+        decision_window: a decision this close makes the camera critical (seconds)
+        on_level(stride, scale): called when this camera's level changes
+        resizable: False if the detector's input size is fixed (exported
+                   model): only the stride is shed and the scale stays 1.0
+        """
+        self.slot = slot
+        self.camera_id = camera_id
+        self.table = table if table is not None else NodeLoadTable()
+        self.capacity = capacity if capacity is not None else float(os.cpu_count() or 1)
+        self.budget = budget
+        self.threads = threads
+        self.interval = interval
+        self.decision_window = decision_window
+        self.smoothing = smoothing
+        self.on_level = on_level
+        self.resizable = resizable
+        if not 0 <= slot < len(self.table.rows):
+            raise ValueError(f"Load table slot {slot} out of range (the table has "
+                             f"{len(self.table.rows)} rows)")
+
+        self.level = 0
+        self.last_plan = 0.0
+        self.node_load = 0.0
+        self._cameras = []
+        row = self.table.rows[slot]
+        row['camera'] = str(camera_id).encode()[:24]
+        row['cores'] = 0.0
+        row['late'] = 0.0
+        row['level'] = 0
+        row['fixed_size'] = 0.0 if resizable else 1.0
+        row['heartbeat'] = time.time()
+
+    @property
+    def stride(self):
+        return SHED_LEVELS[self.level][0]
+
+    @property
+    def scale(self):
+        return SHED_LEVELS[self.level][1] if self.resizable else 1.0
+
+    def should_detect(self, frame_number):
+        """Whether this frame gets a detection at the current level"""
+        return frame_number % self.stride == 0
+
+    def report(self, seconds, frame_interval, decision_in, critical=False):
+        """
+        Record one detection and re-plan when due
+        seconds: how long the detection took (at the current input scale)
+        frame_interval: seconds between frames of this camera
+        decision_in: seconds until this camera's next signal decision
+        critical: force critical (e.g. during a preemption)
+        """
+        # Normalized to full quality: input size scales the cost by its area
+        cores = seconds / (self.scale * self.scale) / frame_interval * self.threads
+        row = self.table.rows[self.slot]
+        alpha = self.smoothing
+        row['cores'] = cores if row['cores'] == 0 else (1 - alpha) * row['cores'] + alpha * cores
+        row['late'] = (1 - alpha) * row['late'] + alpha * (seconds > self.budget)
+        row['decision_in'] = decision_in
+        row['critical'] = 1.0 if critical or decision_in <= self.decision_window else 0.0
+        now = time.time()
+        row['heartbeat'] = now
+        if now - self.last_plan >= self.interval:
+            self.plan(now)
+
+    def plan(self, now=None):
+        """Re-plan the node's levels from the table and apply this camera's"""
+        now = time.time() if now is None else now
+        self.last_plan = now
+        rows, slots = self.table.snapshot(now)
+        if len(rows) == 0:
+            return self.level
+        levels = plan_levels(rows, self.capacity)
+        factors = level_factors(rows['fixed_size'])[np.arange(len(rows)), levels]
+        self.node_load = float((rows['cores'] * factors).sum() / self.capacity)
+        self._cameras = [{'camera': row['camera'].decode(errors='replace'), 'level': int(level),
+                          'critical': bool(row['critical']), 'cores': round(float(row['cores']), 2)}
+                         for row, level in zip(rows, levels)]
+
+        mine = np.flatnonzero(slots == self.slot)
+        level = int(levels[mine[0]]) if len(mine) else self.level
+        if level != self.level:
+            log_event('load.shed_changed', camera=self.camera_id, previous=self.level, current=level,
+                      node_load=round(self.node_load, 2))
+            self.level = level
+            self.table.rows[self.slot]['level'] = level
+            if self.on_level is not None:
+                self.on_level(self.stride, self.scale)
+        return level
+
+    def get_state(self):
+        """Current shedding state (for the dashboard)"""
+        return {
+            'level': self.level,
+            'stride': self.stride,
+            'scale': self.scale,
+            'node_load': round(self.node_load, 2),
+            'cameras': self._cameras
+        }
+
+    def close(self):
+        """Free this camera's row"""
+        if self.table.rows is not None:
+            self.table.rows[self.slot]['heartbeat'] = 0.0
@@ -0,0 +1,137 @@
+"""
+Dashboard Load Test
+Opens many concurrent /video_feed viewers while polling /api/status, and
+reports how many viewers the dashboard can hold at an acceptable frame rate
+
+Usage:
+    python load_test.py http://localhost:8000 --viewers 10 50 100 200
+"""
+
+import argparse
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+
+async def open_request(base_url, path):
+    """
+    Send a GET request
+    Returns: (reader, writer) positioned after the response headers
+    """
+    parts = urlsplit(base_url)
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\n"
+                 f"Connection: close\r\n\r\n".encode())
+    await writer.drain()
+    await reader.readuntil(b"\r\n\r\n")
+    return reader, writer
+
+
+async def viewer(base_url, path, stop):
+    """Read an MJPEG stream until stopped; returns frames received (or None on error)"""
+    try:
+        reader, writer = await open_request(base_url, path)
+    except (OSError, asyncio.IncompleteReadError):
+        return None
+
+    frames = 0
+    try:
+        while not stop.is_set():
+            line = await reader.readline()
+            if not line:
+                break
+            if line.startswith(b'--frame'):
+                frames += 1
+    except (OSError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+    return frames
+
+
+async def status_poller(base_url, stop, interval=0.1):
+    """Poll /api/status until stopped; returns request latencies (seconds)"""
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            reader, writer = await open_request(base_url, "/api/status")
+            await reader.read()
+            writer.close()
+            latencies.append(time.perf_counter() - start)
+        except (OSError, asyncio.IncompleteReadError):
+            latencies.append(float('inf'))
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def run_level(base_url, num_viewers, duration, path="/video_feed"):
+    """
+    Hold num_viewers streams open for duration seconds
+    Returns: dictionary with per-viewer FPS and status latency
+    """
+    stop = asyncio.Event()
+    viewers = [asyncio.create_task(viewer(base_url, path, stop)) for _ in range(num_viewers)]
+    poller = asyncio.create_task(status_poller(base_url, stop))
+
+    await asyncio.sleep(duration)
+    stop.set()
+    frames = await asyncio.gather(*viewers)
+    latencies = await poller
+
+    connected = [f for f in frames if f is not None]
+    fps = np.array(connected, dtype=float) / duration if connected else np.zeros(1)
+    finite = [l for l in latencies if l != float('inf')]
+    return {
+        'viewers': num_viewers,
+        'connected': len(connected),
+        'fps_mean': float(fps.mean()),
+        'fps_min': float(fps.min()),
+        'status_requests': len(latencies),
+        'status_failures': len(latencies) - len(finite),
+        'status_p95_ms': float(np.percentile(finite, 95) * 1000) if finite else float('inf')
+    }
+
+
+def run_load_test(base_url, levels, duration=10.0, min_fps=5.0, max_status_ms=500.0, path="/video_feed"):
+    """
+    Run increasing viewer levels
+    A level passes if every viewer connected and got at least min_fps
+    while /api/status stayed under max_status_ms (p95)
+    Returns: (list of level results, highest passing viewer count)
+    """
+    results = []
+    capacity = 0
+    for level in levels:
+        result = asyncio.run(run_level(base_url, level, duration, path))
+        result['passed'] = (result['connected'] == level
+                            and result['fps_min'] >= min_fps
+                            and result['status_failures'] == 0
+                            and result['status_p95_ms'] <= max_status_ms)
+        results.append(result)
+        if result['passed']:
+            capacity = level
+        print(f"  {level:4d} viewers: {result['connected']:4d} connected, "
+              f"{result['fps_mean']:5.1f} fps avg ({result['fps_min']:5.1f} min), "
+              f"status p95 {result['status_p95_ms']:7.1f} ms "
+              f"{'✓' if result['passed'] else '✗'}")
+    return results, capacity
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dashboard viewer capacity load test")
+    parser.add_argument('url', nargs='?', default="http://localhost:8000")
+    parser.add_argument('--viewers', type=int, nargs='+', default=[10, 50, 100, 200])
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds per level")
+    parser.add_argument('--min-fps', type=float, default=5.0)
+    parser.add_argument('--max-status-ms', type=float, default=500.0)
+    parser.add_argument('--path', default="/video_feed", help="stream path (e.g. /video_feed?w=320)")
+    args = parser.parse_args()
+
+    print(f"Load testing {args.url}{args.path}")
+    results, capacity = run_load_test(args.url, args.viewers, args.duration,
+                                      args.min_fps, args.max_status_ms, args.path)
+    print(f"\nViewer capacity: {capacity} concurrent viewers "
+          f"(>= {args.min_fps} fps each, status p95 <= {args.max_status_ms} ms)")
@@ -5,43 +5,222 @@ Synchronized with web dashboard via shared state
 """
 
 import cv2
+import math
+import os
+import signal
+import socket
 import time
-from vehicle_detector import VehicleDetector
+from threading import Thread, Lock
+from vehicle_detector import VehicleDetector, DEFAULT_MODEL, DEFAULT_IMGSZ, detector_config
+from tiered_detector import TieredDetector, TIER_YOLO
+from detection_consumers import PedestrianWaiting, CyclistCounter
 from traffic_density_analyzer import TrafficDensityAnalyzer
 from traffic_signal_controller import TrafficSignalController
 from arduino_controller import ArduinoController
 from shared_state import get_state_manager
+from network_camera import open_video_source, is_network_source
+from time_series_store import TimeSeriesStore, DENSITY_LEVELS, DEFAULT_HISTORY_FILE
+from history_db import HistoryDatabase
+from detection_cache import open_detection_cache
+from frame_channel import FrameChannel, channel_name
+from frame_pool import FramePool
+from cpu_resources import load_policy, apply_policy
+from model_tuner import select_model
+from phase_scheduler import PhaseScheduler
+from load_shedder import LoadShedder
+from preemption import Preemption, EmergencyVehicleTrigger, PreemptionInputs, PREEMPT_PORT
+from telemetry import TelemetryPublisher, spool_path
+from event_log import log_event
+from sampling_profiler import profile
+
+# How often the history snapshot is written for the dashboard (seconds)
+HISTORY_SAVE_INTERVAL = 5
+
+# JPEG quality of frames published to the dashboard
+PUBLISH_JPEG_QUALITY = 90
+
+# Far-field region analyzed as full-resolution tiles to find distant vehicles
+# (x1, y1, x2, y2 as fractions of the frame), e.g. (0.3, 0.0, 0.7, 0.35); None = off
+TILE_ROI = None
+
+# Density thresholds per camera: camera_id -> (LOW, MEDIUM) upper bounds in
+# passenger car units (a bus is 3, a motorcycle 0.5); others use (5, 15)
+DENSITY_THRESHOLDS = {}
+
+# Several cameras on one node: when the CPU is oversubscribed, cameras whose
+# signal decision is far away detect less often / at a lower input size first
+LOAD_SHEDDING = True
+DECISION_WINDOW = 5  # seconds; cameras this close to a decision are never shed
+
+# Crosswalk waiting area for pedestrian detection (x1, y1, x2, y2 as
+# fractions of the frame); None = anyone in view counts
+CROSSWALK_ZONE = None
+
+# Emergency vehicle preemption: YELLOW (if GREEN) -> all-red clearance -> all-red hold
+# Triggered by a local 'PREEMPT' UDP datagram, the src/preempt.trigger file, or
+# detections of EMERGENCY_CLASSES (class IDs of a model trained with emergency
+# vehicles; COCO has none, so None = off)
+EMERGENCY_CLASSES = None
+PREEMPT_INPUTS = True
+ALL_RED_TIME = 2   # seconds
+PREEMPT_HOLD = 15  # seconds, restarted while the vehicle is still reported
+
+# Central telemetry: compact binary state records streamed to an aggregator,
+# e.g. "tcp://ops-center:47900" (src/telemetry_aggregator.py; None = off).
+# Unsent records are spooled to disk during outages and replayed in order
+TELEMETRY_URL = None
+TELEMETRY_INTERVAL = 1.0  # seconds between samples (phase changes are always sent)
+
+# Per-frame detection latency budget: slower YOLO falls back to motion counting (seconds)
+DETECTION_BUDGET = 0.1
+
+# 'kill -USR1 <pid>' profiles every thread for this long; collapsed stacks
+# (flamegraph input) are written to PROFILE_DIR
+PROFILE_SECONDS = 30
+PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
+
+# Pick the most accurate model/input size that fits DETECTION_BUDGET on this host
+# (measured on the first start, then cached in model_tuning.json)
+AUTO_TUNE_MODEL = True
 
 class TrafficManagementSystem:
-    def __init__(self, video_path, arduino_port='COM3', sync_with_dashboard=True):
+    def __init__(self, video_path, arduino_port='COM3', sync_with_dashboard=True, camera_id="main",
+                 worker_index=0, num_workers=1):
         """
         Initialize the complete traffic management system
+        camera_id: name of this camera/approach in the history database
+        worker_index / num_workers: this process's slot when several cameras run
+                                    on one host (each is pinned to its own cores)
         """
         print("Initializing Traffic Management System...")
         
+        # Thread counts and core pinning, before torch/FFmpeg start their threads
+        # (calibrate with: python cpu_resources.py --calibrate)
+        self.cpu_policy = load_policy(num_workers)
+        cores = apply_policy(self.cpu_policy, worker_index, num_workers)
+        print(f"✓ CPU policy: {self.cpu_policy.inference_threads} inference, "
+              f"{self.cpu_policy.opencv_threads} OpenCV, {self.cpu_policy.decode_threads} decode "
+              f"thread(s) on cores {cores}")
+        
         # Initialize components
-        self.detector = VehicleDetector()
-        self.analyzer = TrafficDensityAnalyzer()
+        model_path, imgsz = DEFAULT_MODEL, DEFAULT_IMGSZ
+        if AUTO_TUNE_MODEL:
+            try:
+                tuned = select_model(DETECTION_BUDGET, source=video_path)
+            except Exception as e:
+                print(f"⚠ Model tuning failed ({e}), using {DEFAULT_MODEL}")
+                tuned = None
+            if tuned:
+                model_path, imgsz = tuned['model_path'], tuned['imgsz']
+                print(f"✓ Detector: {tuned['model']} at {imgsz} px ({tuned['backend']}, "
+                      f"{tuned['latency_ms']} ms per frame)")
+        
+        # Frames are decoded and annotated into reused buffers
+        self.frame_pool = FramePool()
+        
+        # Looped video files are only analyzed once per frame (cached in '<video>.detections')
+        self.detection_cache = open_detection_cache(
+            video_path, config=detector_config(model_path, imgsz, TILE_ROI))
+        self.detector = TieredDetector(VehicleDetector(cache=self.detection_cache, tile_roi=TILE_ROI,
+                                                       model_path=model_path, imgsz=imgsz,
+                                                       pool=self.frame_pool),
+                                       budget=DETECTION_BUDGET)
+        # Pedestrians and cyclists come from the same inference as the vehicles
+        self.detector.add_consumer(PedestrianWaiting(zone=CROSSWALK_ZONE))
+        self.detector.add_consumer(CyclistCounter())
+        self.analyzer = TrafficDensityAnalyzer(*DENSITY_THRESHOLDS.get(camera_id, (5, 15)))
         self.signal_controller = TrafficSignalController()
         self.arduino = ArduinoController(port=arduino_port)
         
         # Initialize shared state manager for dashboard sync
         self.sync_with_dashboard = sync_with_dashboard
+        self.frame_channel = None
         if sync_with_dashboard:
-            self.state_manager = get_state_manager()
+            self.state_manager = get_state_manager(camera_id)
             print("✓ Dashboard synchronization enabled")
+            
+            # Annotated frames + detections go to the dashboard through shared memory,
+            # so it never decodes the video or runs its own model while we run
+            try:
+                self.frame_channel = FrameChannel(channel_name(camera_id), create=True)
+                print("✓ Frame channel ready")
+            except OSError as e:
+                print(f"⚠ Frame channel unavailable ({e}), dashboard will decode on its own")
         
-        # Video capture
-        self.cap = cv2.VideoCapture(video_path)
+        # Video capture (file, webcam index, or RTSP/HTTP stream URL)
+        self.is_live_source = is_network_source(video_path)
+        self.cap = open_video_source(video_path, decode_threads=self.cpu_policy.decode_threads)
         if not self.cap.isOpened():
             raise Exception(f"Could not open video: {video_path}")
         
+        # Traffic history (per-second samples with minute/hour rollups)
+        self.history = TimeSeriesStore()
+        self.last_history_save = time.time()
+        self.history_save_lock = Lock()  # Recorded from the scheduler and detection threads
+        
+        # Durable history (batched writes on a background thread)
+        self.camera_id = camera_id
+        self.history_db = HistoryDatabase()
+        
         # System state
         self.current_density = "LOW"
         self.vehicle_count = 0
+        self.demand = 0.0  # Vehicle count weighted by road space (PCU)
         self.signal_state = "RED"
         self.cycle_count = 0
         self.start_time = time.time()
+        self.phase_start_time = time.time()
+        self.cycle_vehicle_sum = 0
+        self.cycle_frames = 0
+        self.cycle_start = None  # Set while a full RED-GREEN-YELLOW cycle runs
+        
+        # Phase transitions fire at exact deadlines on their own thread
+        self.scheduler = PhaseScheduler(self.plan_cycle, self.update_signal)
+        
+        # Emergency vehicles interrupt any phase (within one frame when detected)
+        self.preemption = Preemption(self.scheduler, yellow_time=self.signal_controller.yellow_time,
+                                     all_red_time=ALL_RED_TIME, hold_time=PREEMPT_HOLD,
+                                     on_preempt=self.abort_cycle)
+        if EMERGENCY_CLASSES:
+            self.detector.add_consumer(EmergencyVehicleTrigger(self.preemption, EMERGENCY_CLASSES))
+        self.preemption_inputs = None
+        if PREEMPT_INPUTS:
+            try:
+                self.preemption_inputs = PreemptionInputs(self.preemption, port=PREEMPT_PORT + worker_index)
+                print(f"✓ Preemption input on udp://127.0.0.1:{self.preemption_inputs.port}")
+            except OSError as e:
+                print(f"⚠ Preemption socket unavailable ({e})")
+        
+        # Node-level load shedding (shared with the other cameras on this host)
+        self.imgsz = imgsz
+        self.frame_number = 0
+        fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.frame_interval = 1.0 / fps if fps and fps > 0 else 1.0 / 25
+        self.shedder = None
+        if LOAD_SHEDDING:
+            try:
+                self.shedder = LoadShedder(worker_index, camera_id, budget=DETECTION_BUDGET,
+                                           threads=self.cpu_policy.inference_threads,
+                                           decision_window=DECISION_WINDOW, on_level=self.apply_shedding,
+                                           resizable=self.detector.resizable)
+            except (OSError, ValueError) as e:
+                print(f"⚠ Load shedding unavailable ({e})")
+        
+        # State samples for the central aggregator
+        self.telemetry = None
+        self.last_telemetry = 0.0
+        if TELEMETRY_URL:
+            try:
+                self.telemetry = TelemetryPublisher(TELEMETRY_URL, f"{socket.gethostname()}/{camera_id}",
+                                                    spool_path=spool_path(camera_id))
+                print(f"✓ Telemetry to {TELEMETRY_URL}")
+            except ValueError as e:
+                print(f"⚠ Telemetry disabled ({e})")
+        
+        # On-demand profiling of the running system (POSIX signals only)
+        self.profiling = False
+        if hasattr(signal, 'SIGUSR1'):
+            signal.signal(signal.SIGUSR1, lambda signum, frame: self.start_profile())
         
         print("✓ System initialized successfully!\n")
     
@@ -49,22 +228,38 @@ class TrafficManagementSystem:
         """
         Process a single frame: detect vehicles and update display
         """
-        ret, frame = self.cap.read()
+        ret, frame = self.frame_pool.read(self.cap)
         if not ret:
             return None
         
         # Detect vehicles
-        self.vehicle_count, annotated_frame = self.detector.detect_vehicles(frame)
+        frame_index = None
+        if self.detection_cache is not None:
+            frame_index = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES)) - 1
+        self.frame_number += 1
+        if self.shedder is None or self.shedder.should_detect(self.frame_number):
+            start = time.perf_counter()
+            self.vehicle_count, annotated_frame = self.detector.detect_vehicles(frame, frame_index)
+            if self.shedder is not None:
+                self.shedder.report(time.perf_counter() - start, self.frame_interval,
+                                    self.scheduler.time_until_decision(), critical=self.preemption.active)
+        else:
+            annotated_frame = self.detector.annotate(frame)  # Shed: redraw the last detections
+        self.frame_pool.release(frame)  # Boxes were drawn on a buffer of their own
+        self.history_db.record_detection(self.camera_id, self.vehicle_count)
+        self.cycle_vehicle_sum += self.vehicle_count
+        self.cycle_frames += 1
         
-        # Classify density
-        self.current_density = self.analyzer.classify_density(self.vehicle_count)
+        # Classify density from class-weighted demand
+        self.demand = self.analyzer.frame_demand(self.detector.last_detections[2], self.vehicle_count)
+        self.current_density = self.analyzer.classify_density(self.demand)
         density_color = self.analyzer.get_density_color(self.current_density)
         
         # Add information overlay
         cv2.putText(annotated_frame, f"Vehicles: {self.vehicle_count}", 
                    (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
         
-        cv2.putText(annotated_frame, f"Density: {self.current_density}", 
+        cv2.putText(annotated_frame, f"Density: {self.current_density} ({self.demand:.1f} PCU)", 
                    (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 1, density_color, 2)
         
         cv2.putText(annotated_frame, f"Signal: {self.signal_state}", 
@@ -87,9 +282,7 @@ class TrafficManagementSystem:
         Update traffic signal state and send to Arduino
         Also updates shared state for dashboard
         """
-        self.signal_state = state
-        
-        # Map state to Arduino command
+        # The lamps change first: everything else can lag behind the deadline
         signal_map = {
             "RED": 'R',
             "YELLOW": 'Y',
@@ -98,6 +291,19 @@ class TrafficManagementSystem:
         
         if state in signal_map:
             self.arduino.send_signal(signal_map[state])
+        self.preemption.lamp_changed(state)
+        
+        phase_changed = state != self.signal_state
+        if phase_changed:
+            now = time.time()
+            log_event('signal.phase_changed', camera=self.camera_id, previous=self.signal_state,
+                      state=state, duration=time_remaining, vehicles=self.vehicle_count)
+            self.history_db.record_phase_change(self.camera_id, self.signal_state, state,
+                                                now - self.phase_start_time)
+            self.phase_start_time = now
+        self.signal_state = state
+        self.record_history(phase_changed)
+        self.publish_telemetry(time_remaining, force=phase_changed)
         
         # Update shared state for dashboard sync
         if self.sync_with_dashboard:
@@ -112,78 +318,173 @@ class TrafficManagementSystem:
                 total_runtime=total_runtime
             )
     
-    def run_signal_cycle(self):
+    def publish_telemetry(self, time_remaining, force=False):
+        """Queue a state sample for the aggregator (every TELEMETRY_INTERVAL, or now)"""
+        if self.telemetry is None:
+            return
+        now = time.time()
+        if not force and now - self.last_telemetry < TELEMETRY_INTERVAL:
+            return
+        self.last_telemetry = now
+        self.telemetry.record(
+            self.signal_state, self.vehicle_count, self.current_density, demand=self.demand,
+            time_remaining=time_remaining, cycle_count=self.cycle_count,
+            preempted=self.preemption.active, motion_tier=self.detector.tier != TIER_YOLO,
+            shed_level=self.shedder.level if self.shedder is not None else 0, timestamp=now)
+    
+    def record_history(self, phase_changed=False):
         """
-        Run one complete signal cycle based on current density
-        NEW: Stays RED if no vehicles detected
+        Add the current state to the traffic history
+        Periodically saves a snapshot for the dashboard's /api/history
         """
-        # Check if there are vehicles
-        has_vehicles = self.vehicle_count > 0
-        
-        timing = self.signal_controller.get_signal_timing(
-            self.current_density, 
-            has_vehicles=has_vehicles
+        self.history.record(
+            vehicle_count=self.vehicle_count,
+            density_level=DENSITY_LEVELS.get(self.current_density, 0),
+            green_time=self.analyzer.calculate_green_time(self.current_density),
+            green_share=1 if self.signal_state == "GREEN" else 0,
+            phase_changes=1 if phase_changed else 0
         )
         
-        # If no vehicles, stay RED and wait
-        if not has_vehicles:
-            self.update_signal("RED", 10)
-            if not self.run_for_duration(10):  # Check every 10 seconds
-                return False
-            return True  # Don't increment cycle, just loop
-        
-        # RED signal (10 seconds)
-        self.update_signal("RED", timing["RED"])
-        if not self.run_for_duration(timing["RED"]):
-            return False
-        
-        # GREEN signal (30 seconds)
-        self.update_signal("GREEN", timing["GREEN"])
-        if not self.run_for_duration(timing["GREEN"]):
-            return False
+        if not self.sync_with_dashboard:
+            return
+        now = time.time()
+        with self.history_save_lock:
+            due = now - self.last_history_save >= HISTORY_SAVE_INTERVAL
+            if due:
+                self.last_history_save = now
+        if due:
+            try:
+                self.history.save(DEFAULT_HISTORY_FILE)
+            except OSError as e:
+                log_event('history.save_failed', 'error', error=str(e))
+    
+    def publish_frame(self, frame):
+        """Share the annotated frame and its detections with the dashboard"""
+        if self.frame_channel is None:
+            return
+        ret, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, PUBLISH_JPEG_QUALITY])
+        if ret:
+            self.frame_channel.publish(jpeg, *self.detector.last_detections,
+                                       width=frame.shape[1], height=frame.shape[0],
+                                       vehicle_count=self.vehicle_count)
+    
+    def apply_shedding(self, stride, scale):
+        """Load shedding level changed: apply the input size (the stride is read per frame)"""
+        # Cached video detections are keyed by input size, so files keep theirs;
+        # exported models have a fixed input size (their shedder keeps scale 1.0)
+        if self.detection_cache is None and self.detector.resizable:
+            self.detector.set_input_size(max(int(round(self.imgsz * scale / 32)) * 32, 160))
+    
+    def start_profile(self, seconds=PROFILE_SECONDS):
+        """Profile all threads in the background (ignored while one is running)"""
+        if self.profiling:
+            return
+        self.profiling = True
+        Thread(target=self.write_profile, args=(seconds,), daemon=True, name="profile").start()
+    
+    def write_profile(self, seconds):
+        """Sample all threads for `seconds` and save the collapsed stacks"""
+        try:
+            profiler = profile(seconds)
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            path = os.path.join(PROFILE_DIR, f"main-{os.getpid()}-{int(time.time())}.folded")
+            with open(path, 'w') as f:
+                f.write(profiler.collapsed())
+            log_event('profile.written', path=path, seconds=seconds, samples=profiler.samples)
+        except OSError as e:
+            log_event('profile.failed', 'error', error=str(e))
+        finally:
+            self.profiling = False
+    
+    def abort_cycle(self):
+        """A preemption interrupted the cycle: it is not recorded as completed"""
+        self.cycle_start = None
+    
+    def plan_cycle(self):
+        """
+        Plan the next signal cycle from the current density (called by the
+        phase scheduler when the previous plan ends)
+        NEW: Stays RED if no vehicles detected
+        Returns: list of (state, duration in seconds)
+        """
+        # The plan that just ended was a full cycle
+        if self.cycle_start is not None:
+            self.cycle_count += 1
+            self.history_db.record_cycle(
+                self.camera_id, self.cycle_count, time.time() - self.cycle_start,
+                self.cycle_vehicle_sum / self.cycle_frames if self.cycle_frames else None
+            )
+            self.cycle_start = None
         
-        # YELLOW signal (3 seconds)
-        self.update_signal("YELLOW", timing["YELLOW"])
-        if not self.run_for_duration(timing["YELLOW"]):
-            return False
+        # Check if there are vehicles
+        has_vehicles = self.vehicle_count > 0
         
-        # Increment cycle count
-        self.cycle_count += 1
+        # A new cycle starts; with no vehicles the plan is RED for 10 s (not a cycle)
+        if has_vehicles:
+            self.cycle_start = time.time()
+            self.cycle_vehicle_sum = 0
+            self.cycle_frames = 0
         
-        return True
+        return self.signal_controller.plan_cycle(self.current_density, has_vehicles)
     
-    def run_for_duration(self, duration):
+    def run_detection_loop(self):
         """
-        Process frames for a specific duration (in seconds)
+        Process frames until 'q' is pressed; phases are switched by the
+        scheduler meanwhile, so slow frames never stretch a phase
         Updates time remaining in shared state
         """
-        start_time = time.time()
-        while (time.time() - start_time) < duration:
+        while self.scheduler.is_running():
             frame = self.process_frame()
             if frame is None:
-                break
+                # Loop video files; live streams just keep waiting for frames
+                if not self.is_live_source:
+                    self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    # A completed loop is worth keeping even if the process is killed later
+                    if self.detection_cache is not None and self.detection_cache.unsaved:
+                        try:
+                            self.detection_cache.save()
+                        except OSError as e:
+                            log_event('detection_cache.save_failed', 'error', error=str(e))
+                continue
             
             # Calculate remaining time
-            elapsed = int(time.time() - start_time)
-            remaining = duration - elapsed
+            remaining = int(math.ceil(self.scheduler.time_remaining()))
             
             # Update shared state with current time remaining
             if self.sync_with_dashboard:
                 total_runtime = int(time.time() - self.start_time)
+                extra = {'detection_tier': self.detector.tier,
+                         'demand_pcu': round(self.demand, 1),
+                         'phase_timing': self.scheduler.get_stats(),
+                         'preemption': self.preemption.get_stats()}
+                if self.shedder is not None:
+                    extra['load_shedding'] = self.shedder.get_state()
+                if self.telemetry is not None:
+                    extra['telemetry'] = self.telemetry.get_stats()
+                extra.update(self.detector.consumer_results)
+                if self.is_live_source:
+                    extra['camera_health'] = self.cap.get_health()
                 self.state_manager.update_state(
                     signal_state=self.signal_state,
                     vehicle_count=self.vehicle_count,
                     density=self.current_density,
                     time_remaining=remaining,
                     cycle_count=self.cycle_count,
-                    total_runtime=total_runtime
+                    total_runtime=total_runtime,
+                    **extra
                 )
             
+            self.record_history()
+            self.publish_telemetry(remaining)
+            
             # Add timer to frame
             cv2.putText(frame, f"Time: {remaining}s", 
                        (10, 190), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 0), 2)
             
+            self.publish_frame(frame)
+            
             cv2.imshow('Traffic Management System', frame)
+            self.frame_pool.release(frame)  # Buffer is reused for the next decode
             
             if cv2.waitKey(30) & 0xFF == ord('q'):
                 return False
@@ -202,14 +503,11 @@ class TrafficManagementSystem:
             print()
         
         try:
-            while self.cap.isOpened():
-                # Run one signal cycle
-                if not self.run_signal_cycle():
-                    break
-                
-                # Reset video if it ends
-                if self.cap.get(cv2.CAP_PROP_POS_FRAMES) >= self.cap.get(cv2.CAP_PROP_FRAME_COUNT):
-                    self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            # Phases run on the scheduler thread, detection on this one
+            self.scheduler.start()
+            if self.preemption_inputs is not None:
+                self.preemption_inputs.start()
+            self.run_detection_loop()
         
         except KeyboardInterrupt:
             print("\nSystem stopped by user")
@@ -222,15 +520,37 @@ class TrafficManagementSystem:
         Clean up resources
         """
         print("\nCleaning up...")
+        if self.preemption_inputs is not None:
+            self.preemption_inputs.stop()
+        self.scheduler.stop()
+        timing = self.scheduler.get_stats()
+        if timing.get('transitions'):
+            print(f"Phase timing: {timing['transitions']} transitions, lateness "
+                  f"mean {timing['mean_ms']} ms, p95 {timing['p95_ms']} ms, max {timing['max_ms']} ms")
+        preemption = self.preemption.get_stats()
+        if preemption['count']:
+            print(f"Preemptions: {preemption['count']}, response p95 {preemption.get('response_p95_ms')} ms, "
+                  f"max {preemption.get('response_max_ms')} ms")
         self.cap.release()
         cv2.destroyAllWindows()
         self.arduino.close()
+        self.history_db.close()
+        if self.telemetry is not None:
+            self.telemetry.close()  # Unsent records stay in the spool for the next start
+        if self.shedder is not None:
+            self.shedder.close()
+        if self.frame_channel is not None:
+            self.frame_channel.close()
+        if self.detection_cache is not None:
+            self.detection_cache.save()
+            stats = self.detection_cache.get_stats()
+            print(f"Detection cache: {stats['entries']} frames, {stats['hit_rate']:.0%} hit rate")
         print("✓ Cleanup complete")
 
 # Main execution
 if __name__ == "__main__":
     # Configuration
-    VIDEO_PATH = "../videos/traffic_video.mp4"
+    VIDEO_PATH = "../videos/traffic_video.mp4"  # Or a stream URL, e.g. "rtsp://192.168.1.10:554/stream1"
     ARDUINO_PORT = "COM3"  # Change to your Arduino port
     SYNC_WITH_DASHBOARD = True  # Enable dashboard synchronization
     
@@ -0,0 +1,278 @@
+"""
+Model Auto-Tuner
+Benchmarks detector configurations (model variant, input size, batch size,
+backend) on this host and picks the most accurate one that fits the
+per-frame latency budget at the current camera count. The decision is cached
+per host fingerprint, so later starts do not measure again
+
+Usage:
+    python model_tuner.py --budget 100                # tune (or show the cached choice)
+    python model_tuner.py --budget 100 --cameras 4 --force
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from cpu_resources import available_cores, host_fingerprint
+
+DEFAULT_TUNING_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "model_tuning.json")
+EXPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "exported_models")
+
+# COCO mAP50-95 of the YOLOv8 variants at 640 px (Ultralytics model card)
+MODEL_ACCURACY = {'yolov8n': 37.3, 'yolov8s': 44.9, 'yolov8m': 50.2, 'yolov8l': 52.9, 'yolov8x': 53.9}
+# Rough share of that accuracy kept at smaller inputs (small, distant vehicles go first)
+SIZE_FACTOR = {320: 0.80, 416: 0.88, 480: 0.92, 640: 1.0}
+
+# Backends: name -> (Ultralytics export format, Python package it needs, file suffix)
+BACKENDS = {
+    'pytorch': (None, 'torch', '.pt'),
+    'onnx': ('onnx', 'onnxruntime', '.onnx'),
+    'openvino': ('openvino', 'openvino', '_openvino_model'),
+}
+
+Candidate = namedtuple('Candidate', ['model', 'imgsz', 'batch', 'backend'])
+
+
+def estimated_accuracy(candidate):
+    """Expected accuracy of a configuration (backend and batch do not change it)"""
+    return MODEL_ACCURACY[candidate.model] * SIZE_FACTOR.get(candidate.imgsz, 1.0)
+
+
+def available_backends():
+    """Backends whose runtime is installed"""
+    return [name for name, (_, package, _) in BACKENDS.items()
+            if importlib.util.find_spec(package) is not None]
+
+
+def model_file(candidate, export=True):
+    """
+    Get the model file for a candidate, exporting it on first use
+    Exports are kept in exported_models/ (one per model, size and batch mode)
+    export: False returns None instead of exporting a missing file
+    """
+    if candidate.backend == 'pytorch':
+        return f"{candidate.model}.pt"
+
+    export_format, _, suffix = BACKENDS[candidate.backend]
+    dynamic = candidate.batch > 1
+    name = f"{candidate.model}_{candidate.imgsz}{'_dynamic' if dynamic else ''}{suffix}"
+    path = os.path.join(EXPORT_DIR, name)
+    if not os.path.exists(path):
+        if not export:
+            return None
+        from ultralytics import YOLO
+
+        print(f"Exporting {candidate.model} to {candidate.backend} at {candidate.imgsz} px...")
+        exported = YOLO(f"{candidate.model}.pt").export(
+            format=export_format, imgsz=candidate.imgsz, dynamic=dynamic, verbose=False)
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        os.replace(exported, path)
+    return path
+
+
+def measure_candidate(candidate, frames, num_cameras, repeat=5, warmup=2):
+    """
+    Time one round of detection: a frame from every camera, in batches
+    Returns: p95 round time (seconds)
+    """
+    from vehicle_detector import VehicleDetector
+
+    detector = VehicleDetector(model_path=model_file(candidate), imgsz=candidate.imgsz)
+    round_frames = [frames[i % len(frames)] for i in range(num_cameras)]
+
+    def detection_round():
+        for i in range(0, num_cameras, candidate.batch):
+            detector.model(round_frames[i:i + candidate.batch], verbose=False)
+
+    for _ in range(warmup):
+        detection_round()
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        detection_round()
+        durations.append(time.perf_counter() - start)
+    return float(np.percentile(durations, 95))
+
+
+class ModelTuner:
+    def __init__(self, budget=0.1, num_cameras=1, models=('yolov8n', 'yolov8s', 'yolov8m'),
+                 sizes=(320, 480, 640), batches=(1, 2, 4), backends=None,
+                 measure=measure_candidate, cache_path=DEFAULT_TUNING_FILE):
+        """
+        budget: time allowed for one frame from every camera (seconds)
+        num_cameras: cameras whose frames this detector processes
+        models / sizes / batches / backends: search space (backends default
+                                             to the installed ones)
+        measure: function(candidate, frames, num_cameras) -> round time (seconds)
+        """
+        self.budget = budget
+        self.num_cameras = num_cameras
+        self.models = sorted(models, key=lambda model: MODEL_ACCURACY[model])
+        self.sizes = sorted(sizes)
+        self.batches = sorted({min(batch, num_cameras) for batch in batches})
+        self.backends = list(backends) if backends is not None else available_backends()
+        self.measure = measure
+        self.cache_path = cache_path
+
+    def cache_key(self):
+        """Decisions are valid for this host, core share, camera count and budget"""
+        return (f"{host_fingerprint()}|cores={len(available_cores())}"
+                f"|cameras={self.num_cameras}|budget={round(self.budget * 1000)}")
+
+    def cached(self):
+        """Get the cached decision for this host, or None"""
+        try:
+            with open(self.cache_path) as f:
+                return json.load(f).get(self.cache_key())
+        except (OSError, ValueError):
+            return None
+
+    def save(self, decision):
+        """Store a decision under this host's key"""
+        try:
+            with open(self.cache_path) as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            saved = {}
+        saved[self.cache_key()] = decision
+        with open(self.cache_path, 'w') as f:
+            json.dump(saved, f, indent=2)
+
+    def tune(self, frames, force=False):
+        """
+        Pick the most accurate configuration within the budget
+        frames: sample frames from the camera(s)
+        Returns: decision dictionary (the cached one unless force is set)
+        """
+        decision = None if force else self.cached()
+        if decision is not None:
+            return decision
+
+        measurements = []
+        for backend in self.backends:
+            for batch in self.batches:
+                for model in self.models:
+                    fits = False
+                    # Larger inputs only get slower: stop at the first one over budget
+                    for imgsz in self.sizes:
+                        candidate = Candidate(model, imgsz, batch, backend)
+                        try:
+                            latency = self.measure(candidate, frames, self.num_cameras)
+                        except Exception as e:
+                            print(f"⚠ Skipping {candidate}: {e}")
+                            break
+                        measurements.append((candidate, latency))
+                        print(f"  {model:8s} {imgsz:4d} px  batch {batch}  {backend:8s} "
+                              f"{latency * 1000:7.1f} ms")
+                        if latency > self.budget:
+                            break
+                        fits = True
+                    # A larger model is never faster than one that did not fit at all
+                    if not fits:
+                        break
+
+        decision = choose_candidate(measurements, self.budget)
+        if decision is None:
+            raise RuntimeError("No detector configuration could be measured")
+        decision['tuned_at'] = time.time()
+        self.save(decision)
+        return decision
+
+
+def choose_candidate(measurements, budget):
+    """
+    Choose from (candidate, round time) pairs: the most accurate within the
+    budget (fastest among equals), or the fastest overall if none fits
+    Returns: decision dictionary, or None without measurements
+    """
+    if not measurements:
+        return None
+    within = [(c, latency) for c, latency in measurements if latency <= budget]
+    if within:
+        candidate, latency = min(within, key=lambda m: (-estimated_accuracy(m[0]), m[1]))
+    else:
+        candidate, latency = min(measurements, key=lambda m: m[1])
+    return {
+        'model': candidate.model,
+        'imgsz': candidate.imgsz,
+        'batch': candidate.batch,
+        'backend': candidate.backend,
+        'latency_ms': round(latency * 1000, 1),
+        'accuracy': round(estimated_accuracy(candidate), 1),
+        'within_budget': bool(within)
+    }
+
+
+def sample_frames(source, count=8, timeout=10.0):
+    """Read a few frames from a video source for tuning"""
+    from network_camera import open_video_source
+
+    capture = open_video_source(source)
+    frames = []
+    deadline = time.monotonic() + timeout
+    while len(frames) < count and time.monotonic() < deadline:
+        ret, frame = capture.read()
+        if not ret:
+            break
+        frames.append(frame.copy())  # Network cameras reuse their frame
+    capture.release()
+    return frames
+
+
+def select_model(budget, num_cameras=1, source=None, force=False, export=True, **kwargs):
+    """
+    Get the detector configuration for this host: cached, or tuned now
+    on frames from `source`
+    export: False never exports a model (a cached decision whose export is
+            missing returns None)
+    Returns: decision dictionary with 'model_path', or None if nothing was tuned
+    """
+    tuner = ModelTuner(budget, num_cameras, **kwargs)
+    decision = None if force else tuner.cached()
+    if decision is None:
+        frames = sample_frames(source) if source is not None else []
+        if not frames:
+            return None
+        print(f"Tuning the detector for a {budget * 1000:.0f} ms budget ({num_cameras} camera(s))...")
+        decision = tuner.tune(frames, force=True)
+    candidate = Candidate(decision['model'], decision['imgsz'], decision['batch'], decision['backend'])
+    model_path = model_file(candidate, export)
+    if model_path is None:
+        return None
+    return dict(decision, model_path=model_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pick the detector configuration for this host")
+    parser.add_argument('--budget', type=float, default=100, help="per-frame latency budget (ms)")
+    parser.add_argument('--cameras', type=int, default=1, help="cameras sharing the detector")
+    parser.add_argument('--video', default="../videos/traffic_video.mp4")
+    parser.add_argument('--models', nargs='+', default=['yolov8n', 'yolov8s', 'yolov8m'],
+                        choices=sorted(MODEL_ACCURACY))
+    parser.add_argument('--sizes', nargs='+', type=int, default=[320, 480, 640])
+    parser.add_argument('--backends', nargs='+', choices=sorted(BACKENDS))
+    parser.add_argument('--force', action='store_true', help="measure again even if cached")
+    args = parser.parse_args()
+
+    tuner = ModelTuner(args.budget / 1000, args.cameras, args.models, args.sizes, backends=args.backends)
+    decision = None if args.force else tuner.cached()
+    if decision is None:
+        frames = sample_frames(args.video)
+        if not frames:
+            frames = [np.zeros((720, 1280, 3), np.uint8)]
+            print(f"⚠ Could not read {args.video}, tuning on a blank frame")
+        print(f"Backends: {', '.join(tuner.backends)}")
+        decision = tuner.tune(frames, force=True)
+    else:
+        print("Cached decision (use --force to measure again):")
+
+    status = "✓" if decision['within_budget'] else "⚠ over budget,"
+    print(f"{status} {decision['model']} at {decision['imgsz']} px, batch {decision['batch']}, "
+          f"{decision['backend']}: {decision['latency_ms']} ms per round "
+          f"(~{decision['accuracy']} mAP)")
@@ -0,0 +1,149 @@
+"""
+Phase Scheduler
+Fires signal phase transitions at exact deadlines on the monotonic clock,
+on its own thread, so phase timing no longer depends on how long frame
+processing takes (or on wall-clock jumps). Transition lateness is recorded
+for jitter statistics. preempt() interrupts the current phase right away
+"""
+
+import time
+from collections import deque
+from threading import Thread, Event, Lock
+
+import numpy as np
+
+# The last stretch before a deadline is spun instead of slept (seconds),
+# since a sleeping thread can wake up late
+SPIN_MARGIN = 0.002
+
+
+class PhaseScheduler:
+    def __init__(self, next_phases, on_transition, clock=time.monotonic, history=1000):
+        """
+        next_phases(): called at the end of each plan (e.g. a RED-GREEN-YELLOW
+                       cycle); returns the next [(state, seconds), ...]
+                       (an empty plan stops the scheduler)
+        on_transition(state, duration): called at each phase's start deadline
+        history: number of recent transitions kept for jitter statistics
+        """
+        self.next_phases = next_phases
+        self.on_transition = on_transition
+        self.clock = clock
+
+        self._lock = Lock()
+        self._stop = Event()
+        self._wake = Event()      # Set to end a wait early (stop or preemption)
+        self._preempt = None      # Pending make_plan(state, remaining) of a preemption
+        self._thread = None
+        self.state = None
+        self.phase_end = None  # Deadline of the current phase (clock time)
+        self.plan_left = 0.0   # Seconds of the plan after the current phase
+        self.transitions = 0
+        self.preemptions = 0
+        self._lateness = deque(maxlen=history)
+
+    def start(self):
+        """Start firing transitions (the first phase starts now)"""
+        self._stop.clear()
+        self._wake.clear()
+        self._thread = Thread(target=self._run, daemon=True, name="phase-scheduler")
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        """Stop the scheduler (the current phase is left as it is)"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def preempt(self, make_plan):
+        """
+        Interrupt the current phase (callable from any thread)
+        make_plan(state, remaining): called on the scheduler thread right away
+                                     with the current state and its seconds left;
+                                     its [(state, seconds), ...] replaces the plan
+                                     (an empty list keeps the current one)
+        """
+        with self._lock:
+            self._preempt = make_plan
+        self._wake.set()
+
+    def _sleep_until(self, deadline):
+        """Wait for a deadline or a preemption; returns False if stopped first"""
+        while True:
+            if self._stop.is_set():
+                return False
+            if self._preempt is not None:
+                return True
+            remaining = deadline - self.clock()
+            if remaining <= 0:
+                return True
+            if remaining > SPIN_MARGIN:
+                self._wake.wait(remaining - SPIN_MARGIN)
+                self._wake.clear()  # Flags are checked again before the next wait
+            else:
+                time.sleep(0)  # Yield the GIL while spinning
+
+    def _run(self):
+        """Scheduler loop: deadlines are absolute, so lateness never accumulates"""
+        deadline = self.clock()
+        plan = []
+        while self._sleep_until(deadline):
+            with self._lock:
+                make_plan, self._preempt = self._preempt, None
+                state = self.state
+                remaining = max(self.phase_end - self.clock(), 0.0) if self.phase_end is not None else 0.0
+            if make_plan is not None:
+                preemption = list(make_plan(state, remaining))
+                if not preemption:
+                    continue
+                plan = preemption
+                deadline = self.clock()
+                self.preemptions += 1
+            if not plan:
+                plan = list(self.next_phases())
+                if not plan:
+                    break
+            state, duration = plan.pop(0)
+
+            lateness = self.clock() - deadline
+            with self._lock:
+                self.state = state
+                self.phase_end = deadline + duration
+                self.plan_left = sum(seconds for _, seconds in plan)
+                self.transitions += 1
+                self._lateness.append(lateness)
+            self.on_transition(state, duration)
+            deadline += duration
+
+    def time_remaining(self):
+        """Seconds left in the current phase (0 before the first one)"""
+        with self._lock:
+            if self.phase_end is None:
+                return 0.0
+            return max(self.phase_end - self.clock(), 0.0)
+
+    def time_until_decision(self):
+        """Seconds until the plan ends and next_phases() decides the next one"""
+        with self._lock:
+            if self.phase_end is None:
+                return 0.0
+            return max(self.phase_end - self.clock(), 0.0) + self.plan_left
+
+    def get_stats(self):
+        """Get transition lateness statistics (milliseconds)"""
+        with self._lock:
+            lateness = np.array(self._lateness) * 1000
+            transitions = self.transitions
+        if len(lateness) == 0:
+            return {'transitions': transitions, 'preemptions': self.preemptions}
+        return {
+            'transitions': transitions,
+            'preemptions': self.preemptions,
+            'mean_ms': round(float(lateness.mean()), 3),
+            'p95_ms': round(float(np.percentile(lateness, 95)), 3),
+            'max_ms': round(float(lateness.max()), 3)
+        }
@@ -0,0 +1,217 @@
+"""
+Emergency Vehicle Preemption
+Interrupts the signal cycle as soon as an emergency vehicle is reported, at
+any point of any phase: a GREEN is ended through YELLOW, a running YELLOW is
+completed, then the signal holds all-red until the vehicle has passed.
+Normal cycles resume afterwards.
+
+Triggers:
+    - the detector (EmergencyVehicleTrigger, for models with an emergency
+      vehicle class; fires in the frame the vehicle is confirmed)
+    - a local UDP datagram:  echo -n PREEMPT siren | nc -u -w0 127.0.0.1 47800
+    - a trigger file:        touch src/preempt.trigger
+
+The worst-case response time is what matters, so the time from each trigger
+to the first lamp command (response) and to all-red (clear) is recorded
+"""
+
+import os
+import select
+import socket
+import time
+from collections import deque
+from threading import Thread, Lock, Event
+
+import numpy as np
+
+from detection_consumers import DetectionConsumer
+from event_log import log_event
+
+PREEMPT_PORT = 47800
+PREEMPT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "preempt.trigger")
+
+
+class Preemption:
+    def __init__(self, scheduler, yellow_time=3, all_red_time=2, hold_time=15, on_preempt=None,
+                 clock=time.monotonic, history=1000):
+        """
+        scheduler: PhaseScheduler driving the lamps
+        yellow_time: YELLOW before all-red when a GREEN is interrupted (seconds)
+        all_red_time: clearance before the hold (seconds)
+        hold_time: all-red hold; a new trigger during it starts the hold again
+        on_preempt(): called on the scheduler thread when a preemption starts
+                      (e.g. to discard the interrupted cycle)
+        """
+        self.scheduler = scheduler
+        self.yellow_time = yellow_time
+        self.all_red_time = all_red_time
+        self.hold_time = hold_time
+        self.on_preempt = on_preempt
+        self.clock = clock
+
+        self._lock = Lock()
+        self._requested = None  # (source, trigger time) not yet planned
+        self._armed = None      # (source, trigger time) of the plan that just started
+        self._clearing = None   # (source, trigger time) waiting for all-red
+        self.count = 0
+        self.last_source = None
+        self.active_until = 0.0  # Clock time the current preemption's hold ends
+        self._response = deque(maxlen=history)
+        self._clear = deque(maxlen=history)
+
+    def trigger(self, source, triggered_at=None):
+        """
+        Request a preemption (callable from any thread, never blocks)
+        triggered_at: clock time the vehicle was detected/reported (default: now)
+        """
+        triggered_at = self.clock() if triggered_at is None else triggered_at
+        with self._lock:
+            # Triggers arriving before the scheduler acts keep the earliest time
+            if self._requested is None or triggered_at < self._requested[1]:
+                self._requested = (source, triggered_at)
+        self.scheduler.preempt(self.plan)
+
+    def plan(self, state, remaining):
+        """Safe phases from the current state to the all-red hold (scheduler thread)"""
+        with self._lock:
+            request, self._requested = self._requested, None
+            if request is None:
+                return []
+            self._armed = request
+            self._clearing = request
+            self.count += 1
+            self.last_source = request[0]
+        if self.on_preempt is not None:
+            self.on_preempt()
+
+        hold = self.all_red_time + self.hold_time
+        if state == "GREEN":
+            phases = [("YELLOW", self.yellow_time), ("RED", hold)]
+        elif state == "YELLOW":
+            phases = [("YELLOW", remaining), ("RED", hold)]
+        else:
+            phases = [("RED", self.hold_time)]  # Already all-red: just hold
+        self.active_until = self.clock() + sum(seconds for _, seconds in phases)
+        return phases
+
+    @property
+    def active(self):
+        """Whether a preemption is running"""
+        return self.clock() < self.active_until
+
+    def lamp_changed(self, state):
+        """Record latencies; call right after a lamp command is sent"""
+        now = self.clock()
+        with self._lock:
+            armed, self._armed = self._armed, None
+            clearing = self._clearing if state == "RED" else None
+            if clearing is not None:
+                self._clearing = None
+        if armed is not None:
+            response_ms = (now - armed[1]) * 1000
+            self._response.append(response_ms)
+            log_event('signal.preempted', source=armed[0], state=state,
+                      response_ms=round(response_ms, 2))
+        if clearing is not None:
+            self._clear.append((now - clearing[1]) * 1000)
+
+    def get_stats(self):
+        """Get preemption count and latency statistics (milliseconds)"""
+        stats = {'count': self.count, 'last_source': self.last_source}
+        for name, samples in (('response', self._response), ('clear', self._clear)):
+            values = np.array(samples)
+            if len(values):
+                stats[f'{name}_p95_ms'] = round(float(np.percentile(values, 95)), 2)
+                stats[f'{name}_max_ms'] = round(float(values.max()), 2)
+        return stats
+
+
+class EmergencyVehicleTrigger(DetectionConsumer):
+    def __init__(self, preemption, classes, min_frames=2, retrigger_interval=5.0,
+                 name='emergency', min_confidence=0.5):
+        """
+        Preempt when an emergency vehicle class is detected
+        classes: class IDs of emergency vehicles (COCO has none: needs a
+                 model trained with them)
+        min_frames: consecutive frames before triggering (filters single misdetections)
+        retrigger_interval: while still in view, trigger again this often
+                            (seconds) to extend the hold
+        """
+        super().__init__(name, classes, min_confidence)
+        self.preemption = preemption
+        self.min_frames = min_frames
+        self.retrigger_interval = retrigger_interval
+        self.frames_seen = 0
+        self.last_trigger = None
+
+    def process(self, boxes, confidences, class_ids, frame_shape):
+        self.frames_seen = self.frames_seen + 1 if len(boxes) else 0
+        now = self.preemption.clock()
+        if self.frames_seen >= self.min_frames and (
+                self.last_trigger is None or now - self.last_trigger >= self.retrigger_interval):
+            self.last_trigger = now
+            self.preemption.trigger('detector', now)
+        if not self.frames_seen:
+            self.last_trigger = None
+        return {'count': len(boxes), 'active': self.frames_seen >= self.min_frames}
+
+
+class PreemptionInputs:
+    def __init__(self, preemption, port=PREEMPT_PORT, trigger_file=PREEMPT_FILE, poll_interval=0.02):
+        """
+        External preemption inputs on a background thread
+        port: local UDP port for 'PREEMPT [source]' datagrams (None = off)
+        trigger_file: path whose appearance triggers a preemption (deleted
+                      once handled; None = off)
+        poll_interval: trigger file check interval; bounds its extra latency (seconds)
+        """
+        self.preemption = preemption
+        self.trigger_file = trigger_file
+        self.poll_interval = poll_interval
+        self._stop = Event()
+        if trigger_file is not None and os.path.exists(trigger_file):
+            os.remove(trigger_file)  # Left over from before this start
+
+        self.sock = None
+        if port is not None:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.sock.bind(('127.0.0.1', port))  # Local only
+            self.port = self.sock.getsockname()[1]
+        self._thread = Thread(target=self._run, daemon=True, name="preemption-inputs")
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(1.0)
+        if self.sock is not None:
+            self.sock.close()
+
+    def _run(self):
+        """Wait on the socket; check the trigger file between datagrams"""
+        while not self._stop.is_set():
+            if self.sock is not None:
+                readable, _, _ = select.select([self.sock], [], [], self.poll_interval)
+                if readable:
+                    self._read_datagram()
+            else:
+                self._stop.wait(self.poll_interval)
+            if self.trigger_file is not None and os.path.exists(self.trigger_file):
+                self.preemption.trigger('file')
+                try:
+                    os.remove(self.trigger_file)
+                except OSError:
+                    pass
+
+    def _read_datagram(self):
+        """Handle one 'PREEMPT [source]' datagram"""
+        received_at = self.preemption.clock()
+        try:
+            data = self.sock.recv(256)
+        except OSError:
+            return
+        words = data.decode('ascii', 'replace').split()
+        if words and words[0].upper() == 'PREEMPT':
+            self.preemption.trigger(words[1] if len(words) > 1 else 'socket', received_at)
@@ -0,0 +1,125 @@
+"""
+Sampling Profiler
+Periodically samples the Python stack of every thread in the live process
+(sys._current_frames) from a native background thread and aggregates them
+as collapsed stacks, the input format of flamegraph.pl / speedscope:
+
+    thread-name;outer_function (file.py:12);inner_function (file.py:40) 57
+
+Sampling costs a few microseconds per thread per sample and nothing between
+samples, so it can run in production. Under gevent, the hub thread's sample
+is whichever greenlet is running at that moment
+"""
+
+import _thread
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from cooperative import is_gevent_active
+
+DEFAULT_INTERVAL = 0.01  # 100 samples per second
+MAX_DEPTH = 128          # Deeper stacks are cut at the root end
+
+
+def _native_tools():
+    """Thread start and sleep functions that are never gevent greenlets"""
+    if is_gevent_active():
+        from gevent import monkey
+        return (monkey.get_original('_thread', 'start_new_thread'),
+                monkey.get_original('time', 'sleep'))
+    return _thread.start_new_thread, time.sleep
+
+
+def frame_label(frame):
+    """Label for one stack frame: function (file:first line)"""
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    def __init__(self, interval=DEFAULT_INTERVAL):
+        """interval: seconds between samples"""
+        self.interval = interval
+        self.stacks = Counter()  # collapsed stack -> sample count
+        self.samples = 0
+        self.started = None
+        self.duration = 0.0
+        self._running = False
+        self._finished = True  # Plain flag: a gevent Event cannot be set from a native thread
+        self._sampler_ident = None
+
+    def start(self):
+        """Start sampling on a native background thread"""
+        start_thread, self._sleep = _native_tools()
+        self._running = True
+        self._finished = False
+        self.started = time.monotonic()
+        start_thread(self._run, ())
+        return self
+
+    def stop(self):
+        """Stop sampling and wait for the sampler to finish"""
+        self._running = False
+        deadline = time.monotonic() + max(self.interval * 10, 1.0)
+        while not self._finished and time.monotonic() < deadline:
+            time.sleep(self.interval)
+        self.duration = time.monotonic() - self.started
+        return self
+
+    def _run(self):
+        """Sampler loop"""
+        self._sampler_ident = _thread.get_ident()
+        try:
+            next_sample = time.monotonic()
+            while self._running:
+                self.sample()
+                next_sample += self.interval
+                delay = next_sample - time.monotonic()
+                if delay > 0:
+                    self._sleep(delay)
+                else:
+                    next_sample = time.monotonic()  # Fell behind: do not burst
+        finally:
+            self._finished = True
+
+    def sample(self):
+        """Take one sample of every thread's stack (except the sampler's own)"""
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == self._sampler_ident:
+                continue
+            labels = []
+            while frame is not None and len(labels) < MAX_DEPTH:
+                labels.append(frame_label(frame))
+                frame = frame.f_back
+            labels.append(names.get(ident, f"thread-{ident}"))
+            self.stacks[";".join(reversed(labels))] += 1
+        self.samples += 1
+
+    def collapsed(self):
+        """Collapsed stacks, one 'frame;frame;... count' line each (most samples first)"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top_functions(self, limit=10):
+        """Functions that were on top of a stack most often: list of (label, samples)"""
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return leaves.most_common(limit)
+
+
+def profile(seconds, interval=DEFAULT_INTERVAL):
+    """
+    Profile the whole process for a number of seconds (the caller waits with
+    time.sleep, which only pauses its own greenlet under gevent)
+    Returns: the stopped SamplingProfiler
+    """
+    profiler = SamplingProfiler(interval).start()
+    try:
+        time.sleep(seconds)
+    finally:
+        profiler.stop()
+    return profiler
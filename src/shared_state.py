@@ -9,11 +9,18 @@ import time
 from threading import Lock
 from pathlib import Path
 
+from event_log import log_event
+
 class SharedStateManager:
-    def __init__(self, state_file="traffic_state.json"):
-        """Initialize shared state manager"""
+    def __init__(self, state_file="traffic_state.json", create=True):
+        """
+        Initialize shared state manager
+        create: write the default state if the file does not exist (readers
+                of other processes' state pass False)
+        """
         self.state_file = Path(__file__).parent / state_file
         self.lock = Lock()
+        self.update_lock = Lock()  # Serializes read-modify-write updates
         
         # Initialize default state
         self.default_state = {
@@ -28,38 +35,47 @@ class SharedStateManager:
         }
         
         # Create state file if it doesn't exist
-        if not self.state_file.exists():
+        if create and not self.state_file.exists():
             self._write_state(self.default_state)
     
-    def _read_state(self):
-        """Read state from file"""
+    def read_state(self):
+        """Read state from file; None if it cannot be read (no defaults)"""
         try:
             with self.lock:
                 with open(self.state_file, 'r') as f:
                     return json.load(f)
         except Exception as e:
-            print(f"Error reading state: {e}")
-            return self.default_state.copy()
+            log_event('state.read_failed', 'error', error=str(e))
+            return None
+    
+    def _read_state(self):
+        """Read state from file (the default state if it cannot be read)"""
+        state = self.read_state()
+        return state if state is not None else self.default_state.copy()
     
     def _write_state(self, state):
-        """Write state to file"""
+        """Write state to file (atomic replace: readers never see a partial file)"""
+        # Per process, since several processes may write one camera's state
+        temp_path = f"{self.state_file}.{os.getpid()}.tmp"
         try:
             with self.lock:
-                with open(self.state_file, 'w') as f:
+                with open(temp_path, 'w') as f:
                     json.dump(state, f, indent=2)
+                os.replace(temp_path, self.state_file)
         except Exception as e:
-            print(f"Error writing state: {e}")
+            log_event('state.write_failed', 'error', error=str(e))
     
     def get_state(self):
         """Get current state"""
         return self._read_state()
     
     def update_state(self, **kwargs):
-        """Update specific state fields"""
-        state = self._read_state()
-        state.update(kwargs)
-        state['last_update'] = time.time()
-        self._write_state(state)
+        """Update specific state fields (atomic with respect to other threads)"""
+        with self.update_lock:
+            state = self._read_state()
+            state.update(kwargs)
+            state['last_update'] = time.time()
+            self._write_state(state)
         return state
     
     def reset_state(self):
@@ -72,12 +88,15 @@ class SharedStateManager:
         age = time.time() - state.get('last_update', 0)
         return age > max_age_seconds
 
-# Singleton instance
-_state_manager = None
+def state_file_name(camera_id="main"):
+    """State file of a camera's main.py ('main' keeps the original name)"""
+    return "traffic_state.json" if camera_id == "main" else f"traffic_state_{camera_id}.json"
+
+# One instance per camera
+_state_managers = {}
 
-def get_state_manager():
-    """Get or create shared state manager instance"""
-    global _state_manager
-    if _state_manager is None:
-        _state_manager = SharedStateManager()
-    return _state_manager
+def get_state_manager(camera_id="main"):
+    """Get or create the shared state manager of a camera"""
+    if camera_id not in _state_managers:
+        _state_managers[camera_id] = SharedStateManager(state_file_name(camera_id))
+    return _state_managers[camera_id]
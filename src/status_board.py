@@ -0,0 +1,100 @@
+"""
+Status Board
+Per-camera status for wallboards and integrations that poll many cameras.
+The dashboard's sync thread builds every camera's status once per update
+tick and serializes it to JSON bytes right there; requests only hand out
+those bytes. A tick publishes all bodies with one reference swap, so
+readers never take a lock (and never wait on the frame generator or the
+sync thread) and never see a half-updated set of cameras
+"""
+
+import json
+import time
+
+from shared_state import SharedStateManager, state_file_name
+
+# A camera whose state file is older than this is not running (seconds)
+MAX_AGE = 3.0
+
+# Fields of each camera in the /api/cameras list (the full state is in its status)
+SUMMARY_FIELDS = ('signal_state', 'vehicle_count', 'density', 'time_remaining', 'synced')
+
+
+def encode(data):
+    """Compact JSON bytes"""
+    return json.dumps(data, separators=(',', ':')).encode()
+
+
+class StatusBoard:
+    def __init__(self, cameras, max_age=MAX_AGE):
+        """
+        cameras: camera IDs in display order (one main.py and state file each)
+        max_age: state older than this is reported with synced=False (seconds)
+        """
+        self.cameras = list(cameras)
+        self.max_age = max_age
+        self.ticks = 0
+        # Read-only: a camera that never ran gets no state file
+        self._managers = {camera: SharedStateManager(state_file_name(camera), create=False)
+                          for camera in self.cameras}
+        self._last_states = {}  # camera -> last state read successfully
+        # (camera -> status body, list body): replaced as a whole, never mutated
+        self._bodies = ({}, encode({'cameras': [], 'updated': None}))
+
+    def read_states(self, overrides=None):
+        """
+        Read each camera's state file
+        overrides: camera -> state to use instead of its file (e.g. the
+                   dashboard's own state for 'main' in standalone mode)
+        Returns: camera -> state dictionary (with 'synced'); a camera whose
+                 file cannot be read keeps its last state instead of defaults
+        """
+        overrides = overrides or {}
+        now = time.time()
+        states = {}
+        for camera in self.cameras:
+            if camera in overrides:
+                states[camera] = overrides[camera]
+                continue
+            manager = self._managers[camera]
+            if not manager.state_file.exists():
+                states[camera] = {'synced': False}
+                continue
+            state = manager.read_state()
+            if state is None:
+                state = dict(self._last_states.get(camera, {}))
+            else:
+                self._last_states[camera] = state
+            state['synced'] = now - state.get('last_update', 0) <= self.max_age
+            states[camera] = state
+        return states
+
+    def publish(self, states):
+        """
+        Serialize one tick's states and make them current
+        states: camera -> state dictionary
+        """
+        now = time.time()
+        bodies = {}
+        summaries = []
+        for camera in self.cameras:
+            state = dict(states.get(camera, {}), camera=camera)
+            bodies[camera] = encode(state)
+            summary = {field: state.get(field) for field in SUMMARY_FIELDS}
+            summary['camera'] = camera
+            summary['status_url'] = f"/api/cameras/{camera}/status"
+            summaries.append(summary)
+        self._bodies = (bodies, encode({'cameras': summaries, 'updated': now}))
+        self.ticks += 1
+
+    def refresh(self, overrides=None):
+        """Read and publish every camera's state (one update tick)"""
+        self.publish(self.read_states(overrides))
+
+    def cameras_body(self):
+        """JSON bytes of the camera list"""
+        return self._bodies[1]
+
+    def status_body(self, camera):
+        """JSON bytes of one camera's status, or None for an unknown camera"""
+        return self._bodies[0].get(camera)
@@ -0,0 +1,118 @@
+"""
+Local Network Camera Stand-in
+Serves a looped video file (or synthetic frames) as an MJPEG stream over HTTP
+so NetworkCamera can be tested without a real RTSP camera
+"""
+
+import time
+from threading import Thread, Event
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import cv2
+import numpy as np
+
+
+class LoopedStreamServer:
+    def __init__(self, video_path=None, fps=25, size=(320, 240), port=0):
+        """
+        Create a local stream server
+        video_path: file to loop (synthetic frames are used if None or missing)
+        port: TCP port (0 picks a free port)
+        """
+        self.video_path = video_path
+        self.fps = fps
+        self.size = size
+        self.port = port
+        self.frames_sent = 0
+        self._server = None
+        self._thread = None
+        self._stopped = Event()
+
+    @property
+    def url(self):
+        """Stream URL for NetworkCamera"""
+        return f"http://127.0.0.1:{self.port}/stream.mjpg"
+
+    def _frames(self):
+        """Yield frames forever, looping the video file"""
+        capture = cv2.VideoCapture(self.video_path) if self.video_path else None
+        if capture is not None and not capture.isOpened():
+            capture = None
+
+        index = 0
+        while True:
+            if capture is not None:
+                ret, frame = capture.read()
+                if not ret:
+                    capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    continue
+            else:
+                # Synthetic frame: moving block with the frame number drawn on it
+                width, height = self.size
+                frame = np.zeros((height, width, 3), dtype=np.uint8)
+                x = (index * 4) % max(width - 40, 1)
+                cv2.rectangle(frame, (x, height // 2 - 20), (x + 40, height // 2 + 20),
+                              (0, 255, 0), -1)
+                cv2.putText(frame, str(index), (10, 30),
+                            cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+            index += 1
+            yield frame
+
+    def _make_handler(self):
+        """Build the request handler bound to this server"""
+        server = self
+
+        class StreamHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.send_response(200)
+                self.send_header('Content-Type', 'multipart/x-mixed-replace; boundary=frame')
+                self.end_headers()
+                interval = 1.0 / server.fps
+                try:
+                    for frame in server._frames():
+                        if server._stopped.is_set():
+                            break
+                        ret, buffer = cv2.imencode('.jpg', frame)
+                        data = buffer.tobytes()
+                        self.wfile.write(b'--frame\r\nContent-Type: image/jpeg\r\n'
+                                         + f'Content-Length: {len(data)}\r\n\r\n'.encode()
+                                         + data + b'\r\n')
+                        server.frames_sent += 1
+                        time.sleep(interval)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        return StreamHandler
+
+    def start(self):
+        """Start serving in a background thread"""
+        self._stopped.clear()
+        self._server = ThreadingHTTPServer(('127.0.0.1', self.port), self._make_handler())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving (open streams are cut, simulating a camera outage)"""
+        self._stopped.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+# Serve a local stream for manual testing
+if __name__ == "__main__":
+    server = LoopedStreamServer("../videos/traffic_video.mp4", port=8554).start()
+    print(f"✓ Serving stand-in stream at {server.url}")
+    print("Press Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,345 @@
+"""
+Edge Telemetry
+Streams each intersection's state to a central aggregator as compact binary
+records: 26 bytes per record (vs ~225 bytes as JSON), batched behind
+one 52-byte header per datagram or TCP frame.
+
+    publisher = TelemetryPublisher("tcp://ops-center:47900", "host-1/main",
+                                   spool_path=spool_path("main"))
+    publisher.record(signal_state="GREEN", vehicle_count=12, density="MEDIUM", ...)
+
+Records are sent from a background thread, so recording never blocks the
+frame loop. While the aggregator is unreachable, batches go to a disk spool;
+once it is back, the spool is replayed oldest first and new batches queue
+behind it, so the aggregator always receives a node's records in order.
+
+TCP detects outages, so nothing queued or spooled during one is lost; UDP is
+lighter but only notices a missing aggregator when the host reports the port
+unreachable. There are no acknowledgements: a batch counts as sent once the
+kernel accepts it, so batches still in flight (in the socket buffers or on
+the wire) when a connection breaks are lost, about a send buffer's worth.
+The aggregator reports such gaps as 'lost' by sequence number
+"""
+
+import queue
+import socket
+import struct
+import time
+from pathlib import Path
+from threading import Thread, Event
+from urllib.parse import urlparse
+
+import numpy as np
+
+from event_log import log_event
+
+TELEMETRY_PORT = 47900
+
+# One intersection state sample (little-endian, no padding)
+RECORD_DTYPE = np.dtype([
+    ('timestamp', '<f8'),       # time.time() of the sample
+    ('cycle_count', '<u4'),
+    ('vehicle_count', '<u2'),
+    ('signal', 'u1'),           # index into SIGNAL_STATES
+    ('density', 'u1'),          # index into DENSITY_LEVELS
+    ('demand', '<f4'),          # passenger car units
+    ('time_remaining', '<f4'),  # seconds left in the current phase
+    ('flags', 'u1'),            # FLAG_* bits
+    ('shed_level', 'u1'),       # load shedding level
+])
+
+SIGNAL_STATES = ["RED", "YELLOW", "GREEN"]
+DENSITY_LEVELS = ["LOW", "MEDIUM", "HIGH"]
+FLAG_PREEMPTED = 1  # Emergency vehicle preemption running
+FLAG_MOTION = 2     # Counted by the motion tier (YOLO over budget)
+
+# Batch header: magic, version, record size, node ID, session (the
+# publisher's start time), sequence number of the first record, record count
+HEADER = struct.Struct('<4sBB32sdIH')
+MAGIC = b'TRTM'
+VERSION = 1
+
+# Records per batch that keep a UDP datagram under a typical MTU
+MAX_UDP_RECORDS = (1400 - HEADER.size) // RECORD_DTYPE.itemsize
+
+
+def encode_batch(node, session, first_seq, records):
+    """Header + records as bytes"""
+    return HEADER.pack(MAGIC, VERSION, RECORD_DTYPE.itemsize, node.encode()[:32], session,
+                       first_seq, len(records)) + records.tobytes()
+
+
+def batch_size(header):
+    """Total bytes of the batch starting with this header (ValueError if it is not one)"""
+    magic, version, record_size, _, _, _, count = HEADER.unpack_from(header)
+    if magic != MAGIC or version != VERSION or record_size != RECORD_DTYPE.itemsize:
+        raise ValueError("not a telemetry batch")
+    return HEADER.size + count * RECORD_DTYPE.itemsize
+
+
+def decode_batch(data):
+    """
+    Parse one batch
+    Returns: (node, session, first_seq, records array)
+    """
+    if len(data) < HEADER.size or len(data) != batch_size(data):
+        raise ValueError("truncated telemetry batch")
+    _, _, _, node, session, first_seq, count = HEADER.unpack_from(data)
+    records = np.frombuffer(data, RECORD_DTYPE, count, offset=HEADER.size)
+    return node.rstrip(b'\0').decode(errors='replace'), session, first_seq, records
+
+
+def spool_path(camera_id):
+    """Default spool file of a camera"""
+    return Path(__file__).parent / f"telemetry_spool_{camera_id}.bin"
+
+
+class TelemetrySpool:
+    def __init__(self, path, max_bytes=64 << 20):
+        """
+        Append-only file of unsent batches, replayed from the head
+        max_bytes: batches beyond this are dropped (the oldest are kept)
+        The replay position survives restarts in '<path>.offset'
+        """
+        self.path = Path(path)
+        self.offset_path = self.path.with_name(self.path.name + '.offset')
+        self.max_bytes = max_bytes
+        self.size = self.path.stat().st_size if self.path.exists() else 0
+        self.head = 0
+        if self.size and self.offset_path.exists():
+            try:
+                self.head = int(self.offset_path.read_text())
+            except ValueError:
+                pass
+        if not 0 <= self.head <= self.size:
+            self.head = 0
+
+    @property
+    def pending_bytes(self):
+        return self.size - self.head
+
+    def append(self, data):
+        """Add a batch at the tail; False if the spool is full"""
+        if self.pending_bytes + len(data) > self.max_bytes:
+            return False
+        with open(self.path, 'ab') as f:
+            f.write(data)
+        self.size += len(data)
+        return True
+
+    def peek(self):
+        """Oldest unsent batch, or None"""
+        if not self.pending_bytes:
+            return None
+        with open(self.path, 'rb') as f:
+            f.seek(self.head)
+            header = f.read(HEADER.size)
+            try:
+                data = header + f.read(batch_size(header) - HEADER.size)
+            except (ValueError, struct.error):
+                data = b''
+        if len(data) < HEADER.size or len(data) != batch_size(data):
+            # Torn write (crash while appending): nothing after it can be trusted
+            log_event('telemetry.spool_corrupt', 'warning', path=str(self.path), offset=self.head,
+                      discarded=self.pending_bytes)
+            self.clear()
+            return None
+        return data
+
+    def advance(self, nbytes):
+        """Mark the head batch as sent"""
+        self.head += nbytes
+        if self.head >= self.size:
+            self.clear()
+        else:
+            self.offset_path.write_text(str(self.head))
+
+    def clear(self):
+        for path in (self.path, self.offset_path):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+        self.size = self.head = 0
+
+
+class TelemetryPublisher:
+    def __init__(self, url, node, spool_path=None, batch_size=10, flush_interval=5.0,
+                 retry_interval=5.0, queue_size=10000, max_spool_bytes=64 << 20):
+        """
+        url: aggregator address, 'tcp://host:port' or 'udp://host:port'
+        node: this intersection's ID at the aggregator (up to 32 bytes)
+        spool_path: file for batches that could not be sent (None = drop them)
+        batch_size / flush_interval: send when this many records are queued
+                                     or this many seconds have passed
+        retry_interval: seconds between reconnect attempts during an outage
+        queue_size: records buffered before new ones are dropped
+        """
+        parsed = urlparse(url)
+        if parsed.scheme not in ('tcp', 'udp') or not parsed.hostname:
+            raise ValueError(f"Telemetry URL must be tcp://host:port or udp://host:port, got {url!r}")
+        self.url = url
+        self.protocol = parsed.scheme
+        self.address = (parsed.hostname, parsed.port or TELEMETRY_PORT)
+        self.node = node
+        self.session = time.time()  # Tells the aggregator this run's sequence numbers apart
+        self.batch_size = min(batch_size, MAX_UDP_RECORDS) if self.protocol == 'udp' else batch_size
+        self.flush_interval = flush_interval
+        self.retry_interval = retry_interval
+        self.spool = TelemetrySpool(spool_path, max_spool_bytes) if spool_path is not None else None
+        self.queue = queue.Queue(maxsize=queue_size)
+
+        self.seq = 0
+        self.records_sent = 0
+        self.batches_sent = 0
+        self.records_dropped = 0
+        self.connected = False
+        self._sock = None
+        self._last_attempt = 0.0
+
+        self._stop = Event()
+        self._thread = Thread(target=self._sender_loop, daemon=True, name="telemetry-sender")
+        self._thread.start()
+
+    # ------------------------------------------------------------------
+    # Recording (called from the hot path: never blocks)
+    # ------------------------------------------------------------------
+
+    def record(self, signal_state, vehicle_count, density, demand=0.0, time_remaining=0.0,
+               cycle_count=0, preempted=False, motion_tier=False, shed_level=0, timestamp=None):
+        """Queue one state sample, dropping it if the sender has fallen behind"""
+        flags = (FLAG_PREEMPTED if preempted else 0) | (FLAG_MOTION if motion_tier else 0)
+        record = (timestamp or time.time(), cycle_count, min(vehicle_count, 0xFFFF),
+                  SIGNAL_STATES.index(signal_state) if signal_state in SIGNAL_STATES else 0,
+                  DENSITY_LEVELS.index(density) if density in DENSITY_LEVELS else 0,
+                  demand, time_remaining, flags, shed_level)
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.records_dropped += 1
+
+    # ------------------------------------------------------------------
+    # Sender thread
+    # ------------------------------------------------------------------
+
+    def _sender_loop(self):
+        """Collect records into batches; send them, or spool them during outages"""
+        while not (self._stop.is_set() and self.queue.empty()):
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or (self._stop.is_set() and self.queue.empty()):
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=min(remaining, 0.1)))
+                except queue.Empty:
+                    continue
+
+            self._replay()
+            if batch:
+                records = np.array(batch, dtype=RECORD_DTYPE)
+                data = encode_batch(self.node, self.session, self.seq, records)
+                self.seq += len(records)
+                self._deliver(data, len(records))
+                for _ in batch:
+                    self.queue.task_done()
+        self._close_socket()
+
+    def _deliver(self, data, count):
+        """Send a new batch; behind any spooled ones, so order is kept"""
+        if self.spool is not None and self.spool.pending_bytes:
+            self._to_spool(data, count)
+            self._replay()
+        elif self._send(data):
+            self.records_sent += count
+        elif self.spool is not None:
+            self._to_spool(data, count)
+        else:
+            self.records_dropped += count
+
+    def _to_spool(self, data, count):
+        if not self.spool.append(data):
+            self.records_dropped += count
+
+    def _replay(self):
+        """Send spooled batches, oldest first, until one fails"""
+        while self.spool is not None:
+            data = self.spool.peek()
+            if data is None or not self._send(data):
+                return
+            self.spool.advance(len(data))
+            self.records_sent += (len(data) - HEADER.size) // RECORD_DTYPE.itemsize
+
+    def _send(self, data):
+        """
+        Send one batch; False if the aggregator is unreachable
+        True means the kernel accepted it, not that the aggregator received it
+        """
+        if self._sock is None:
+            if self._last_attempt and time.monotonic() - self._last_attempt < self.retry_interval:
+                return False
+            self._last_attempt = time.monotonic()
+            try:
+                if self.protocol == 'tcp':
+                    self._sock = socket.create_connection(self.address, timeout=5)
+                else:
+                    self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                    self._sock.connect(self.address)  # Unreachable ports then raise on send
+            except OSError as e:
+                self._set_connected(False, e)
+                return False
+        try:
+            if self.protocol == 'tcp':
+                self._sock.sendall(data)
+            else:
+                self._sock.send(data)
+        except OSError as e:
+            self._close_socket()
+            self._last_attempt = time.monotonic()
+            self._set_connected(False, e)
+            return False
+        self.batches_sent += 1
+        self._set_connected(True)
+        return True
+
+    def _set_connected(self, connected, error=None):
+        """Log outages and recoveries once, not per batch"""
+        if connected != self.connected:
+            if connected:
+                log_event('telemetry.connected', url=self.url)
+            else:
+                log_event('telemetry.unreachable', 'warning', url=self.url, error=str(error),
+                          spooling=self.spool is not None)
+        self.connected = connected
+
+    def _close_socket(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    # ------------------------------------------------------------------
+
+    def flush(self, timeout=10.0):
+        """Wait until every queued record has been sent or spooled"""
+        deadline = time.monotonic() + timeout
+        while self.queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return self.queue.unfinished_tasks == 0
+
+    def get_stats(self):
+        """Get publisher statistics ('sent' = handed to the kernel, not acknowledged)"""
+        return {
+            'url': self.url,
+            'connected': self.connected,
+            'queued': self.queue.qsize(),
+            'sent': self.records_sent,
+            'batches': self.batches_sent,
+            'dropped': self.records_dropped,
+            'spooled_bytes': self.spool.pending_bytes if self.spool is not None else 0
+        }
+
+    def close(self):
+        """Send (or spool) everything still queued and stop the sender thread"""
+        self._stop.set()
+        self._thread.join(timeout=30)
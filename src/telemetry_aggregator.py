@@ -0,0 +1,309 @@
+"""
+Telemetry Aggregator
+Central ingest for the intersections' TelemetryPublisher batches (UDP
+datagrams and TCP streams on one port). One thread multiplexes every socket;
+each batch is parsed with a single numpy view, so thousands of
+intersections per second fit in one process.
+
+Per node it keeps the latest state and checks sequence numbers: batches
+replayed after an outage that were already received are dropped, and
+records that never arrived are counted as lost.
+
+Also the local stand-in for testing without an operations center:
+    python src/telemetry_aggregator.py                   # listen on :47900
+    python src/telemetry_aggregator.py --simulate 2000   # plus 2000 synthetic intersections
+and set TELEMETRY_URL = "tcp://127.0.0.1:47900" in main.py
+"""
+
+import argparse
+import selectors
+import socket
+import time
+from threading import Thread, Event
+
+import numpy as np
+
+from telemetry import (RECORD_DTYPE, HEADER, TELEMETRY_PORT, SIGNAL_STATES, DENSITY_LEVELS,
+                       FLAG_PREEMPTED, MAX_UDP_RECORDS, batch_size, decode_batch, encode_batch)
+
+# Nodes without a record for this long are offline (seconds)
+OFFLINE_AFTER = 30.0
+
+
+class NodeTracker:
+    __slots__ = ('index', 'session', 'next_seq', 'records', 'duplicates', 'lost')
+
+    def __init__(self, index, session):
+        self.index = index       # Row of the node in TelemetryAggregator.latest
+        self.session = session
+        self.next_seq = 0
+        self.records = 0
+        self.duplicates = 0
+        self.lost = 0
+
+
+class TelemetryAggregator:
+    def __init__(self, host='127.0.0.1', port=TELEMETRY_PORT, capacity=1024):
+        """
+        host / port: where publishers send (UDP and TCP; port 0 picks a free one)
+        capacity: initial number of node rows (grows as needed)
+        """
+        self.nodes = {}  # node ID -> NodeTracker
+        self.latest = np.zeros(capacity, dtype=RECORD_DTYPE)  # Latest record per node
+        self.batches = 0
+        self.records = 0
+        self.invalid = 0
+        self.started = time.time()
+
+        self._selector = selectors.DefaultSelector()
+        self._udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._udp.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 << 20)  # Absorb bursts
+        self._udp.bind((host, port))
+        self.port = self._udp.getsockname()[1]
+        self._tcp = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._tcp.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._tcp.bind((host, self.port))
+        self._tcp.listen(128)
+        for sock in (self._udp, self._tcp):
+            sock.setblocking(False)
+        self._selector.register(self._udp, selectors.EVENT_READ)
+        self._selector.register(self._tcp, selectors.EVENT_READ)
+        self._buffers = {}  # TCP connection -> unparsed bytes
+        self._stop = Event()
+        self._thread = Thread(target=self._run, daemon=True, name="telemetry-aggregator")
+
+    # ------------------------------------------------------------------
+    # Ingest
+    # ------------------------------------------------------------------
+
+    def ingest(self, data):
+        """Apply one batch; False if it is not a valid batch"""
+        try:
+            node, session, first_seq, records = decode_batch(data)
+        except ValueError:
+            self.invalid += 1
+            return False
+        self.batches += 1
+
+        tracker = self.nodes.get(node)
+        if tracker is None:
+            if len(self.nodes) == len(self.latest):
+                self.latest = np.concatenate([self.latest, np.zeros_like(self.latest)])
+            tracker = self.nodes[node] = NodeTracker(len(self.nodes), session)
+        if session != tracker.session:
+            if session < tracker.session:
+                tracker.duplicates += len(records)  # Spool of an earlier run, superseded
+                return True
+            # The publisher restarted: its sequence numbers start over
+            tracker.session = session
+            tracker.next_seq = 0
+
+        end = first_seq + len(records)
+        skip = tracker.next_seq - first_seq
+        if skip >= len(records):
+            tracker.duplicates += len(records)  # Replayed, already received
+            return True
+        if skip > 0:
+            tracker.duplicates += skip
+            records = records[skip:]
+        elif skip < 0:
+            tracker.lost += -skip  # Records that never arrived (e.g. UDP during an outage)
+        tracker.next_seq = end
+        tracker.records += len(records)
+        self.records += len(records)
+        self.latest[tracker.index] = records[-1]
+        return True
+
+    # ------------------------------------------------------------------
+    # Network thread
+    # ------------------------------------------------------------------
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=5)
+        for sock in list(self._buffers) + [self._udp, self._tcp]:
+            sock.close()
+        self._selector.close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            for key, _ in self._selector.select(timeout=0.2):
+                sock = key.fileobj
+                if sock is self._udp:
+                    self._read_datagrams()
+                elif sock is self._tcp:
+                    self._accept()
+                else:
+                    self._read_stream(sock)
+
+    def _read_datagrams(self):
+        """Drain every queued datagram (one batch each)"""
+        while True:
+            try:
+                data = self._udp.recv(65536)
+            except OSError:  # Includes BlockingIOError: nothing left to read
+                return
+            self.ingest(data)
+
+    def _accept(self):
+        try:
+            connection, _ = self._tcp.accept()
+        except OSError:
+            return
+        connection.setblocking(False)
+        self._buffers[connection] = b''
+        self._selector.register(connection, selectors.EVENT_READ)
+
+    def _read_stream(self, connection):
+        """Split a TCP stream into batches (each is sized by its header)"""
+        try:
+            data = connection.recv(1 << 16)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b''
+        if not data:
+            self._drop(connection)
+            return
+        buffer = self._buffers[connection] + data
+        offset = 0
+        while len(buffer) - offset >= HEADER.size:
+            try:
+                size = batch_size(buffer[offset:offset + HEADER.size])
+            except ValueError:
+                self.invalid += 1
+                self._drop(connection)  # Lost framing: the publisher reconnects
+                return
+            if len(buffer) - offset < size:
+                break
+            self.ingest(buffer[offset:offset + size])
+            offset += size
+        self._buffers[connection] = buffer[offset:]
+
+    def _drop(self, connection):
+        self._selector.unregister(connection)
+        del self._buffers[connection]
+        connection.close()
+
+    # ------------------------------------------------------------------
+
+    def get_node(self, node):
+        """Latest state of one intersection, or None"""
+        tracker = self.nodes.get(node)
+        if tracker is None:
+            return None
+        record = self.latest[tracker.index]
+        return {
+            'node': node,
+            'timestamp': float(record['timestamp']),
+            'signal_state': SIGNAL_STATES[min(record['signal'], len(SIGNAL_STATES) - 1)],
+            'vehicle_count': int(record['vehicle_count']),
+            'density': DENSITY_LEVELS[min(record['density'], len(DENSITY_LEVELS) - 1)],
+            'demand_pcu': round(float(record['demand']), 1),
+            'time_remaining': round(float(record['time_remaining']), 1),
+            'cycle_count': int(record['cycle_count']),
+            'preempted': bool(record['flags'] & FLAG_PREEMPTED),
+            'shed_level': int(record['shed_level']),
+            'records': tracker.records,
+            'duplicates': tracker.duplicates,
+            'lost': tracker.lost
+        }
+
+    def get_summary(self, now=None):
+        """Network-wide view: online nodes by signal state and density"""
+        now = time.time() if now is None else now
+        latest = self.latest[:len(self.nodes)]
+        online = latest[now - latest['timestamp'] <= OFFLINE_AFTER]
+        signals = np.bincount(online['signal'], minlength=len(SIGNAL_STATES))
+        densities = np.bincount(online['density'], minlength=len(DENSITY_LEVELS))
+        elapsed = max(now - self.started, 1e-9)
+        return {
+            'nodes': len(self.nodes),
+            'online': len(online),
+            'signal_states': dict(zip(SIGNAL_STATES, signals[:len(SIGNAL_STATES)].tolist())),
+            'density': dict(zip(DENSITY_LEVELS, densities[:len(DENSITY_LEVELS)].tolist())),
+            'preempted': int(np.count_nonzero(online['flags'] & FLAG_PREEMPTED)),
+            'vehicles': int(online['vehicle_count'].sum()),
+            'records': self.records,
+            'batches': self.batches,
+            'records_per_second': round(self.records / elapsed, 1),
+            'duplicates': sum(tracker.duplicates for tracker in self.nodes.values()),
+            'lost': sum(tracker.lost for tracker in self.nodes.values()),
+            'invalid': self.invalid
+        }
+
+
+def synthetic_batches(nodes, records_per_batch=5, seed=0):
+    """
+    One batch per synthetic intersection (repeat for the next round)
+    Yields: (node index, batch bytes) forever, with sequence numbers advancing
+    """
+    rng = np.random.default_rng(seed)
+    session = time.time()
+    seq = 0
+    while True:
+        for index in range(nodes):
+            records = np.zeros(records_per_batch, dtype=RECORD_DTYPE)
+            records['timestamp'] = time.time()
+            records['signal'] = rng.integers(0, len(SIGNAL_STATES))
+            records['vehicle_count'] = rng.integers(0, 30, records_per_batch)
+            records['density'] = np.minimum(records['vehicle_count'] // 10, 2)
+            records['demand'] = records['vehicle_count'] * 1.2
+            yield index, encode_batch(f"sim-{index:05d}", session, seq, records)
+        seq += records_per_batch
+
+
+def simulate(address, nodes, interval=1.0, records_per_batch=5, stop=None):
+    """
+    Send every synthetic intersection's batch over UDP once per interval
+    (the rate `nodes` real publishers with this batch size would produce)
+    """
+    stop = stop or Event()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    batches = synthetic_batches(nodes, min(records_per_batch, MAX_UDP_RECORDS))
+    while not stop.is_set():
+        start = time.monotonic()
+        for _ in range(nodes):
+            _, data = next(batches)
+            try:
+                sock.sendto(data, address)
+            except OSError:
+                pass
+        stop.wait(max(interval - (time.monotonic() - start), 0))
+    sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Central telemetry aggregator (also a local stand-in)")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on (0.0.0.0 for the network)")
+    parser.add_argument('--port', type=int, default=TELEMETRY_PORT)
+    parser.add_argument('--simulate', type=int, default=0, metavar='N',
+                        help="also run N synthetic intersections sending over UDP")
+    parser.add_argument('--interval', type=float, default=5.0, help="seconds between summaries")
+    args = parser.parse_args()
+
+    aggregator = TelemetryAggregator(args.host, args.port).start()
+    print(f"✓ Aggregating telemetry on tcp/udp://{args.host}:{aggregator.port}")
+    if args.simulate:
+        Thread(target=simulate, args=(('127.0.0.1', aggregator.port), args.simulate),
+               daemon=True).start()
+        print(f"✓ Simulating {args.simulate} intersections")
+    print("Press Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(args.interval)
+            summary = aggregator.get_summary()
+            print(f"{summary['online']}/{summary['nodes']} online, "
+                  f"{summary['records_per_second']} records/s, signals {summary['signal_states']}, "
+                  f"density {summary['density']}, lost {summary['lost']}, duplicates {summary['duplicates']}")
+    except KeyboardInterrupt:
+        aggregator.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -275,6 +275,1683 @@ def test_project_structure():
     
     return all_ok
 
+def test_network_camera():
+    """Test network camera reconnect and freshness against a local stand-in stream"""
+    print_section("TEST 10: Network Camera")
+    
+    try:
+        from network_camera import NetworkCamera
+        from stream_standin import LoopedStreamServer
+        
+        server = LoopedStreamServer(fps=25).start()
+        camera = NetworkCamera(server.url, max_staleness=0.5,
+                               read_timeout=2.0, backoff_initial=0.2, backoff_max=1.0)
+        
+        try:
+            ret, frame = camera.read()
+            if not ret:
+                print("✗ No frame received from stand-in stream")
+                return False
+            print(f"✓ Receiving frames ({frame.shape[1]}x{frame.shape[0]})")
+            
+            # A slow consumer must still get a fresh frame, not a backlog
+            time.sleep(1.0)
+            ret, frame = camera.read()
+            age = camera.get_health()['frame_age']
+            if not ret or age > camera.max_staleness:
+                print(f"✗ Stale frame after slow read (age {age}s)")
+                return False
+            print(f"✓ Newest frame served after slow read (age {age:.3f}s)")
+            
+            # Simulate an outage and check that the camera reconnects
+            server.stop()
+            time.sleep(0.5)
+            server.start()
+            deadline = time.time() + 10
+            ret = False
+            while time.time() < deadline and not ret:
+                ret, frame = camera.read(timeout=0.5)
+            
+            health = camera.get_health()
+            if not ret or health['reconnects'] < 1:
+                print(f"✗ Did not recover from outage: {health}")
+                return False
+            print(f"✓ Reconnected after outage ({health['reconnects']} reconnects)")
+            print(f"  Frames received: {health['frames_received']}, "
+                  f"skipped: {health['frames_skipped']}")
+            return True
+        finally:
+            camera.release()
+            server.stop()
+    except Exception as e:
+        print(f"✗ Network camera test failed: {e}")
+        return False
+
+def test_benchmark_suite():
+    """Test the benchmark runner and regression check"""
+    print_section("TEST 11: Benchmark Suite")
+    
+    try:
+        from benchmark import run_benchmarks, compare_results, host_differences, host_info
+        
+        results = run_benchmarks(['shared_state'], quick=True)
+        if 'shared_state.update_ops_per_sec' not in results:
+            print("✗ Shared state benchmark produced no result")
+            return False
+        print("✓ Shared state benchmark ran")
+        
+        # A baseline twice as fast must be flagged, an equal one must not
+        faster = {k: dict(v, value=v['value'] * 2 if v['higher_is_better'] else v['value'] / 2)
+                  for k, v in results.items()}
+        if not compare_results(results, faster, threshold=0.2):
+            print("✗ Regression was not detected")
+            return False
+        if compare_results(results, results, threshold=0.2):
+            print("✗ Identical results reported as regression")
+            return False
+        print("✓ Regression check flags slowdowns beyond threshold")
+        
+        # Informational metrics (sizes, references) and other hosts' baselines are not compared
+        info = {'x.bytes': {'value': 100.0, 'unit': 'B', 'higher_is_better': None}}
+        if compare_results(info, {'x.bytes': dict(info['x.bytes'], value=10.0)}):
+            print("✗ Informational metric reported as regression")
+            return False
+        host = host_info()
+        if host_differences(host, host) or not host_differences(dict(host, cpu_count=-1), host):
+            print("✗ Baseline host check is wrong")
+            return False
+        print("✓ Informational metrics and other hosts' baselines are not compared")
+        return True
+    except Exception as e:
+        print(f"✗ Benchmark suite test failed: {e}")
+        return False
+
+def test_frame_broadcaster():
+    """Test that all viewers share one produced frame"""
+    print_section("TEST 12: Frame Broadcaster")
+    
+    try:
+        import numpy as np
+        from frame_broadcaster import FrameBroadcaster
+        
+        produced = []
+        def produce_frame():
+            produced.append(1)
+            return np.full((120, 160, 3), len(produced) % 255, dtype=np.uint8)
+        
+        broadcaster = FrameBroadcaster(produce_frame, fps=50)
+        viewers = [broadcaster.stream() for _ in range(5)]
+        chunks = [next(v) for v in viewers]
+        time.sleep(0.3)
+        
+        if len(set(chunks)) > 2:
+            print("✗ Viewers received different frames")
+            return False
+        print(f"✓ {len(viewers)} viewers served from shared frames")
+        
+        # Production rate is bounded by fps, not by the number of viewers
+        if len(produced) > 0.3 * 50 + 5:
+            print(f"✗ Produced {len(produced)} frames in 0.3s for {len(viewers)} viewers")
+            return False
+        print(f"✓ Produced {len(produced)} frames in 0.3s (one decode per frame)")
+        
+        for v in viewers:
+            v.close()
+        if broadcaster.viewers != 0:
+            print("✗ Viewer count not released on disconnect")
+            return False
+        print("✓ Viewer count released on disconnect")
+        
+        # Viewers of one variant share a single encode per frame
+        small = [broadcaster.stream(width=80, quality=50, fps=10) for _ in range(4)]
+        for v in small:
+            next(v)
+        for _ in range(3):
+            for v in small:
+                next(v)
+        stats = {(v['width'], v['quality']): v for v in broadcaster.get_stats()['variants']}
+        small_stats = stats.get((160, 50))
+        if small_stats is None or small_stats['frames_encoded'] > broadcaster.frames_produced:
+            print(f"✗ Variant encoded more than once per frame: {stats}")
+            return False
+        print(f"✓ Small variant: {small_stats['frames_encoded']} encodes for "
+              f"{len(small)} viewers x 4 frames")
+        for v in small:
+            v.close()
+        return True
+    except Exception as e:
+        print(f"✗ Frame broadcaster test failed: {e}")
+        return False
+
+def test_time_series_store():
+    """Test time-series rollups and downsampled queries"""
+    print_section("TEST 13: Time-Series Store")
+    
+    try:
+        from time_series_store import TimeSeriesStore
+        
+        store = TimeSeriesStore()
+        end = 1_700_003_400.0  # Multiple of the 5 minute step
+        
+        # 24 hours of samples every 2 seconds: vehicles alternate 4 / 8
+        for i in range(43200):
+            store.record(end - 86400 + i * 2, vehicle_count=4 if i % 2 else 8,
+                         phase_changes=1 if i % 30 == 0 else 0)
+        
+        start = time.perf_counter()
+        history = store.query(range_seconds=86400, step=300, end=end - 1)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        
+        averages = [v for v in history['metrics']['vehicle_count']['avg'] if v is not None]
+        if history['resolution'] != 'minute' or len(history['timestamps']) != 288:
+            print(f"✗ Unexpected 24h query shape: {history['resolution']}, {len(history['timestamps'])} points")
+            return False
+        if any(abs(v - 6.0) > 0.01 for v in averages):
+            print("✗ Rollup averages are wrong")
+            return False
+        print(f"✓ 24h at 5 min steps: {len(averages)} points in {elapsed_ms:.1f} ms")
+        
+        changes = sum(v for v in history['metrics']['phase_changes']['sum'] if v is not None)
+        if changes != 1440:
+            print(f"✗ Phase change count {changes} (expected 1440)")
+            return False
+        print(f"✓ Phase changes summed across rollups: {int(changes)}")
+        
+        # A step coarser than any level's span, and a short range with a tiny step
+        coarse = store.query(range_seconds=3600, step=31 * 86400, end=end - 1)
+        fine = store.query(range_seconds=7200, step=7, end=end - 1)
+        if len(coarse['timestamps']) != 1 or (fine['resolution'], len(fine['timestamps'])) != ('minute', 120):
+            print(f"✗ Edge steps: {len(coarse['timestamps'])} coarse points, "
+                  f"{fine['resolution']} x {len(fine['timestamps'])} fine points")
+            return False
+        print("✓ Oversized steps are clamped; short ranges use the finest covering level")
+        
+        # Unparseable or infinite durations fall back to the default
+        from time_series_store import parse_duration
+        if [parse_duration(text, 60) for text in ('15m', 'inf', '1e400', 'infh', 'x')] != [900, 60, 60, 60, 60]:
+            print("✗ Infinite or invalid durations not rejected")
+            return False
+        print("✓ Infinite or invalid durations fall back to the default")
+        
+        # Saves from several threads (scheduler and detection) never publish a partial file
+        import tempfile
+        import threading
+        errors = []
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "history.npz")
+            def save_repeatedly():
+                for _ in range(10):
+                    try:
+                        store.save(path)
+                        TimeSeriesStore.load(path)
+                    except Exception as e:
+                        errors.append(e)
+            threads = [threading.Thread(target=save_repeatedly) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            leftovers = [name for name in os.listdir(directory) if name != "history.npz"]
+        if errors or leftovers:
+            print(f"✗ Concurrent saves failed: {errors[:1]}, leftover files {leftovers}")
+            return False
+        print("✓ Concurrent saves always leave a complete snapshot")
+        
+        # Memory is fixed: more samples do not grow the arrays
+        sizes = [level.sums.nbytes for level in store.levels.values()]
+        store.record(end + 1, vehicle_count=1)
+        if sizes != [level.sums.nbytes for level in store.levels.values()]:
+            print("✗ Store grew after insert")
+            return False
+        print("✓ Memory stays bounded")
+        return True
+    except Exception as e:
+        print(f"✗ Time-series store test failed: {e}")
+        return False
+
+def test_history_database():
+    """Test durable history writes, rollups and the drop counter"""
+    print_section("TEST 14: History Database")
+    
+    try:
+        import tempfile
+        from history_db import HistoryDatabase
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db = HistoryDatabase(os.path.join(temp_dir, "history.db"), queue_size=100000,
+                                 flush_interval=0.1)
+            start_ts = 1_699_999_200.0  # Start of an hour
+            
+            # 2 cameras x 2 hours of 10 Hz detections
+            start = time.perf_counter()
+            for i in range(72000):
+                db.record_detection(f"cam{i % 2}", 5, timestamp=start_ts + i * 0.1)
+            record_us = (time.perf_counter() - start) / 72000 * 1e6
+            db.record_phase_change("cam0", "GREEN", "YELLOW", 30.0, timestamp=start_ts + 10)
+            db.record_cycle("cam0", 1, 45.0, 5.0, timestamp=start_ts + 20)
+            
+            if not db.flush():
+                print("✗ Writer did not drain the queue")
+                return False
+            print(f"✓ Recorded 72000 detections ({record_us:.1f} µs per record)")
+            
+            hourly = db.query_rollups('hourly', start_ts, start_ts + 7200)
+            samples = {(r['camera_id'], r['period_start']): r['samples'] for r in hourly}
+            if len(hourly) != 4 or set(samples.values()) != {18000}:
+                print(f"✗ Unexpected hourly rollups: {samples}")
+                return False
+            cam0 = [r for r in hourly if r['camera_id'] == 'cam0'][0]
+            if cam0['avg_vehicles'] != 5 or cam0['phase_changes'] != 1 or cam0['green_seconds'] != 30 \
+                    or cam0['cycles'] != 1:
+                print(f"✗ Rollup values are wrong: {cam0}")
+                return False
+            print("✓ Hourly rollups match recorded data")
+            
+            if len(db.query_cycles(camera_id="cam0")) != 1 or len(db.query_phase_changes()) != 1:
+                print("✗ Event queries are wrong")
+                return False
+            print("✓ Phase change and cycle queries work")
+            db.close()
+            
+            # A full queue drops records instead of blocking the caller
+            db = HistoryDatabase(os.path.join(temp_dir, "small.db"), queue_size=10, batch_size=10)
+            for _ in range(10000):
+                db.record_detection("cam0", 1)
+            if db.get_stats()['dropped'] == 0:
+                print("✗ Full queue did not drop records")
+                return False
+            print(f"✓ Overflow dropped {db.get_stats()['dropped']} records without blocking")
+            db.close()
+        return True
+    except Exception as e:
+        print(f"✗ History database test failed: {e}")
+        return False
+
+def test_traffic_simulator():
+    """Test the discrete-event simulator and policy comparison"""
+    print_section("TEST 15: Traffic Simulator")
+    
+    try:
+        from traffic_simulator import (TrafficSimulator, PoissonArrivals, ReplayArrivals,
+                                       ControllerPolicy, DensityGreenPolicy, FixedTimePolicy,
+                                       compare_policies)
+        
+        # One simulated week should take seconds, not a week
+        start = time.perf_counter()
+        results = compare_policies(
+            {'controller': ControllerPolicy(), 'fixed': FixedTimePolicy()},
+            lambda: PoissonArrivals(600, profile=None, seed=1), 7 * 86400)
+        elapsed = time.perf_counter() - start
+        if elapsed > 10:
+            print(f"✗ Simulating a week took {elapsed:.1f} s")
+            return False
+        print(f"✓ Simulated 2 policies x 7 days in {elapsed:.2f} s")
+        
+        for name, r in results.items():
+            if r['arrivals'] != r['departures'] + r['queue_at_end']:
+                print(f"✗ {name}: vehicles not conserved")
+                return False
+            if abs(r['throughput_per_hour'] - 600) > 20 or r['avg_delay'] <= 0:
+                print(f"✗ {name}: unexpected results {r}")
+                return False
+        print(f"✓ Vehicles conserved; avg delay controller {results['controller']['avg_delay']:.1f} s, "
+              f"fixed {results['fixed']['avg_delay']:.1f} s")
+        
+        # Empty road: the controller holds RED and never cycles
+        empty = TrafficSimulator(ControllerPolicy(), PoissonArrivals(0, seed=1)).run(3600)
+        if empty['cycles'] != 0 or empty['green_share'] != 0:
+            print("✗ Controller cycled with no traffic")
+            return False
+        print("✓ Controller holds RED on an empty road")
+        
+        # Policies plan like main.py: controller.plan_cycle on the PCU density
+        policy = DensityGreenPolicy()
+        policy.analyzer.frame_demand = lambda class_ids, count: count * 2.5  # All trucks
+        plan = policy.next_phases(4)  # 10 PCU: MEDIUM, where the raw count says LOW
+        expected = policy.controller.plan_cycle("MEDIUM")
+        if [state for state, _ in plan] != [state for state, _ in expected] or dict(plan)["GREEN"] != 20:
+            print(f"✗ Policy plan {plan} not planned from PCU density")
+            return False
+        print("✓ Policies classify PCU demand and plan through the controller's plan_cycle")
+        
+        # Replayed detections: 4 vehicles in view with 8 s dwell = 0.5 vehicles/s
+        replay = TrafficSimulator(FixedTimePolicy(), ReplayArrivals([4.0] * 600, dwell_time=8.0, seed=1))
+        r = replay.run(86400)
+        if abs(r['arrivals'] / 86400 - 0.5) > 0.02:
+            print(f"✗ Replay arrival rate {r['arrivals'] / 86400:.3f}/s (expected 0.5)")
+            return False
+        print(f"✓ Replayed detections drive arrivals ({r['arrivals']} vehicles in a simulated day)")
+        return True
+    except Exception as e:
+        print(f"✗ Traffic simulator test failed: {e}")
+        return False
+
+def test_detection_cache():
+    """Test that looped footage is analyzed once per unique frame"""
+    print_section("TEST 16: Detection Cache")
+    
+    try:
+        import tempfile
+        import numpy as np
+        from detection_cache import DetectionCache
+        from vehicle_detector import VehicleDetector
+        
+        frames = [np.random.default_rng(i).integers(0, 255, (240, 320, 3), dtype=np.uint8)
+                  for i in range(50)]
+        detections = (np.array([[10, 10, 50, 50]], dtype=np.float32),
+                      np.array([0.9], dtype=np.float32), np.array([2], dtype=np.int32))
+        
+        # Detector with a stand-in model that counts inference calls
+        detector = VehicleDetector.__new__(VehicleDetector)
+        detector.vehicle_classes = [2, 3, 5, 7]
+        detector.model = type('Model', (), {'names': {2: 'car'}})()
+        calls = []
+        detector.run_model = lambda frame: calls.append(1) or detections
+        detector.cache = DetectionCache("test-video", capacity=100)
+        
+        # Loop the "video" three times (the frames are passed as is: annotation
+        # goes to a separate buffer, so the decoded frame stays clean)
+        originals = [frame.copy() for frame in frames]
+        for _ in range(3):
+            for index, frame in enumerate(frames):
+                count, annotated = detector.detect_vehicles(frame, index)
+                if count != 1:
+                    print("✗ Cached detections changed the vehicle count")
+                    return False
+        if len(calls) != 50:
+            print(f"✗ Model ran {len(calls)} times for 50 unique frames")
+            return False
+        if not all(np.array_equal(frame, original) for frame, original in zip(frames, originals)) \
+                or np.array_equal(annotated, frames[-1]):
+            print("✗ Detection drew into the caller's frame")
+            return False
+        print(f"✓ 150 looped frames, 50 inferences (hit rate {detector.cache.get_stats()['hit_rate']:.0%}), "
+              f"input frames left clean")
+        
+        # With a pool, annotated frames are reused buffers owned by the caller
+        from frame_pool import FramePool
+        detector.pool = FramePool()
+        _, first = detector.detect_vehicles(frames[0], 0)
+        detector.pool.release(first)
+        _, second = detector.detect_vehicles(frames[1], 1)
+        if second is not first or detector.pool.get_stats()['allocations'] != 1:
+            print("✗ Annotated frames not taken from the pool")
+            return False
+        detector.pool = None
+        
+        # Same content without a frame index is found by hash
+        if detector.cache.get(None, frames[10])[0] is None:
+            print("✗ Content hash fallback missed")
+            return False
+        print("✓ Content hash fallback works")
+        
+        # Bounded LRU
+        small = DetectionCache("test-video", capacity=10)
+        for index, frame in enumerate(frames):
+            small.put(detections, index, frame)
+        if len(small) != 10 or small.get(0, frames[0])[0] is not None or small.get(49, frames[49])[0] is None:
+            print("✗ LRU eviction is wrong")
+            return False
+        print("✓ LRU keeps the 10 most recent frames")
+        
+        # Sidecar round trip (ignored for a different source)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "video.mp4.detections")
+            detector.cache.save(path)
+            size = os.path.getsize(path)
+            loaded = DetectionCache("test-video", sidecar_path=path)
+            entry = loaded.get(5)[0]
+            if len(loaded) != 50 or entry is None or not np.array_equal(entry[0], detections[0]):
+                print("✗ Sidecar did not round-trip")
+                return False
+            if len(DetectionCache("other-video", sidecar_path=path)) != 0:
+                print("✗ Sidecar loaded for the wrong source")
+                return False
+            with open(path, 'r+b') as f:
+                f.truncate(size - 7)  # Cut off mid-entry (e.g. a full disk)
+            if len(DetectionCache("test-video", sidecar_path=path)) != 0:
+                print("✗ Truncated sidecar was partially loaded")
+                return False
+            print(f"✓ Sidecar round trip ({size} bytes for 50 frames); truncated sidecars are ignored")
+            
+            # Saved periodically, not only on a clean exit (a killed process keeps its work)
+            autosaved = DetectionCache("test-video", sidecar_path=path, autosave_every=20)
+            for index, frame in enumerate(frames):
+                autosaved.put(detections, index, frame)
+            recovered = DetectionCache("test-video", sidecar_path=path)
+            if len(recovered) != 40 or autosaved.unsaved != 10:
+                print(f"✗ Autosave kept {len(recovered)} of 50 frames ({autosaved.unsaved} unsaved)")
+                return False
+            print("✓ Sidecar autosaved every 20 new frames without a clean exit")
+        return True
+    except Exception as e:
+        print(f"✗ Detection cache test failed: {e}")
+        return False
+
+def test_frame_channel():
+    """Test sharing frames and detections between processes"""
+    print_section("TEST 17: Frame Channel")
+    
+    try:
+        import subprocess
+        import numpy as np
+        from frame_channel import FrameChannel, attach_channel
+        
+        name = f"test_frame_slot_{os.getpid()}"
+        if attach_channel(name) is not None:
+            print("✗ Channel exists before it was created")
+            return False
+        
+        # Publisher in another process: frame payload and box both carry the frame number
+        publisher = subprocess.Popen([sys.executable, "-c", f"""
+import sys, time, numpy as np
+sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r})
+from frame_channel import FrameChannel
+channel = FrameChannel({name!r}, create=True, max_jpeg_bytes=1 << 20)
+print('ready', flush=True)
+for i in range(1, 2001):
+    payload = np.full(20000 + i % 1000, i % 251, np.uint8)
+    channel.publish(payload, np.full((3, 4), i, np.float32), np.ones(3), np.array([2, 3, 7]), vehicle_count=i)
+    time.sleep(0.0005)
+sys.stdin.read()
+channel.close()
+"""], stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        publisher.stdout.readline()
+        
+        channel = attach_channel(name)
+        if channel is None:
+            print("✗ Could not attach to the published channel")
+            return False
+        
+        received = 0
+        last_seq = 0
+        deadline = time.time() + 10
+        while last_seq < 2000 and time.time() < deadline:
+            frame = channel.read(last_seq)
+            if frame is None:
+                continue
+            i = frame.vehicle_count
+            if (frame.boxes[0, 0] != i or len(frame.jpeg) != 20000 + i % 1000
+                    or frame.jpeg[0] != i % 251 or frame.jpeg[-1] != i % 251):
+                print(f"✗ Torn frame {frame.seq}")
+                publisher.kill()
+                return False
+            last_seq = frame.seq
+            received += 1
+        
+        publisher.communicate(timeout=10)
+        channel.close()
+        if last_seq != 2000:
+            print(f"✗ Last sequence {last_seq} (expected 2000)")
+            return False
+        print(f"✓ Read {received} of 2000 frames from another process, none torn (newest always wins)")
+        return True
+    except Exception as e:
+        print(f"✗ Frame channel test failed: {e}")
+        return False
+
+def test_tiered_detector():
+    """Test falling back to motion counting when inference is over budget"""
+    print_section("TEST 18: Tiered Detector")
+    
+    try:
+        import numpy as np
+        from tiered_detector import TieredDetector, BlobCounter, TIER_YOLO, TIER_MOTION
+        from detection_consumers import PedestrianWaiting
+        
+        def frame_at(t):
+            # Three "vehicles" moving across a flat road
+            frame = np.full((480, 640, 3), 80, np.uint8)
+            for k in range(3):
+                x = (40 + t * 6 + k * 200) % 560
+                frame[60 + k * 130:110 + k * 130, x:x + 80] = (200, 200, 220)
+            return frame
+        
+        counter = BlobCounter()
+        for t in range(40):
+            blobs, boxes = counter.count(frame_at(t))
+        if blobs != 3:
+            print(f"✗ Motion counter found {blobs} blobs (expected 3)")
+            return False
+        print("✓ Motion counter finds 3 moving blobs")
+        
+        # Stand-in YOLO: 6 vehicles (2 per blob) with adjustable latency
+        class SlowDetector:
+            delay = 0.0
+            cache = None
+            last_detections = (np.zeros((0, 4)), np.zeros(0), np.zeros(0, np.int32))
+            consumer_results = {}
+            consumers = ()
+            def detect_vehicles(self, frame, frame_index=None):
+                time.sleep(self.delay)
+                return 6, frame.copy()
+            def output_frame(self, frame):
+                return frame.copy()
+        
+        slow = SlowDetector()
+        detector = TieredDetector(slow, budget=0.02, probe_interval=0.05)
+        for t in range(40):
+            detector.detect_vehicles(frame_at(t))
+        if detector.tier != TIER_YOLO or abs(detector.scale - 2.0) > 0.05:
+            print(f"✗ Calibration failed: {detector.get_stats()}")
+            return False
+        print(f"✓ Calibrated on YOLO frames: {detector.scale:.2f} vehicles per blob")
+        
+        slow.delay = 0.03
+        for t in range(40, 45):
+            detector.detect_vehicles(frame_at(t))
+        frame = frame_at(45)
+        count, annotated = detector.detect_vehicles(frame)
+        if not np.array_equal(frame, frame_at(45)) or np.array_equal(annotated, frame):
+            print("✗ Motion tier drew into the caller's frame")
+            return False
+        if detector.tier != TIER_MOTION or count != 6:
+            print(f"✗ Expected motion tier with 6 calibrated vehicles, got {detector.tier} / {count}")
+            return False
+        print("✓ Over budget: demoted to motion tier, density count stays calibrated (6)")
+        
+        # Motion frames must overwrite the last YOLO analytics in the merged state file
+        waiting = PedestrianWaiting()
+        waiting.frames_occupied = 5
+        slow.consumers = (waiting,)
+        detector.last_probe = time.monotonic()  # Not a probe frame
+        detector.detect_vehicles(frame_at(46))
+        if detector.consumer_results != {'pedestrians': None} or waiting.frames_occupied != 0:
+            print(f"✗ Stale analytics on a motion frame: {detector.consumer_results}, "
+                  f"{waiting.frames_occupied} frames occupied")
+            return False
+        slow.consumers = ()
+        print("✓ Motion frames publish pedestrians=None and restart the waiting streak")
+        
+        slow.delay = 0.0
+        for t in range(47, 200):
+            detector.detect_vehicles(frame_at(t))
+            time.sleep(0.01)
+            if detector.tier == TIER_YOLO:
+                break
+        if detector.tier != TIER_YOLO:
+            print("✗ Not promoted after fast probes")
+            return False
+        print(f"✓ Promoted back to YOLO after fast probes ({detector.tier_changes} tier changes)")
+        
+        # Standalone dashboard: 'tier' is the tier name, as when synced with main.py
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dashboard'))
+        import app_production
+        previous = app_production.detector, app_production.latest_detections
+        app_production.detector = detector
+        app_production.latest_detections = dict(previous[1], source='dashboard')
+        try:
+            response = app_production.app.test_client().get('/api/detections').get_json()
+        finally:
+            app_production.detector, app_production.latest_detections = previous
+        if response['tier'] != TIER_YOLO or response['tier_stats']['tier'] != TIER_YOLO:
+            print(f"✗ /api/detections tier is {response['tier']!r}")
+            return False
+        print("✓ /api/detections reports the tier name, stats separately")
+        return True
+    except Exception as e:
+        print(f"✗ Tiered detector test failed: {e}")
+        return False
+
+def test_tiled_detection():
+    """Test far-field tiling and cross-tile NMS"""
+    print_section("TEST 19: Tiled Detection")
+    
+    try:
+        import numpy as np
+        from vehicle_detector import VehicleDetector, make_tiles, non_max_suppression
+        
+        # Tiles cover the ROI with overlap and stay inside the frame
+        tiles = make_tiles((1080, 1920, 3), (0.3, 0.0, 0.7, 0.35), tile_size=320, overlap=0.25)
+        if tiles[:, 0].min() != 576 or tiles[:, 2].max() != 1344 or tiles[:, 3].max() != 378:
+            print(f"✗ Tiles do not cover the ROI: {tiles.tolist()}")
+            return False
+        print(f"✓ Far-field ROI covered by {len(tiles)} overlapping tiles")
+        
+        # Stand-in model: "finds" a fixed far-field car wherever it is fully visible,
+        # and a clipped copy of it in the tile that cuts it
+        car = np.array([800.0, 100.0, 840.0, 125.0])
+        
+        class Tensor:
+            def __init__(self, array):
+                self.array = np.asarray(array, dtype=np.float32)
+            def cpu(self):
+                return self
+            def numpy(self):
+                return self.array
+        
+        class Result:
+            def __init__(self, boxes, confidences):
+                self.boxes = type('Boxes', (), {'xyxy': Tensor(np.reshape(boxes, (-1, 4))),
+                                                'conf': Tensor(confidences),
+                                                'cls': Tensor([2] * len(confidences))})()
+        
+        def model(images, verbose=False):
+            results = [Result([], [])]  # Full frame: too small to detect
+            for x1, y1, x2, y2 in tiles:
+                clipped = np.array([max(car[0], x1), max(car[1], y1), min(car[2], x2), min(car[3], y2)])
+                if clipped[0] >= clipped[2] or clipped[1] >= clipped[3]:
+                    results.append(Result([], []))
+                else:
+                    full = np.array_equal(clipped, car)
+                    results.append(Result([clipped - [x1, y1, x1, y1]], [0.8 if full else 0.5]))
+            return results
+        
+        detector = VehicleDetector.__new__(VehicleDetector)
+        detector.model = model
+        detector.tile_roi = (0.3, 0.0, 0.7, 0.35)
+        detector.tile_size = 320
+        detector.tile_overlap = 0.25
+        detector._tiles = None
+        
+        boxes, confidences, class_ids = detector.run_model(np.zeros((1080, 1920, 3), np.uint8))
+        if len(boxes) != 1 or not np.allclose(boxes[0], car):
+            print(f"✗ Cross-tile merge gave {boxes.tolist()}")
+            return False
+        print("✓ Duplicate and clipped detections from overlapping tiles merged into one")
+        
+        # NMS keeps different classes and separate vehicles
+        boxes = np.array([[0, 0, 10, 10], [1, 1, 10, 10], [50, 50, 60, 60], [0, 0, 10, 10]], np.float32)
+        keep = non_max_suppression(boxes, np.array([0.9, 0.8, 0.7, 0.95]), np.array([2, 2, 2, 7]))
+        if keep.tolist() != [0, 2, 3]:
+            print(f"✗ NMS kept {keep.tolist()}")
+            return False
+        print("✓ Class-aware NMS")
+        return True
+    except Exception as e:
+        print(f"✗ Tiled detection test failed: {e}")
+        return False
+
+def test_frame_pool():
+    """Test pooled frame buffers and the pre-encoded placeholder"""
+    print_section("TEST 20: Frame Pool")
+    
+    try:
+        import numpy as np
+        from frame_pool import FramePool, make_placeholder
+        from frame_broadcaster import FrameBroadcaster
+        
+        pool = FramePool()
+        frame = pool.acquire((480, 640, 3))
+        pool.retain(frame)
+        pool.release(frame)
+        if pool.acquire((480, 640, 3)) is frame:
+            print("✗ Buffer reused while still owned")
+            return False
+        pool.release(frame)
+        pool.release(np.zeros(3))  # Not pooled: ignored
+        print("✓ Buffers are only reused after the last owner releases them")
+        
+        # Broadcaster takes ownership of produced frames and releases replaced ones
+        pool = FramePool()
+        def produce():
+            frame = pool.acquire((240, 320, 3))
+            frame[:] = 100
+            return frame
+        broadcaster = FrameBroadcaster(produce, pool=pool)
+        for _ in range(100):
+            broadcaster._publish(produce(), None)
+            broadcaster.get_jpeg(width=160, quality=50)
+        stats = pool.get_stats()
+        if stats['allocations'] > 2 or stats['in_use'] != 1:
+            print(f"✗ Pool churned: {stats}")
+            return False
+        print(f"✓ 100 broadcast frames used {stats['allocations']} buffers")
+        
+        # Static placeholder is encoded once, never per frame
+        placeholder = make_placeholder("No Video Source")
+        broadcaster = FrameBroadcaster(lambda: placeholder)
+        for _ in range(50):
+            broadcaster._publish(*placeholder)
+            seq, jpeg = broadcaster.get_jpeg(width=320, quality=50)
+            default_jpeg = broadcaster.get_jpeg()[1]
+        encoded = sum(v['frames_encoded'] for v in broadcaster.get_stats()['variants'])
+        if encoded != 1 or default_jpeg is not placeholder[1]:
+            print(f"✗ Placeholder encoded {encoded} times")
+            return False
+        print("✓ Placeholder served pre-encoded (one resize encode for 50 frames)")
+        return True
+    except Exception as e:
+        print(f"✗ Frame pool test failed: {e}")
+        return False
+
+def test_cpu_resources():
+    """Test the CPU thread policy, core split and calibration"""
+    print_section("TEST 21: CPU Resources")
+    
+    try:
+        import tempfile
+        import cv2
+        import numpy as np
+        from cpu_resources import (ThreadPolicy, default_policy, worker_cores, apply_policy,
+                                   open_capture, load_policy, save_policy, calibrate)
+        
+        # 9 cores, 4 cameras: one core for the dashboard, two per worker
+        cores = list(range(9))
+        policy = default_policy(4, cores)
+        assert policy.reserved_cores == 1 and policy.inference_threads == 1, policy
+        slices = [worker_cores(i, 4, policy, cores) for i in range(4)]
+        assert slices == [[1, 2], [3, 4], [5, 6], [7, 8]], slices
+        assert worker_cores(5, 8, default_policy(8, [0, 1]), [0, 1]) == [1]
+        print("✓ Cores split into disjoint worker slices")
+        
+        previous = cv2.getNumThreads()
+        environment = dict(os.environ)
+        apply_policy(ThreadPolicy(2, 1, 1), pin=False)
+        assert cv2.getNumThreads() == 1
+        assert os.environ['OMP_NUM_THREADS'] == '2'
+        cv2.setNumThreads(previous)
+        os.environ.clear()
+        os.environ.update(environment)
+        print("✓ Policy applied to OpenCV and torch/OpenMP")
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "clip.avi")
+            writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 10, (160, 120))
+            for i in range(5):
+                writer.write(np.full((120, 160, 3), i * 40, np.uint8))
+            writer.release()
+            capture = open_capture(path, decode_threads=2)
+            assert capture.isOpened() and capture.read()[0]
+            capture.release()
+            print("✓ Video opened with bounded decode threads")
+            
+            policy_path = os.path.join(tmp, "cpu_policy.json")
+            assert load_policy(2, policy_path).to_dict() == default_policy(2).to_dict()
+            save_policy(ThreadPolicy(3, 2, 1, 1), 2, policy_path)
+            assert load_policy(2, policy_path).to_dict() == ThreadPolicy(3, 2, 1, 1).to_dict()
+            print("✓ Calibrated policy saved and loaded per host")
+        
+        # The candidate with the lowest p95 wins
+        delays = {1: 0.004, 2: 0.0}
+        def workload(policy):
+            return lambda: time.sleep(delays[policy.inference_threads])
+        results = calibrate(workload, [ThreadPolicy(1), ThreadPolicy(2)], frames=5, warmup=0)
+        cv2.setNumThreads(previous)
+        os.environ.clear()
+        os.environ.update(environment)
+        assert results[0][0].inference_threads == 2, results
+        print("✓ Calibration picks the fastest split")
+        return True
+    except Exception as e:
+        print(f"✗ CPU resources test failed: {e}")
+        return False
+
+def test_model_tuner():
+    """Test model/input size selection against a latency budget"""
+    print_section("TEST 22: Model Auto-Tuner")
+    
+    try:
+        import tempfile
+        from model_tuner import ModelTuner, choose_candidate, Candidate
+        from vehicle_detector import detector_config
+        
+        # Stand-in timings: bigger models and inputs are slower, batching helps
+        cost = {'yolov8n': 10, 'yolov8s': 25, 'yolov8m': 60}
+        measured = []
+        def measure(candidate, frames, num_cameras):
+            measured.append(candidate)
+            per_frame = cost[candidate.model] * (candidate.imgsz / 640) ** 2 / 1000
+            return num_cameras * per_frame * candidate.batch ** -0.25
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_path = os.path.join(tmp, "model_tuning.json")
+            tuner = ModelTuner(budget=0.02, num_cameras=1, backends=['pytorch'],
+                               measure=measure, cache_path=cache_path)
+            decision = tuner.tune([None])
+            assert (decision['model'], decision['imgsz']) == ('yolov8s', 480), decision
+            assert decision['within_budget']
+            # yolov8m is over budget at 480 px, so 640 px is never measured
+            assert Candidate('yolov8m', 640, 1, 'pytorch') not in measured
+            print(f"✓ Picked {decision['model']} at {decision['imgsz']} px "
+                  f"({decision['latency_ms']} ms, {len(measured)} configurations measured)")
+            
+            measured.clear()
+            assert tuner.tune([None]) == decision and not measured
+            print("✓ Decision cached for this host (no measuring on restart)")
+            
+            # Four cameras on the same budget: batched, at a smaller input size
+            four = ModelTuner(budget=0.02, num_cameras=4, backends=['pytorch'],
+                              measure=measure, cache_path=cache_path).tune([None])
+            assert (four['model'], four['imgsz'], four['batch']) == ('yolov8s', 320, 4), four
+            print(f"✓ 4 cameras: {four['model']} at {four['imgsz']} px, batch {four['batch']}")
+            
+            # The dashboard's lookup never exports: a missing export means the default model
+            import model_tuner
+            previous_dir, model_tuner.EXPORT_DIR = model_tuner.EXPORT_DIR, tmp
+            try:
+                assert model_tuner.model_file(Candidate('yolov8n', 320, 1, 'onnx'), export=False) is None
+            finally:
+                model_tuner.EXPORT_DIR = previous_dir
+            print("✓ Lookup without export falls back when the exported model is missing")
+        
+        # Nothing fits: the fastest configuration, flagged as over budget
+        slow = choose_candidate([(Candidate('yolov8n', 320, 1, 'pytorch'), 0.2),
+                                 (Candidate('yolov8s', 320, 1, 'pytorch'), 0.5)], 0.1)
+        assert slow['model'] == 'yolov8n' and not slow['within_budget']
+        
+        assert detector_config() is None
+        assert detector_config('yolov8s.pt', 480) == "model=yolov8s.pt@480"
+        print("✓ Over-budget fallback and detection cache key")
+        return True
+    except Exception as e:
+        print(f"✗ Model tuner test failed: {e}")
+        return False
+
+def test_phase_scheduler():
+    """Test deadline-accurate phase transitions independent of frame processing"""
+    print_section("TEST 23: Phase Scheduler")
+    
+    try:
+        import numpy as np
+        from phase_scheduler import PhaseScheduler
+        
+        # Lateness accounting on an injected clock (independent of host load):
+        # each callback moves time to 4 ms past the next deadline
+        deadlines = np.cumsum([0, 0.05, 0.08, 0.03, 0.05, 0.08, 0.03])
+        now = [100.0]
+        simulated = []
+        def late_transition(state, duration):
+            simulated.append((state, now[0]))
+            now[0] = 100.0 + deadlines[len(simulated)] + 0.004
+        plans = [[("RED", 0.05), ("GREEN", 0.08), ("YELLOW", 0.03)]] * 2 + [[]]
+        scheduler = PhaseScheduler(lambda: plans.pop(0), late_transition, clock=lambda: now[0])
+        scheduler.start()
+        scheduler._thread.join(2.0)
+        expected = 100.0 + deadlines[:6] + np.r_[0, [0.004] * 5]
+        stats = scheduler.get_stats()
+        if [state for state, _ in simulated] != ["RED", "GREEN", "YELLOW"] * 2 \
+                or not np.allclose([t for _, t in simulated], expected):
+            print(f"✗ Transitions fired in the wrong order or drifted: {simulated}")
+            return False
+        if stats['transitions'] != 6 or abs(stats['max_ms'] - 4.0) > 1e-6 \
+                or abs(stats['mean_ms'] - 20 / 6) > 0.001:
+            print(f"✗ Unexpected lateness statistics: {stats}")
+            return False
+        print(f"✓ Absolute deadlines: lateness never accumulates (mean {stats['mean_ms']} ms, "
+              f"max {stats['max_ms']} ms on the test clock)")
+        
+        # Real clock: a "frame" much longer than any phase must not delay the
+        # transitions (a blocked scheduler would be up to 200 ms late)
+        plans = [[("RED", 0.05), ("GREEN", 0.08), ("YELLOW", 0.03)]] * 2 + [[]]
+        fired = []
+        scheduler = PhaseScheduler(lambda: plans.pop(0),
+                                   lambda state, duration: fired.append((state, time.monotonic())))
+        start = time.monotonic()
+        scheduler.start()
+        time.sleep(0.2)
+        remaining = scheduler.time_remaining()
+        scheduler._thread.join(2.0)
+        
+        states = [state for state, _ in fired]
+        if states != ["RED", "GREEN", "YELLOW"] * 2:
+            print(f"✗ Transitions fired in the wrong order: {states}")
+            return False
+        errors = np.abs(np.array([t for _, t in fired]) - start - deadlines[:6])
+        if errors.max() > 0.1:
+            print(f"✗ Transitions off their deadlines by up to {errors.max() * 1000:.1f} ms")
+            return False
+        print(f"✓ 6 transitions during a 200 ms frame (max error {errors.max() * 1000:.1f} ms)")
+        
+        if not 0 < remaining <= 0.08:
+            print(f"✗ Time remaining {remaining:.3f} s outside the current phase")
+            return False
+        
+        # An empty plan stops the scheduler; stop() is safe afterwards
+        if scheduler.is_running():
+            print("✗ Scheduler still running after an empty plan")
+            return False
+        scheduler.stop()
+        print("✓ Scheduler stops cleanly")
+        return True
+    except Exception as e:
+        print(f"✗ Phase scheduler test failed: {e}")
+        return False
+
+def test_event_log():
+    """Test the queued, rate-limited JSON-lines event log"""
+    print_section("TEST 24: Event Log")
+    
+    try:
+        import io
+        import json
+        import threading
+        from event_log import EventLogger
+        
+        stream = io.StringIO()
+        logger = EventLogger(stream=stream, rate_limit_interval=0.2, process='test')
+        logger.log('arduino.signal_sent', signal='G')
+        for _ in range(100):
+            logger.log('state.write_failed', 'error', error='disk full')
+        logger.flush()
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        if [r['event'] for r in records] != ['arduino.signal_sent', 'state.write_failed']:
+            print(f"✗ Unexpected events: {records}")
+            return False
+        if records[0]['signal'] != 'G' or records[0]['process'] != 'test':
+            print(f"✗ Event fields missing: {records[0]}")
+            return False
+        print("✓ Events written as JSON lines; 100 repeated errors written once")
+        
+        time.sleep(0.25)
+        logger.log('state.write_failed', 'error', error='disk full')
+        logger.flush()
+        last = json.loads(stream.getvalue().splitlines()[-1])
+        if last.get('suppressed') != 99:
+            print(f"✗ Suppressed count not reported: {last}")
+            return False
+        print("✓ Next error after the interval reports 99 suppressed")
+        
+        # A stalled consumer: logging stays non-blocking and overflow is counted
+        release = threading.Event()
+        class StalledStream(io.StringIO):
+            def write(self, text):
+                release.wait()
+                return super().write(text)
+        stalled = StalledStream()
+        logger = EventLogger(stream=stalled, queue_size=10)
+        start = time.perf_counter()
+        for i in range(1000):
+            logger.log('signal.phase_changed', state='RED', index=i)
+        elapsed = time.perf_counter() - start
+        if elapsed > 0.5 or logger.dropped < 900:
+            print(f"✗ 1000 events took {elapsed * 1000:.0f} ms, {logger.dropped} dropped")
+            return False
+        release.set()
+        logger.flush()
+        events = [json.loads(line)['event'] for line in stalled.getvalue().splitlines()]
+        if 'log.dropped' not in events:
+            print("✗ Dropped events not reported")
+            return False
+        print(f"✓ Stalled output: 1000 events queued in {elapsed * 1000:.1f} ms, "
+              f"{logger.dropped} dropped and reported")
+        
+        # Under gevent (gunicorn worker) a blocking write must not stall other greenlets
+        try:
+            import gevent  # noqa: F401
+        except ImportError:
+            print("⚠ gevent not installed, skipping the greenlet case")
+            return True
+        import subprocess
+        result = subprocess.run([sys.executable, "-c", f"""
+from gevent import monkey
+monkey.patch_all()
+import io, sys, time, gevent
+sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r})
+from event_log import EventLogger
+blocking_sleep = monkey.get_original('time', 'sleep')
+class SlowStream(io.StringIO):
+    def write(self, text):
+        blocking_sleep(0.3)  # e.g. a full pipe to a stalled log collector
+        return super().write(text)
+stream = SlowStream()
+logger = EventLogger(stream=stream)
+ticks = []
+def ticker():
+    while len(ticks) < 100:
+        ticks.append(time.monotonic())
+        gevent.sleep(0.005)
+greenlet = gevent.spawn(ticker)
+gevent.sleep(0.01)
+logger.log('signal.phase_changed', state='RED')
+gevent.sleep(0.4)
+greenlet.kill()
+logger.flush()
+gaps = [b - a for a, b in zip(ticks, ticks[1:])]
+print(max(gaps), stream.getvalue().count('phase_changed'))
+"""], capture_output=True, text=True, timeout=30)
+        if result.returncode != 0:
+            print(f"✗ gevent case failed: {result.stderr.strip()[-300:]}")
+            return False
+        max_gap, written = result.stdout.split()
+        if float(max_gap) > 0.15 or written != '1':
+            print(f"✗ Greenlets stalled {float(max_gap) * 1000:.0f} ms by a blocking write "
+                  f"({written} events written)")
+            return False
+        print(f"✓ gevent: a 300 ms blocking write stalls other greenlets at most "
+              f"{float(max_gap) * 1000:.0f} ms")
+        return True
+    except Exception as e:
+        print(f"✗ Event log test failed: {e}")
+        return False
+
+def test_sampling_profiler():
+    """Test the in-process sampling profiler"""
+    print_section("TEST 25: Sampling Profiler")
+    
+    try:
+        import threading
+        from sampling_profiler import profile
+        
+        stop = threading.Event()
+        def spin_here():
+            while not stop.is_set():
+                sum(range(1000))
+        worker = threading.Thread(target=spin_here, name="busy-worker", daemon=True)
+        worker.start()
+        profiler = profile(0.3, interval=0.005)
+        stop.set()
+        worker.join()
+        
+        if profiler.samples < 20:
+            print(f"✗ Only {profiler.samples} samples in 0.3 s")
+            return False
+        lines = profiler.collapsed().splitlines()
+        busy = [line for line in lines if line.startswith("busy-worker;")]
+        if not busy or not any("spin_here (test_system.py:" in line for line in busy):
+            print("✗ Worker thread stack missing from the profile")
+            return False
+        stack, count = busy[0].rsplit(" ", 1)
+        if int(count) < profiler.samples // 2:
+            print(f"✗ Worker seen in {count} of {profiler.samples} samples")
+            return False
+        if any("sampling_profiler.py" in line.split(";", 2)[1] for line in lines if ";" in line):
+            print("✗ Sampler sampled its own thread")
+            return False
+        print(f"✓ {profiler.samples} samples over {len(lines)} stacks; busy thread in {count}")
+        print(f"✓ Collapsed stack format: {stack.split(';')[0]};{stack.split(';')[-1]} {count}")
+        return True
+    except Exception as e:
+        print(f"✗ Sampling profiler test failed: {e}")
+        return False
+
+def test_detection_consumers():
+    """Test that several analytics share one inference per frame"""
+    print_section("TEST 26: Detection Consumers")
+    
+    try:
+        import numpy as np
+        from vehicle_detector import VehicleDetector
+        from detection_consumers import DetectionConsumer, PedestrianWaiting, CyclistCounter
+        
+        try:
+            DetectionConsumer('bare', [0])
+            print("✗ A consumer without process() could be created")
+            return False
+        except TypeError:
+            print("✓ Consumers must implement process()")
+        
+        # One car, a pedestrian at the crosswalk (left), a ridden bicycle, a faint person
+        detections = (np.array([[400, 100, 500, 180],    # car
+                                [20, 150, 50, 230],      # person, feet at (35, 230)
+                                [300, 200, 360, 260],    # bicycle
+                                [310, 170, 350, 240],    # rider, feet inside the bicycle
+                                [600, 50, 610, 70]], dtype=np.float32),
+                      np.array([0.9, 0.8, 0.7, 0.75, 0.1], dtype=np.float32),
+                      np.array([2, 0, 1, 0, 0], dtype=np.int32))
+        
+        detector = VehicleDetector.__new__(VehicleDetector)
+        detector.vehicle_classes = [2, 3, 5, 7]
+        detector.model = type('Model', (), {'names': {0: 'person', 1: 'bicycle', 2: 'car'}})()
+        detector.cache = None
+        calls = []
+        detector.run_model = lambda frame: calls.append(1) or detections
+        pedestrians = detector.add_consumer(PedestrianWaiting(zone=(0.0, 0.5, 0.2, 1.0), min_frames=3))
+        detector.add_consumer(CyclistCounter())
+        
+        frame = np.zeros((240, 640, 3), dtype=np.uint8)
+        waiting = []
+        for _ in range(3):
+            count, _ = detector.detect_vehicles(frame)
+            waiting.append(detector.consumer_results['pedestrians']['waiting'])
+        if len(calls) != 3 or count != 1:
+            print(f"✗ {len(calls)} inferences for 3 frames, {count} vehicles")
+            return False
+        print("✓ One inference per frame feeds vehicles, pedestrians and cyclists")
+        
+        # A shed frame (no inference) is drawn with the last detections
+        redrawn = detector.annotate(frame)
+        if len(calls) != 3 or not redrawn.any() or frame.any():
+            print("✗ Last detections not redrawn on a skipped frame")
+            return False
+        print("✓ Skipped frames show the last detections")
+        
+        result = detector.consumer_results['pedestrians']
+        if result['count'] != 2 or result['in_zone'] != 1:
+            print(f"✗ Pedestrians: {result}")
+            return False
+        if waiting != [False, False, True]:
+            print(f"✗ Waiting reported as {waiting} (expected after 3 frames)")
+            return False
+        print(f"✓ Pedestrians: {result['count']} seen, {result['in_zone']} waiting after {pedestrians.min_frames} frames")
+        
+        result = detector.consumer_results['cyclists']
+        if result != {'count': 1, 'ridden': 1}:
+            print(f"✗ Cyclists: {result}")
+            return False
+        print("✓ Cyclists: 1 bicycle with a rider")
+        
+        # Leaving the zone resets the wait; unknown class IDs are ignored
+        mask = pedestrians.select(np.array([0.9, 0.9]), np.array([0, 79]))
+        if list(mask) != [True, False]:
+            print("✗ Class lookup selected the wrong detections")
+            return False
+        pedestrians.consume(np.zeros((0, 4), np.float32), np.zeros(0, np.float32),
+                            np.zeros(0, np.int32), frame.shape)
+        if pedestrians.frames_occupied != 0:
+            print("✗ Empty crosswalk did not reset the wait")
+            return False
+        print("✓ Empty crosswalk resets the wait")
+        return True
+    except Exception as e:
+        print(f"✗ Detection consumers test failed: {e}")
+        return False
+
+def test_preemption():
+    """Test emergency preemption of a running phase"""
+    print_section("TEST 27: Emergency Preemption")
+    
+    try:
+        import socket
+        import tempfile
+        import numpy as np
+        from phase_scheduler import PhaseScheduler
+        from preemption import Preemption, EmergencyVehicleTrigger, PreemptionInputs
+        
+        plans = [[("RED", 0.02), ("GREEN", 10)], [("RED", 10)]]
+        fired = []
+        aborted = []
+        preemption = None
+        
+        def on_transition(state, duration):
+            fired.append((state, time.monotonic()))
+            preemption.lamp_changed(state)
+        
+        scheduler = PhaseScheduler(lambda: plans.pop(0) if plans else [], on_transition)
+        preemption = Preemption(scheduler, yellow_time=0.05, all_red_time=0.02, hold_time=0.05,
+                                on_preempt=lambda: aborted.append(1))
+        scheduler.start()
+        time.sleep(0.1)  # In the middle of a 10 s GREEN
+        
+        triggered = time.monotonic()
+        preemption.trigger('test')
+        time.sleep(0.3)
+        states = [state for state, _ in fired]
+        if states != ["RED", "GREEN", "YELLOW", "RED", "RED"]:
+            print(f"✗ Wrong preemption sequence: {states}")
+            return False
+        response = fired[2][1] - triggered
+        yellow = fired[3][1] - fired[2][1]
+        if response > 0.02 or abs(yellow - 0.05) > 0.02 or not aborted:
+            print(f"✗ Response {response * 1000:.1f} ms, yellow {yellow * 1000:.0f} ms")
+            return False
+        print(f"✓ GREEN -> YELLOW -> all-red in {response * 1000:.2f} ms, then normal cycles resume")
+        
+        # During all-red the hold just restarts
+        before = len(fired)
+        preemption.trigger('test')
+        time.sleep(0.02)
+        if [state for state, _ in fired[before:]] != ["RED"]:
+            print("✗ Trigger during RED did not hold all-red")
+            return False
+        stats = preemption.get_stats()
+        if stats['count'] != 2 or stats['response_max_ms'] > 20 or 'clear_p95_ms' not in stats:
+            print(f"✗ Latency statistics: {stats}")
+            return False
+        print(f"✓ Latencies reported: response max {stats['response_max_ms']} ms, "
+              f"clear p95 {stats['clear_p95_ms']} ms")
+        
+        # Detector class, socket and file inputs
+        triggers = []
+        recorder = type('Recorder', (), {'clock': staticmethod(time.monotonic),
+                                         'trigger': lambda self, source, at=None: triggers.append(source)})()
+        consumer = EmergencyVehicleTrigger(recorder, classes=[80], min_frames=2)
+        detections = (np.array([[0, 0, 50, 50]], np.float32), np.array([0.9], np.float32),
+                      np.array([80], np.int32))
+        for _ in range(3):
+            consumer.consume(*detections, (240, 320, 3))
+        if triggers != ['detector']:
+            print(f"✗ Detector trigger fired {triggers}")
+            return False
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            trigger_file = os.path.join(temp_dir, "preempt.trigger")
+            inputs = PreemptionInputs(recorder, port=0, trigger_file=trigger_file).start()
+            sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sender.sendto(b"PREEMPT siren", ('127.0.0.1', inputs.port))
+            sender.close()
+            open(trigger_file, 'w').close()
+            deadline = time.monotonic() + 1.0
+            while len(triggers) < 3 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            inputs.stop()
+            if sorted(triggers[1:]) != ['file', 'siren'] or os.path.exists(trigger_file):
+                print(f"✗ External inputs fired {triggers[1:]}")
+                return False
+        print("✓ Detector class, UDP datagram and trigger file all preempt")
+        
+        scheduler.stop()
+        return True
+    except Exception as e:
+        print(f"✗ Preemption test failed: {e}")
+        return False
+
+def test_pcu_density():
+    """Test class-weighted demand and vectorized density classification"""
+    print_section("TEST 28: PCU Density")
+    
+    try:
+        import numpy as np
+        from traffic_density_analyzer import TrafficDensityAnalyzer, density_levels, DENSITY_NAMES
+        
+        analyzer = TrafficDensityAnalyzer()
+        buses = analyzer.demand(analyzer.class_counts([2, 2, 2, 5, 5]))      # 3 cars + 2 buses
+        motorcycles = analyzer.demand(analyzer.class_counts([3] * 10))      # 10 motorcycles
+        if buses != 9.0 or motorcycles != 5.0:
+            print(f"✗ Demand {buses} / {motorcycles} PCU (expected 9 / 5)")
+            return False
+        if analyzer.classify_density(buses) != "MEDIUM" or analyzer.classify_density(motorcycles) != "LOW":
+            print("✗ Weighted demand classified wrongly")
+            return False
+        print(f"✓ 5 vehicles with 2 buses = {buses} PCU (MEDIUM); 10 motorcycles = {motorcycles} PCU (LOW)")
+        
+        # Motion tier: calibrated count without classes counts as cars
+        if analyzer.frame_demand(np.full(4, -1), 6) != 6.0 or analyzer.frame_demand([5], 1) != 3.0:
+            print("✗ Frame demand wrong for unclassified vehicles")
+            return False
+        
+        # Classes outside the PCU table (e.g. COCO 9, traffic light) add no demand
+        if analyzer.class_counts([9, 80]).sum() != 0 or analyzer.frame_demand([2, 9], 2) != 1.0:
+            print("✗ Classes without a PCU weight counted as cars")
+            return False
+        print("✓ Unclassified blobs count as cars; classes without a weight add nothing")
+        
+        # One call for many frames matches the scalar classification
+        rng = np.random.default_rng(0)
+        counts = rng.integers(0, 6, (10000, len(analyzer.pcu_table)))
+        demand = analyzer.demand(counts)
+        levels = analyzer.classify_levels(demand)
+        expected = [analyzer.classify_density(value) for value in demand]
+        if list(DENSITY_NAMES[levels]) != expected:
+            print("✗ Vectorized classification differs from classify_density")
+            return False
+        if list(analyzer.green_times_for(levels[:3])) != [analyzer.calculate_green_time(e) for e in expected[:3]]:
+            print("✗ Vectorized green times differ")
+            return False
+        print("✓ 10,000 frames classified in one call, identical to classify_density")
+        
+        # Per-camera thresholds (cameras x frames)
+        per_camera = density_levels([[4, 8, 20], [4, 8, 20]], thresholds=[(5, 15), (3, 6)])
+        if per_camera.tolist() != [[0, 1, 2], [1, 2, 2]]:
+            print(f"✗ Per-camera thresholds gave {per_camera.tolist()}")
+            return False
+        print("✓ Per-camera thresholds applied in the same call")
+        return True
+    except Exception as e:
+        print(f"✗ PCU density test failed: {e}")
+        return False
+
+def test_load_shedding():
+    """Test node-level load shedding across cameras"""
+    print_section("TEST 29: Load Shedding")
+    
+    try:
+        import numpy as np
+        from load_shedder import NodeLoadTable, LoadShedder, plan_levels, ROW_DTYPE
+        
+        # 3 cameras of 1 core each on 2 cores; 'a' is about to be decided
+        rows = np.zeros(3, dtype=ROW_DTYPE)
+        rows['cores'] = 1.0
+        rows['decision_in'] = [2, 30, 60]
+        rows['critical'] = [1, 0, 0]
+        levels = plan_levels(rows, capacity=2)
+        if levels.tolist() != [0, 1, 4]:
+            print(f"✗ Overload shed to {levels.tolist()} (expected [0, 1, 4])")
+            return False
+        print("✓ Overload: critical camera kept, furthest decision shed first")
+        
+        # Load drops a little: levels fall only once under the low watermark
+        rows['level'] = levels
+        rows['cores'] = [1.0, 0.3, 0.3]
+        relaxed = plan_levels(rows, capacity=2)
+        if relaxed.tolist() != [0, 0, 2]:
+            print(f"✗ Recovery gave {relaxed.tolist()} (expected [0, 0, 2])")
+            return False
+        rows['level'] = relaxed
+        if plan_levels(rows, capacity=2).tolist() != relaxed.tolist():
+            print("✗ Levels oscillate at a steady load")
+            return False
+        print("✓ Recovery with hysteresis (no oscillation)")
+        
+        # A late critical camera sheds one more step elsewhere
+        rows['late'] = [0.9, 0, 0]
+        if plan_levels(rows, capacity=2).tolist() != [0, 0, 3]:
+            print("✗ Late critical camera did not shed more")
+            return False
+        print("✓ Late critical camera frees more time")
+        
+        # An exported model's input size is fixed: only its stride reduces the load
+        rows = np.zeros(2, dtype=ROW_DTYPE)
+        rows['cores'] = 1.0
+        rows['decision_in'] = [2, 30]
+        rows['critical'] = [1, 0]
+        resizable = plan_levels(rows, capacity=1.5).tolist()
+        rows['fixed_size'] = [0, 1]
+        fixed = plan_levels(rows, capacity=1.5).tolist()
+        if resizable != [0, 2] or fixed != [0, 3]:
+            print(f"✗ Fixed-size camera shed to {fixed} (resizable {resizable})")
+            return False
+        print("✓ Fixed-size (exported) camera sheds by stride only")
+        
+        # Two processes' shedders sharing one table
+        table = NodeLoadTable(name=f"test_node_load_{os.getpid()}")
+        try:
+            changes = []
+            first = LoadShedder(0, 'north', table=table, capacity=1.0, interval=0)
+            second = LoadShedder(1, 'south', table=table, capacity=1.0, interval=0,
+                                 on_level=lambda stride, scale: changes.append((stride, scale)))
+            first.report(0.03, 0.04, decision_in=2)    # 0.75 cores, critical
+            second.report(0.03, 0.04, decision_in=40)  # 0.75 cores
+            if first.level != 0 or second.level == 0 or not changes:
+                print(f"✗ Shared table levels {first.level} / {second.level}")
+                return False
+            detected = sum(second.should_detect(n) for n in range(100))
+            state = second.get_state()
+            if detected != 100 // state['stride'] or len(state['cameras']) != 2:
+                print(f"✗ Shedding state {state}")
+                return False
+            print(f"✓ Shared table: 'south' at level {state['level']} (every {state['stride']} frames, "
+                  f"{state['scale']:.0%} size), node load {state['node_load']:.0%}")
+            
+            first.close()
+            if len(table.snapshot()[0]) != 1:
+                print("✗ Closed camera still in the table")
+                return False
+            print("✓ Stopped cameras leave the table")
+            
+            fixed = LoadShedder(2, 'east', table=table, capacity=0.1, interval=0, resizable=False)
+            fixed.report(0.03, 0.04, decision_in=40)
+            if fixed.level == 0 or fixed.scale != 1.0:
+                print(f"✗ Fixed-size shedder at level {fixed.level}, scale {fixed.scale}")
+                return False
+            try:
+                LoadShedder(len(table.rows), 'west', table=table)
+                print("✗ Slot beyond the table accepted")
+                return False
+            except ValueError:
+                pass
+            print("✓ Fixed-size shedder keeps scale 1.0; out-of-range slot raises ValueError")
+        finally:
+            table.unlink()
+            table.close()
+        return True
+    except Exception as e:
+        print(f"✗ Load shedding test failed: {e}")
+        return False
+
+def test_camera_snapshots():
+    """Test cached snapshots with ETags and the multi-camera mosaic"""
+    print_section("TEST 30: Camera Snapshots")
+    
+    try:
+        import cv2
+        import numpy as np
+        from frame_channel import FrameChannel, channel_name
+        from camera_snapshots import CameraFeed, MosaicComposer
+        
+        cameras = [f"test{os.getpid()}a", f"test{os.getpid()}b"]
+        channels = [FrameChannel(channel_name(camera), create=True, max_jpeg_bytes=1 << 20)
+                    for camera in cameras]
+        empty = np.zeros((0, 4), np.float32), np.zeros(0), np.zeros(0, np.int32)
+        def publish(index, value):
+            frame = np.full((720, 1280, 3), value, np.uint8)
+            channels[index].publish(cv2.imencode('.jpg', frame)[1], *empty, width=1280, height=720)
+        try:
+            publish(0, 100)
+            publish(1, 200)
+            feeds = [CameraFeed(camera) for camera in cameras]
+            jpeg, etag = feeds[0].latest()
+            if jpeg is None or feeds[0].latest()[1] != etag:
+                print("✗ Snapshot missing or its ETag changed without a new frame")
+                return False
+            publish(0, 120)
+            if feeds[0].latest()[1] == etag:
+                print("✗ ETag did not change with a new frame")
+                return False
+            print("✓ Snapshot ETag is stable per frame and changes with the next one")
+            
+            # Route: 200 with ETag, then 304 for a matching If-None-Match
+            sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dashboard'))
+            import app_production
+            app_production.camera_feeds[cameras[0]] = feeds[0]
+            client = app_production.app.test_client()
+            try:
+                first = client.get(f'/api/snapshot/{cameras[0]}.jpg')
+                again = client.get(f'/api/snapshot/{cameras[0]}.jpg',
+                                   headers={'If-None-Match': first.headers.get('ETag', '')})
+                unknown = client.get('/api/snapshot/nonexistent.jpg')
+            finally:
+                del app_production.camera_feeds[cameras[0]]
+            if (first.status_code, again.status_code, unknown.status_code) != (200, 304, 404) \
+                    or first.data[:2] != b'\xff\xd8' or again.data:
+                print(f"✗ Snapshot route returned {first.status_code}/{again.status_code}/{unknown.status_code}")
+                return False
+            print("✓ /api/snapshot/<camera>.jpg: 200 with ETag, then 304 Not Modified")
+            
+            # Mosaic: one frame for both cameras, tiles decoded only when they change
+            mosaic = MosaicComposer(feeds + [CameraFeed("offline-camera")], tile_width=320, tile_height=180)
+            composed = mosaic.compose()
+            if composed is None or composed.shape != (360, 640, 3):
+                print("✗ Mosaic has the wrong layout")
+                return False
+            if abs(int(composed[120, 160, 0]) - 120) > 10 or abs(int(composed[120, 480, 0]) - 200) > 10:
+                print("✗ Mosaic tiles show the wrong cameras")
+                return False
+            if mosaic.compose() is not None or mosaic.tiles_decoded != 2:
+                print("✗ Unchanged cameras were decoded again")
+                return False
+            publish(1, 50)
+            if mosaic.compose() is None or mosaic.tiles_decoded != 3:
+                print("✗ New frame did not update only its tile")
+                return False
+            print("✓ Mosaic of 3 cameras in one frame; only changed tiles are decoded")
+        finally:
+            for channel in channels:
+                channel.close()
+        
+        # Fallback to the dashboard's own stream with no /video_feed viewer:
+        # polling produces frames, and a stale fallback frame is not served
+        from frame_broadcaster import FrameBroadcaster
+        produced = []
+        def produce():
+            produced.append(len(produced))
+            return np.full((90, 160, 3), len(produced) * 10 % 250, np.uint8)
+        broadcaster = FrameBroadcaster(produce, fps=50)
+        feed = CameraFeed(f"test{os.getpid()}-standalone", fallback=broadcaster.snapshot)
+        jpeg, etag = feed.latest()
+        if jpeg is None or broadcaster.viewers != 0:
+            print("✗ Fallback snapshot has no frame without a stream viewer")
+            return False
+        time.sleep(0.1)
+        if feed.latest()[1] == etag:
+            print("✗ Fallback snapshot frozen without a stream viewer")
+            return False
+        stale = CameraFeed("stale", fallback=lambda: (1, jpeg, time.time() - 60))
+        if stale.latest() != (None, None):
+            print("✗ Stale fallback frame served")
+            return False
+        print(f"✓ Fallback snapshots produce frames without viewers ({len(produced)} so far); "
+              f"stale ones are not served")
+        return True
+    except Exception as e:
+        print(f"✗ Camera snapshots test failed: {e}")
+        return False
+
+def test_status_board():
+    """Test per-camera status served from bytes serialized once per tick"""
+    print_section("TEST 31: Camera Status API")
+    
+    try:
+        import json
+        import threading
+        from shared_state import get_state_manager, state_file_name
+        from status_board import StatusBoard
+        
+        cameras = ["main", f"test{os.getpid()}n", f"test{os.getpid()}s"]
+        managers = [get_state_manager(camera) for camera in cameras[1:]]
+        try:
+            managers[0].update_state(signal_state='GREEN', vehicle_count=7, density='MEDIUM')
+            managers[1]._write_state(dict(managers[1].default_state, last_update=0))  # Stopped long ago
+            board = StatusBoard(cameras + [f"test{os.getpid()}x"])  # The last one never ran
+            board.refresh({'main': {'signal_state': 'RED', 'vehicle_count': 2, 'synced': False}})
+            never_ran = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                     state_file_name(f"test{os.getpid()}x"))
+            if os.path.exists(never_ran) or json.loads(board.status_body(f"test{os.getpid()}x"))['synced']:
+                print("✗ Reading a camera that never ran created its state")
+                return False
+            
+            body = board.status_body(cameras[1])
+            status = json.loads(body)
+            if (status['camera'], status['signal_state'], status['vehicle_count'], status['synced']) \
+                    != (cameras[1], 'GREEN', 7, True):
+                print(f"✗ Wrong camera status: {status}")
+                return False
+            if json.loads(board.status_body(cameras[2]))['synced']:
+                print("✗ Stopped camera reported as synced")
+                return False
+            listing = json.loads(board.cameras_body())['cameras']
+            if [c['camera'] for c in listing][:3] != cameras or listing[0]['vehicle_count'] != 2:
+                print("✗ Camera list has the wrong cameras or order")
+                return False
+            if board.status_body(cameras[1]) is not body or board.status_body("nonexistent") is not None:
+                print("✗ Status was re-serialized between ticks")
+                return False
+            print("✓ One serialization per tick; stale cameras are reported as not synced")
+            
+            # Routes: the cached bytes, 404 for unknown cameras
+            sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dashboard'))
+            import app_production
+            previous, app_production.status_board = app_production.status_board, board
+            client = app_production.app.test_client()
+            try:
+                listed = client.get('/api/cameras')
+                one = client.get(f'/api/cameras/{cameras[1]}/status')
+                unknown = client.get('/api/cameras/nonexistent/status')
+            finally:
+                app_production.status_board = previous
+            if (listed.status_code, one.status_code, unknown.status_code) != (200, 200, 404) \
+                    or one.data != body or listed.mimetype != 'application/json':
+                print(f"✗ Camera routes returned {listed.status_code}/{one.status_code}/{unknown.status_code}")
+                return False
+            print("✓ /api/cameras and /api/cameras/<id>/status serve the cached bytes")
+            
+            # Writes replace the file whole: another process's reader never sees it torn
+            from shared_state import SharedStateManager
+            reader = SharedStateManager(state_file_name(cameras[1]), create=False)
+            stop = threading.Event()
+            def write():
+                while not stop.is_set():
+                    managers[0].update_state(signal_state='GREEN', vehicle_count=7,
+                                             history=list(range(2000)))
+            writer = threading.Thread(target=write)
+            writer.start()
+            try:
+                failed = sum(reader.read_state() is None for _ in range(300))
+            finally:
+                stop.set()
+                writer.join()
+            if failed:
+                print(f"✗ {failed} of 300 reads saw a partially written state file")
+                return False
+            
+            # An unreadable file keeps the camera's last status (not the defaults)
+            managers[0].state_file.write_text('{"signal_state": "GR')
+            board.refresh()
+            status = json.loads(board.status_body(cameras[1]))
+            if (status['signal_state'], status['vehicle_count']) != ('GREEN', 7):
+                print(f"✗ Unreadable state published as {status}")
+                return False
+            print("✓ Atomic state writes; an unreadable file keeps the last status")
+        finally:
+            for manager in managers:
+                manager.state_file.unlink(missing_ok=True)
+        if state_file_name("main") != "traffic_state.json":
+            print("✗ Camera 'main' must keep the original state file")
+            return False
+        return True
+    except Exception as e:
+        print(f"✗ Camera status test failed: {e}")
+        return False
+
+def test_telemetry():
+    """Test binary telemetry: spooling during an outage and in-order replay"""
+    print_section("TEST 32: Edge Telemetry")
+    
+    try:
+        import socket
+        import tempfile
+        import numpy as np
+        from telemetry import TelemetryPublisher, TelemetrySpool, RECORD_DTYPE, decode_batch, encode_batch
+        from telemetry_aggregator import TelemetryAggregator
+        
+        # A port with no aggregator yet: the central site is down
+        probe = socket.socket()
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+        probe.close()
+        
+        with tempfile.TemporaryDirectory() as directory:
+            spool = os.path.join(directory, "spool.bin")
+            publisher = TelemetryPublisher(f"tcp://127.0.0.1:{port}", "test/main", spool_path=spool,
+                                           batch_size=4, flush_interval=0.05, retry_interval=0.05)
+            aggregator = None
+            try:
+                for i in range(12):
+                    publisher.record("GREEN", i, "LOW", cycle_count=i)
+                publisher.flush()
+                if publisher.get_stats()['spooled_bytes'] == 0:
+                    print("✗ Records were not spooled during the outage")
+                    return False
+                print(f"✓ Outage: {publisher.get_stats()['spooled_bytes']} bytes spooled to disk")
+                
+                aggregator = TelemetryAggregator(port=port).start()
+                for i in range(12, 20):
+                    publisher.record("RED", i, "HIGH", cycle_count=i)
+                publisher.flush()
+                deadline = time.time() + 5
+                while aggregator.records < 20 and time.time() < deadline:
+                    time.sleep(0.02)
+                node = aggregator.get_node("test/main")
+                if node is None or (node['records'], node['lost'], node['cycle_count']) != (20, 0, 19) \
+                        or publisher.get_stats()['spooled_bytes'] or os.path.exists(spool):
+                    print(f"✗ Replay incomplete or out of order: {node}, {publisher.get_stats()}")
+                    return False
+                print("✓ Spool replayed in order, then live records (20 received, none lost)")
+            finally:
+                publisher.close()
+                if aggregator is not None:
+                    aggregator.stop()
+            
+            # Replays already received are dropped; a restarted publisher starts a new session
+            aggregator = TelemetryAggregator(port=0)
+            records = np.zeros(5, dtype=RECORD_DTYPE)
+            records['cycle_count'] = np.arange(5)
+            aggregator.ingest(encode_batch("n", 1.0, 0, records))
+            aggregator.ingest(encode_batch("n", 1.0, 0, records))         # Replayed again
+            aggregator.ingest(encode_batch("n", 1.0, 8, records))         # 3 never arrived
+            aggregator.ingest(encode_batch("n", 2.0, 0, records[:2]))     # Restarted
+            aggregator.ingest(b"not telemetry")
+            aggregator.stop()
+            node = aggregator.get_node("n")
+            if (node['records'], node['duplicates'], node['lost'], aggregator.invalid) != (12, 5, 3, 1):
+                print(f"✗ Sequence checks wrong: {node}")
+                return False
+            if decode_batch(encode_batch("n", 1.0, 7, records))[2] != 7 or RECORD_DTYPE.itemsize != 26:
+                print("✗ Batch layout changed")
+                return False
+            print("✓ Duplicates dropped, gaps counted as lost, restarts detected")
+            
+            # Torn write at the spool's tail is discarded, not replayed
+            torn = TelemetrySpool(os.path.join(directory, "torn.bin"))
+            torn.append(encode_batch("n", 1.0, 0, records)[:-3])
+            if torn.peek() is not None or torn.pending_bytes:
+                print("✗ Torn spool entry was replayed")
+                return False
+        return True
+    except Exception as e:
+        print(f"✗ Telemetry test failed: {e}")
+        return False
+
 def run_all_tests():
     """Run all tests and provide summary"""
     print("\n" + "█"*60)
@@ -292,7 +1969,30 @@ def run_all_tests():
         ("Arduino Ports", test_arduino_port),
         ("Video File", test_video_path),
         ("Dashboard Files", test_dashboard_files),
-        ("Project Structure", test_project_structure)
+        ("Project Structure", test_project_structure),
+        ("Network Camera", test_network_camera),
+        ("Benchmark Suite", test_benchmark_suite),
+        ("Frame Broadcaster", test_frame_broadcaster),
+        ("Time-Series Store", test_time_series_store),
+        ("History Database", test_history_database),
+        ("Traffic Simulator", test_traffic_simulator),
+        ("Detection Cache", test_detection_cache),
+        ("Frame Channel", test_frame_channel),
+        ("Tiered Detector", test_tiered_detector),
+        ("Tiled Detection", test_tiled_detection),
+        ("Frame Pool", test_frame_pool),
+        ("CPU Resources", test_cpu_resources),
+        ("Model Auto-Tuner", test_model_tuner),
+        ("Phase Scheduler", test_phase_scheduler),
+        ("Event Log", test_event_log),
+        ("Sampling Profiler", test_sampling_profiler),
+        ("Detection Consumers", test_detection_consumers),
+        ("Emergency Preemption", test_preemption),
+        ("PCU Density", test_pcu_density),
+        ("Load Shedding", test_load_shedding),
+        ("Camera Snapshots", test_camera_snapshots),
+        ("Camera Status API", test_status_board),
+        ("Edge Telemetry", test_telemetry)
     ]
     
     results = []
@@ -0,0 +1,232 @@
+"""
+Tiered Vehicle Detection
+Runs full YOLO while it keeps within the per-frame latency budget and falls
+back to a cheap motion blob counter (OpenCV MOG2) when it does not, so the
+signal controller always gets a timely count. Blob counts are calibrated
+against YOLO so density levels mean the same thing in both tiers
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+from event_log import log_event
+
+TIER_YOLO = 'yolo'
+TIER_MOTION = 'motion'
+
+
+class BlobCounter:
+    def __init__(self, width=320, min_area=150, history=300, var_threshold=25, warmup_frames=30):
+        """
+        Count moving objects with background subtraction
+        width: frames are downscaled to this width first
+        min_area: smallest blob (pixels at the downscaled size) counted as a vehicle
+        warmup_frames: frames before the background model is trusted
+        """
+        self.width = width
+        self.min_area = min_area
+        self.warmup_frames = warmup_frames
+        self.frames_seen = 0
+        self.subtractor = cv2.createBackgroundSubtractorMOG2(
+            history=history, varThreshold=var_threshold, detectShadows=False)
+        self.kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+
+    def count(self, frame):
+        """
+        Update the background model and find moving blobs
+        Returns: (blob count, boxes as N x 4 xyxy in full-frame pixels)
+        """
+        scale = min(self.width / frame.shape[1], 1.0)
+        small = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) \
+            if scale < 1.0 else frame
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+        mask = self.subtractor.apply(gray)
+        self.frames_seen += 1
+        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, self.kernel)
+        mask = cv2.dilate(mask, self.kernel, iterations=2)
+
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        boxes = [cv2.boundingRect(c) for c in contours if cv2.contourArea(c) >= self.min_area]
+        if not boxes:
+            return 0, np.zeros((0, 4), np.float32)
+        boxes = np.array(boxes, dtype=np.float32)
+        boxes[:, 2:] += boxes[:, :2]  # xywh -> xyxy
+        return len(boxes), boxes / scale
+
+    @property
+    def ready(self):
+        """True once the background model has seen enough frames"""
+        return self.frames_seen >= self.warmup_frames
+
+
+class TieredDetector:
+    def __init__(self, detector, budget=0.1, demote_after=3, promote_after=3,
+                 probe_interval=5.0, promote_ratio=0.7):
+        """
+        Wrap a VehicleDetector with a motion-counter fallback
+        budget: per-frame detection latency allowed (seconds)
+        demote_after: consecutive over-budget frames before switching to motion
+        promote_after: consecutive probes under promote_ratio * budget before
+                       switching back to YOLO
+        probe_interval: seconds between YOLO probe frames while on motion
+        """
+        self.detector = detector
+        self.blob_counter = BlobCounter()
+        self.budget = budget
+        self.demote_after = demote_after
+        self.promote_after = promote_after
+        self.probe_interval = probe_interval
+        self.promote_ratio = promote_ratio
+
+        self.tier = TIER_YOLO
+        self.yolo_latency = 0.0    # EWMA of YOLO latency (seconds)
+        self.motion_latency = 0.0  # EWMA of blob counter latency (seconds)
+        self.over_budget = 0
+        self.under_budget = 0
+        self.last_probe = 0.0
+        self.tier_changes = 0
+        self.frames = {TIER_YOLO: 0, TIER_MOTION: 0}
+
+        # Calibration: vehicles per blob, fitted on frames where both tiers ran
+        # (exponentially weighted least squares through the origin)
+        self.calibration_weight = 0.05
+        self._sum_xy = 0.0
+        self._sum_xx = 0.0
+        self.scale = 1.0
+
+        self.last_detections = detector.last_detections
+        self.last_tier = TIER_YOLO  # Tier that produced last_detections
+        self.consumer_results = {}
+
+    @property
+    def resizable(self):
+        return self.detector.resizable
+
+    def set_input_size(self, imgsz):
+        """Change the YOLO tier's input size"""
+        self.detector.set_input_size(imgsz)
+
+    def add_consumer(self, consumer):
+        """Register an analytic on the YOLO tier (motion frames have no classes)"""
+        return self.detector.add_consumer(consumer)
+
+    @property
+    def cache(self):
+        return self.detector.cache
+
+    @cache.setter
+    def cache(self, cache):
+        self.detector.cache = cache
+
+    def detect_vehicles(self, frame, frame_index=None):
+        """
+        Detect vehicles with the tier the latency budget allows
+        Returns: number of vehicles detected and annotated frame
+        """
+        # The background model is updated every frame so the motion tier is
+        # always warm (this is also the calibration input)
+        start = time.perf_counter()
+        blobs, blob_boxes = self.blob_counter.count(frame)
+        self.motion_latency = self._ewma(self.motion_latency, time.perf_counter() - start)
+
+        now = time.monotonic()
+        if self.tier == TIER_YOLO or now - self.last_probe >= self.probe_interval:
+            if self.tier == TIER_MOTION:
+                self.last_probe = now
+            start = time.perf_counter()
+            count, annotated = self.detector.detect_vehicles(frame, frame_index)
+            latency = time.perf_counter() - start
+            self.yolo_latency = self._ewma(self.yolo_latency, latency)
+            self.last_detections = self.detector.last_detections
+            self.consumer_results = self.detector.consumer_results
+            self.last_tier = TIER_YOLO
+            self._calibrate(blobs, count)
+            self._update_tier(latency)
+            self.frames[TIER_YOLO] += 1
+            return count, annotated
+
+        count = self.calibrated_count(blobs)
+        # No classes on motion frames: the analytics are unknown (not the last
+        # YOLO frame's results) and their consecutive-frame streaks restart
+        for consumer in self.detector.consumers:
+            consumer.reset()
+        self.consumer_results = {consumer.name: None for consumer in self.detector.consumers}
+        self.last_detections = (blob_boxes, np.ones(len(blob_boxes), np.float32),
+                                np.full(len(blob_boxes), -1, np.int32))
+        self.last_tier = TIER_MOTION
+        self.frames[TIER_MOTION] += 1
+        return count, self.annotate(frame)
+
+    def annotate(self, frame):
+        """
+        Draw the last detections (YOLO boxes or motion blobs) onto a copy of the frame
+        Returns: annotated frame (the caller owns it)
+        """
+        if self.last_tier == TIER_MOTION:
+            return self.draw_blobs(self.detector.output_frame(frame), self.last_detections[0])
+        return self.detector.annotate(frame, self.last_detections)
+
+    @staticmethod
+    def _ewma(average, value, weight=0.2):
+        """Exponentially weighted moving average (first value taken as is)"""
+        return value if average == 0.0 else (1 - weight) * average + weight * value
+
+    def _calibrate(self, blobs, vehicles):
+        """Fold one (blob count, YOLO count) pair into the vehicles-per-blob scale"""
+        if blobs == 0 or not self.blob_counter.ready:
+            return
+        decay = 1 - self.calibration_weight
+        self._sum_xy = decay * self._sum_xy + blobs * vehicles
+        self._sum_xx = decay * self._sum_xx + blobs * blobs
+        self.scale = self._sum_xy / self._sum_xx
+
+    def calibrated_count(self, blobs):
+        """Convert a blob count into an equivalent YOLO vehicle count"""
+        return int(round(blobs * self.scale))
+
+    def _update_tier(self, latency):
+        """Demote after sustained over-budget frames, promote after fast probes"""
+        if self.tier == TIER_YOLO:
+            self.over_budget = self.over_budget + 1 if latency > self.budget else 0
+            if self.over_budget >= self.demote_after:
+                self._set_tier(TIER_MOTION)
+                self.last_probe = time.monotonic()
+        else:
+            fast = latency <= self.budget * self.promote_ratio
+            self.under_budget = self.under_budget + 1 if fast else 0
+            if self.under_budget >= self.promote_after:
+                self._set_tier(TIER_YOLO)
+
+    def _set_tier(self, tier):
+        """Switch tiers and reset the hysteresis counters"""
+        log_event('detector.tier_changed', 'warning' if tier == TIER_MOTION else 'info',
+                  previous=self.tier, tier=tier, yolo_latency_ms=round(self.yolo_latency * 1000, 1),
+                  budget_ms=round(self.budget * 1000, 1))
+        self.tier = tier
+        self.over_budget = 0
+        self.under_budget = 0
+        self.tier_changes += 1
+
+    @staticmethod
+    def draw_blobs(frame, boxes):
+        """Draw motion blobs (orange) onto a frame so the fallback tier is visible"""
+        for x1, y1, x2, y2 in boxes.astype(int):
+            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 165, 255), 2)
+        cv2.putText(frame, "MOTION TIER", (frame.shape[1] - 190, 60),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 165, 255), 2)
+        return frame
+
+    def get_stats(self):
+        """Get tier, latency and calibration statistics"""
+        return {
+            'tier': self.tier,
+            'budget_ms': round(self.budget * 1000, 1),
+            'yolo_latency_ms': round(self.yolo_latency * 1000, 1),
+            'motion_latency_ms': round(self.motion_latency * 1000, 1),
+            'vehicles_per_blob': round(self.scale, 3),
+            'tier_changes': self.tier_changes,
+            'frames': dict(self.frames)
+        }
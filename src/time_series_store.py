@@ -0,0 +1,224 @@
+"""
+Time-Series Store
+Fixed-size, array-backed history of traffic metrics with per-second samples
+and minute/hour rollups, all updated incrementally on insert
+"""
+
+import os
+import time
+from pathlib import Path
+from threading import Lock
+
+import numpy as np
+
+# Snapshot written by main.py and read by the dashboard
+DEFAULT_HISTORY_FILE = Path(__file__).parent / "traffic_history.npz"
+
+# Metrics recorded for every sample
+METRICS = ('vehicle_count', 'density_level', 'green_time', 'green_share', 'phase_changes')
+
+# Resolution levels: name -> (bucket size in seconds, number of buckets kept)
+LEVELS = {
+    'second': (1, 3600),      # 1 hour of per-second samples
+    'minute': (60, 1440),     # 24 hours of minutes
+    'hour': (3600, 720)       # 30 days of hours
+}
+
+DENSITY_LEVELS = {'LOW': 0, 'MEDIUM': 1, 'HIGH': 2}
+
+DURATION_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_duration(text, default):
+    """Parse '90', '15m', '24h' or '7d' into seconds"""
+    if not text:
+        return default
+    text = str(text).strip().lower()
+    try:
+        if text[-1] in DURATION_UNITS:
+            return int(float(text[:-1]) * DURATION_UNITS[text[-1]])
+        return int(float(text))
+    except (ValueError, OverflowError):  # Not a number, or inf / out of range
+        return default
+
+
+class RollupLevel:
+    def __init__(self, step, capacity, num_metrics):
+        """Ring of aggregation buckets (sum/min/max/count per metric)"""
+        self.step = step
+        self.capacity = capacity
+        self.bucket_ids = np.full(capacity, -1, dtype=np.int64)
+        self.counts = np.zeros(capacity, dtype=np.int32)
+        self.sums = np.zeros((capacity, num_metrics), dtype=np.float64)
+        self.mins = np.zeros((capacity, num_metrics), dtype=np.float32)
+        self.maxs = np.zeros((capacity, num_metrics), dtype=np.float32)
+
+    def add(self, timestamp, values):
+        """Fold one sample into its bucket (resetting the slot if it is old)"""
+        bucket = int(timestamp // self.step)
+        index = bucket % self.capacity
+        if self.bucket_ids[index] != bucket:
+            self.bucket_ids[index] = bucket
+            self.counts[index] = 0
+            self.sums[index] = 0
+            self.mins[index] = values
+            self.maxs[index] = values
+        else:
+            np.minimum(self.mins[index], values, out=self.mins[index])
+            np.maximum(self.maxs[index], values, out=self.maxs[index])
+        self.sums[index] += values
+        self.counts[index] += 1
+
+    def window(self, end_bucket, num_buckets):
+        """
+        Get the buckets ending at end_bucket in time order
+        Returns: bucket ids, valid mask, counts, sums, mins, maxs
+        """
+        bucket_ids = np.arange(end_bucket - num_buckets + 1, end_bucket + 1)
+        indexes = bucket_ids % self.capacity
+        valid = self.bucket_ids[indexes] == bucket_ids
+        return (bucket_ids, valid, self.counts[indexes], self.sums[indexes],
+                self.mins[indexes], self.maxs[indexes])
+
+
+class TimeSeriesStore:
+    def __init__(self):
+        """Create an empty store (memory is allocated once and never grows)"""
+        self.metrics = METRICS
+        self.levels = {name: RollupLevel(step, capacity, len(METRICS))
+                       for name, (step, capacity) in LEVELS.items()}
+        self.lock = Lock()
+
+    def record(self, timestamp=None, **values):
+        """
+        Add a sample to every resolution level
+        values: metric name -> number (missing metrics count as 0)
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        sample = np.array([float(values.get(name, 0)) for name in self.metrics])
+        with self.lock:
+            for level in self.levels.values():
+                level.add(timestamp, sample)
+
+    def record_state(self, state, phase_changed=False, timestamp=None):
+        """Add a sample from a traffic state dictionary (as used by the dashboard)"""
+        self.record(
+            timestamp,
+            vehicle_count=state.get('vehicle_count', 0),
+            density_level=DENSITY_LEVELS.get(state.get('density'), 0),
+            green_time=state.get('green_time', 0),
+            green_share=1 if state.get('signal_state') == 'GREEN' else 0,
+            phase_changes=1 if phase_changed else 0
+        )
+
+    def choose_level(self, range_seconds, step):
+        """Pick the coarsest level that still has the requested step and covers the range"""
+        candidates = [(name, level) for name, level in self.levels.items()
+                      if level.step <= step and level.step * level.capacity >= range_seconds]
+        if candidates:
+            return max(candidates, key=lambda item: item[1].step)
+        # Nothing fine enough covers the range: use the finest level that does
+        covering = [(name, level) for name, level in self.levels.items()
+                    if level.step * level.capacity >= range_seconds]
+        if covering:
+            return min(covering, key=lambda item: item[1].step)
+        # Nothing covers the range: use the longest-lived level
+        return max(self.levels.items(), key=lambda item: item[1].step)
+
+    def query(self, range_seconds=3600, step=60, end=None):
+        """
+        Get pre-aggregated history
+        range_seconds: how far back to go
+        step: seconds per returned point (rounded to a multiple of the level step)
+        Returns: dictionary with timestamps and avg/min/max/sum per metric
+        """
+        if end is None:
+            end = time.time()
+        name, level = self.choose_level(range_seconds, step)
+
+        # Combine `factor` level buckets into each returned point (at most the level's span)
+        factor = min(max(int(step // level.step), 1), level.capacity)
+        num_points = max(int(np.ceil(range_seconds / (level.step * factor))), 1)
+        num_points = min(num_points, level.capacity // factor)
+        if num_points == 0:
+            return {'resolution': name, 'step': level.step * factor, 'timestamps': [], 'samples': [],
+                    'metrics': {metric: {'avg': [], 'min': [], 'max': [], 'sum': []}
+                                for metric in self.metrics}}
+        end_bucket = int(end // level.step)
+        end_bucket += -(end_bucket + 1) % factor  # Align to the step grid (last point may be partial)
+
+        with self.lock:
+            bucket_ids, valid, counts, sums, mins, maxs = level.window(end_bucket, num_points * factor)
+
+        # Vectorized downsampling: reshape to (points, factor, ...) and reduce
+        valid = valid.reshape(num_points, factor)
+        counts = np.where(valid, counts.reshape(num_points, factor), 0).sum(axis=1)
+        sums = np.where(valid[..., None], sums.reshape(num_points, factor, -1), 0).sum(axis=1)
+        mins = np.where(valid[..., None], mins.reshape(num_points, factor, -1), np.inf).min(axis=1)
+        maxs = np.where(valid[..., None], maxs.reshape(num_points, factor, -1), -np.inf).max(axis=1)
+
+        has_data = counts > 0
+        averages = sums / np.maximum(counts, 1)[:, None]
+
+        def column(array, i):
+            return [round(float(v), 3) if ok else None for v, ok in zip(array[:, i], has_data)]
+
+        return {
+            'resolution': name,
+            'step': level.step * factor,
+            'timestamps': (bucket_ids.reshape(num_points, factor)[:, 0] * level.step).tolist(),
+            'samples': counts.tolist(),
+            'metrics': {
+                metric: {
+                    'avg': column(averages, i),
+                    'min': column(mins, i),
+                    'max': column(maxs, i),
+                    'sum': column(sums, i)
+                } for i, metric in enumerate(self.metrics)
+            }
+        }
+
+    def save(self, path):
+        """Write all levels to an .npz file (atomic replace, for other processes)"""
+        # Per process; the lock covers the replace, so threads never share a temp file
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        arrays = {}
+        with self.lock:
+            for name, level in self.levels.items():
+                arrays[f"{name}_bucket_ids"] = level.bucket_ids
+                arrays[f"{name}_counts"] = level.counts
+                arrays[f"{name}_sums"] = level.sums
+                arrays[f"{name}_mins"] = level.mins
+                arrays[f"{name}_maxs"] = level.maxs
+            with open(temp_path, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Load a store written by save()"""
+        store = cls()
+        with np.load(path) as data:
+            for name, level in store.levels.items():
+                level.bucket_ids = data[f"{name}_bucket_ids"]
+                level.counts = data[f"{name}_counts"]
+                level.sums = data[f"{name}_sums"]
+                level.mins = data[f"{name}_mins"]
+                level.maxs = data[f"{name}_maxs"]
+        return store
+
+
+# Example usage
+if __name__ == "__main__":
+    store = TimeSeriesStore()
+    start = time.time() - 2 * 3600
+
+    # Two hours of samples at 2 Hz
+    for i in range(2 * 3600 * 2):
+        store.record(start + i * 0.5, vehicle_count=i % 20, density_level=1)
+
+    history = store.query(range_seconds=2 * 3600, step=600)
+    print(f"Resolution: {history['resolution']}, step: {history['step']}s")
+    print(f"Points: {len(history['timestamps'])}")
+    print(f"Average vehicles: {history['metrics']['vehicle_count']['avg']}")
@@ -1,23 +1,110 @@
 """
 Traffic Density Classification
-Classifies traffic as LOW, MEDIUM, or HIGH based on vehicle count
+Classifies traffic as LOW, MEDIUM, or HIGH based on demand: the vehicle count
+weighted by road space (passenger car units, PCU), so a bus counts more than
+a motorcycle. Arrays of cameras or frames are classified in one call
 """
 
+import numpy as np
+
+# Passenger car units per COCO vehicle class (typical HCM/IRC equivalents)
+# 2: car, 3: motorcycle, 5: bus, 7: truck
+PCU_WEIGHTS = {2: 1.0, 3: 0.5, 5: 3.0, 7: 2.5}
+
+# Vehicles without a class (motion tier blobs) count as cars
+UNCLASSIFIED_PCU = 1.0
+
+# Density level index -> name (level indices are what the array methods return)
+DENSITY_NAMES = np.array(["LOW", "MEDIUM", "HIGH"])
+
+
+def density_levels(demand, thresholds=(5, 15)):
+    """
+    Classify any array of demand values in one call
+    thresholds: (low, medium) upper bounds, or one pair per camera for demand
+                shaped (cameras, ...)
+    Returns: array of level indices (0 LOW, 1 MEDIUM, 2 HIGH)
+    """
+    demand = np.asarray(demand, dtype=float)
+    thresholds = np.asarray(thresholds, dtype=float)
+    if thresholds.ndim == 1:
+        return np.digitize(demand, thresholds, right=True)
+    # Per-camera thresholds, broadcast along the remaining axes of demand
+    bounds = thresholds.reshape((len(thresholds),) + (1,) * (demand.ndim - 1) + (2,))
+    return (demand[..., None] > bounds).sum(axis=-1)
+
+
 class TrafficDensityAnalyzer:
-    def __init__(self):
+    def __init__(self, low_threshold=5, medium_threshold=15, pcu_weights=None):
+        """
+        low_threshold / medium_threshold: upper bounds of LOW and MEDIUM demand
+                                          (PCU; set per camera for its view)
+        pcu_weights: class ID -> passenger car units (default PCU_WEIGHTS)
+        """
         # Define thresholds (adjust based on your needs)
-        self.low_threshold = 5      # 0-5 vehicles = LOW
-        self.medium_threshold = 15  # 6-15 vehicles = MEDIUM
-                                    # 16+ vehicles = HIGH
+        self.low_threshold = low_threshold        # 0-5 PCU = LOW
+        self.medium_threshold = medium_threshold  # 5-15 PCU = MEDIUM
+                                                  # 15+ PCU = HIGH
+        
+        # Class ID -> PCU table; the last slot is for unclassified vehicles
+        weights = PCU_WEIGHTS if pcu_weights is None else pcu_weights
+        self.pcu_table = np.zeros(max(weights) + 2)
+        for class_id, weight in weights.items():
+            self.pcu_table[class_id] = weight
+        self.pcu_table[-1] = UNCLASSIFIED_PCU
+        
+        # Base timings per level (adjust as needed): LOW 10 s, MEDIUM 20 s, HIGH 30 s
+        self.green_times = np.array([10, 20, 30])
+        self._green_by_name = dict(zip(DENSITY_NAMES.tolist(), self.green_times.tolist()))
     
-    def classify_density(self, vehicle_count):
+    @property
+    def thresholds(self):
+        return (self.low_threshold, self.medium_threshold)
+    
+    def class_counts(self, class_ids):
+        """
+        Count detections per class
+        Returns: counts indexed like pcu_table; unclassified detections (ID < 0)
+                 go in the last slot, classes without a PCU weight are dropped
         """
-        Classify traffic density based on vehicle count
+        class_ids = np.asarray(class_ids, dtype=int)
+        unclassified = len(self.pcu_table) - 1
+        class_ids = class_ids[class_ids < unclassified]
+        return np.bincount(np.where(class_ids >= 0, class_ids, unclassified), minlength=len(self.pcu_table))
+    
+    def demand(self, class_counts):
+        """
+        Demand in PCU from per-class counts
+        class_counts: one count vector, or an array of them (frames/cameras x classes)
+        """
+        return np.asarray(class_counts) @ self.pcu_table
+    
+    def frame_demand(self, class_ids, vehicle_count):
+        """
+        Demand of one frame's vehicle detections
+        vehicle_count: the detector's count; vehicles it counted without a
+                       class (motion tier) are added as unclassified
+        """
+        counts = self.class_counts(class_ids)
+        classified = np.count_nonzero(np.asarray(class_ids) >= 0)
+        counts[-1] = max(vehicle_count - classified, 0)
+        return float(self.demand(counts))
+    
+    def classify_levels(self, demand):
+        """
+        Classify an array of demand values (e.g. every frame of a recording)
+        Returns: array of level indices (0 LOW, 1 MEDIUM, 2 HIGH)
+        """
+        return density_levels(demand, self.thresholds)
+    
+    def classify_density(self, demand):
+        """
+        Classify traffic density based on demand (PCU, or a plain vehicle count)
         Returns: density level (LOW, MEDIUM, HIGH)
         """
-        if vehicle_count <= self.low_threshold:
+        if demand <= self.low_threshold:
             return "LOW"
-        elif vehicle_count <= self.medium_threshold:
+        elif demand <= self.medium_threshold:
             return "MEDIUM"
         else:
             return "HIGH"
@@ -39,13 +126,11 @@ class TrafficDensityAnalyzer:
         Calculate green light duration based on traffic density
         Returns: time in seconds
         """
-        # Base timings (adjust as needed)
-        timings = {
-            "LOW": 10,      # 10 seconds for low traffic
-            "MEDIUM": 20,   # 20 seconds for medium traffic
-            "HIGH": 30      # 30 seconds for high traffic
-        }
-        return timings.get(density, 15)
+        return self._green_by_name.get(density, 15)
+    
+    def green_times_for(self, levels):
+        """Green time for an array of level indices"""
+        return self.green_times[levels]
 
 # Example usage
 if __name__ == "__main__":
@@ -63,3 +148,8 @@ if __name__ == "__main__":
         print(f"Density: {density}")
         print(f"Green Light Time: {green_time} seconds")
         print(f"Color (BGR): {color}")
+    
+    # Class-weighted demand: 4 cars + 2 buses vs 8 motorcycles
+    for label, class_ids in [("4 cars, 2 buses", [2, 2, 2, 2, 5, 5]), ("8 motorcycles", [3] * 8)]:
+        demand = analyzer.demand(analyzer.class_counts(class_ids))
+        print(f"\n{label}: {demand:.1f} PCU -> {analyzer.classify_density(demand)}")
@@ -5,6 +5,9 @@ Manages traffic light timing based on vehicle density
 
 import time
 
+# How long to hold RED before re-checking an empty road (seconds)
+EMPTY_RECHECK_TIME = 10
+
 class TrafficSignalController:
     def __init__(self):
         # Signal states
@@ -38,6 +41,18 @@ class TrafficSignalController:
             "YELLOW": self.yellow_time # 3 seconds
         }
     
+    def plan_cycle(self, density, has_vehicles=True, empty_recheck=EMPTY_RECHECK_TIME):
+        """
+        Plan the next signal cycle (shared by main.py and the simulator)
+        density: level classified from the current demand (PCU)
+        Returns: list of (state, duration in seconds); RED only if no vehicles
+        """
+        if not has_vehicles:
+            return [("RED", empty_recheck)]
+        timing = self.get_signal_timing(density, has_vehicles=True)
+        # RED (10 s) -> GREEN (30 s) -> YELLOW (3 s)
+        return [("RED", timing["RED"]), ("GREEN", timing["GREEN"]), ("YELLOW", timing["YELLOW"])]
+    
     def get_next_state(self):
         """
         Get the next signal state in cycle
@@ -0,0 +1,299 @@
+"""
+Traffic Simulator
+Discrete-event simulation of one signalised approach on a virtual clock,
+so signal timing policies can be compared over days of traffic in seconds
+
+Usage:
+    python traffic_simulator.py --days 7 --rate 600
+    python traffic_simulator.py --replay traffic_history.db --camera main --days 1
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from traffic_density_analyzer import TrafficDensityAnalyzer
+from traffic_signal_controller import TrafficSignalController
+
+# Queue discharge model (typical values for one lane)
+SATURATION_HEADWAY = 2.0   # Seconds between departing vehicles in a moving queue
+STARTUP_LOST_TIME = 2.0    # Seconds lost when the queue starts moving on GREEN
+
+# Relative arrival rate per hour of day (1.0 = the configured rate)
+DAILY_PROFILE = [0.2, 0.15, 0.1, 0.1, 0.15, 0.3, 0.7, 1.4, 1.6, 1.1, 0.9, 1.0,
+                 1.1, 1.0, 1.0, 1.1, 1.4, 1.7, 1.5, 1.0, 0.7, 0.5, 0.4, 0.3]
+
+
+class VirtualClock:
+    def __init__(self, start=0.0):
+        """Simulated clock: time() and sleep() like the time module, but instant"""
+        self.now = float(start)
+
+    def time(self):
+        """Current simulated time (seconds)"""
+        return self.now
+
+    def sleep(self, seconds):
+        """Advance simulated time"""
+        self.now += seconds
+
+
+# ----------------------------------------------------------------------
+# Arrivals
+# ----------------------------------------------------------------------
+
+class PoissonArrivals:
+    def __init__(self, rate_per_hour=600, profile=DAILY_PROFILE, seed=None):
+        """
+        Random vehicle arrivals (Poisson process)
+        rate_per_hour: average arrivals per hour
+        profile: 24 multipliers by hour of day (None for a constant rate)
+        """
+        self.rate_per_hour = rate_per_hour
+        self.profile = np.asarray(profile if profile is not None else [1.0] * 24, dtype=float)
+        self.rng = np.random.default_rng(seed)
+
+    def rates(self, seconds):
+        """Arrival rate (vehicles per second) for each whole second"""
+        return self.rate_per_hour / 3600 * self.profile[(seconds // 3600) % 24]
+
+    def generate(self, start, duration):
+        """
+        Draw arrival times in [start, start + duration)
+        Returns: sorted numpy array of timestamps
+        """
+        seconds = np.arange(int(start), int(start + duration))
+        counts = self.rng.poisson(self.rates(seconds))
+        times = np.repeat(seconds, counts) + self.rng.random(counts.sum())
+        return np.sort(times)
+
+
+class ReplayArrivals(PoissonArrivals):
+    def __init__(self, vehicle_counts, dwell_time=8.0, seed=None):
+        """
+        Arrivals replayed from recorded detections
+        vehicle_counts: average vehicles in view for each recorded second
+        dwell_time: seconds a vehicle stays in the camera view; by Little's law
+                    arrivals per second = vehicles in view / dwell time
+        The recording is looped to cover longer simulations
+        """
+        super().__init__(seed=seed)
+        self.vehicle_counts = np.asarray(vehicle_counts, dtype=float)
+        self.recorded_rates = self.vehicle_counts / dwell_time
+        if len(self.recorded_rates) == 0:
+            raise ValueError("No recorded detections to replay")
+
+    def rates(self, seconds):
+        """Recorded arrival rate for each whole second (looping)"""
+        return self.recorded_rates[seconds % len(self.recorded_rates)]
+
+    @classmethod
+    def from_history(cls, db_path, camera_id=None, start=None, end=None, **kwargs):
+        """Load per-second detections from the history database (gaps count as empty road)"""
+        from history_db import HistoryReader
+
+        intervals = HistoryReader(db_path).query_intervals(start, end, camera_id)
+        if not intervals:
+            raise ValueError(f"No recorded detections in {db_path}")
+        first = intervals[0]['interval_start']
+        counts = np.zeros(intervals[-1]['interval_start'] - first + 1)
+        for interval in intervals:
+            counts[interval['interval_start'] - first] += interval['avg_vehicles']
+        return cls(counts, **kwargs)
+
+
+# ----------------------------------------------------------------------
+# Timing policies
+# ----------------------------------------------------------------------
+
+# Simulated vehicles carry no class, so they count as unclassified (cars)
+NO_CLASSES = np.zeros(0, np.int32)
+
+
+class ControllerPolicy:
+    def __init__(self, controller=None, analyzer=None):
+        """Current behaviour of main.py: TrafficSignalController.plan_cycle on PCU density"""
+        self.controller = controller or TrafficSignalController()
+        self.analyzer = analyzer or TrafficDensityAnalyzer()
+
+    def density(self, vehicle_count):
+        """Density level of the queue, classified from its demand like main.py"""
+        return self.analyzer.classify_density(self.analyzer.frame_demand(NO_CLASSES, vehicle_count))
+
+    def next_phases(self, vehicle_count):
+        """
+        Decide the next phases from the number of vehicles the camera sees
+        Returns: list of (state, duration in seconds)
+        """
+        return self.controller.plan_cycle(self.density(vehicle_count), vehicle_count > 0)
+
+
+class DensityGreenPolicy(ControllerPolicy):
+    """Green time from TrafficDensityAnalyzer.calculate_green_time (10/20/30 s)"""
+
+    def next_phases(self, vehicle_count):
+        phases = super().next_phases(vehicle_count)
+        if vehicle_count == 0:
+            return phases
+        green = self.analyzer.calculate_green_time(self.density(vehicle_count))
+        return [(state, green if state == "GREEN" else duration) for state, duration in phases]
+
+
+class FixedTimePolicy:
+    def __init__(self, red=10, green=30, yellow=3):
+        """Plain fixed-time signal that cycles whether or not vehicles are waiting"""
+        self.phases = [("RED", red), ("GREEN", green), ("YELLOW", yellow)]
+
+    def next_phases(self, vehicle_count):
+        return self.phases
+
+
+POLICIES = {
+    'controller': ControllerPolicy,
+    'density_green': DensityGreenPolicy,
+    'fixed': FixedTimePolicy
+}
+
+
+# ----------------------------------------------------------------------
+# Simulation
+# ----------------------------------------------------------------------
+
+class TrafficSimulator:
+    def __init__(self, policy, arrivals, headway=SATURATION_HEADWAY,
+                 lost_time=STARTUP_LOST_TIME):
+        """
+        Simulate one approach
+        policy: object with next_phases(vehicle_count)
+        arrivals: object with generate(start, duration)
+        headway / lost_time: queue discharge model (GREEN and YELLOW discharge)
+        """
+        self.policy = policy
+        self.arrivals = arrivals
+        self.headway = headway
+        self.lost_time = lost_time
+
+    def run(self, duration, start=0.0):
+        """
+        Simulate `duration` seconds of operation
+        Returns: dictionary with delay, throughput and queue statistics
+        """
+        clock = VirtualClock(start)
+        end = start + duration
+        arrival_times = self.arrivals.generate(start, duration)
+
+        # Vehicles are served in arrival order, so the queue is the slice
+        # arrival_times[served:arrived]
+        served = 0
+        delays = np.zeros(len(arrival_times))
+        max_queue = 0
+        cycles = 0
+        green_seconds = 0.0
+        discharging = False  # True while GREEN/YELLOW continue one discharge
+
+        while clock.time() < end:
+            arrived = int(np.searchsorted(arrival_times, clock.time(), side='right'))
+            phases = self.policy.next_phases(arrived - served)
+            if any(state == "GREEN" for state, _ in phases):
+                cycles += 1
+
+            for state, phase_duration in phases:
+                phase_start = clock.time()
+                phase_end = min(phase_start + phase_duration, end)
+
+                if state in ("GREEN", "YELLOW"):
+                    if state == "GREEN":
+                        green_seconds += phase_end - phase_start
+                        next_departure = phase_start + self.lost_time
+                    elif not discharging:
+                        next_departure = phase_start + self.lost_time
+                    discharging = True
+                    # Serve vehicles one headway apart (free flow if nobody is queued)
+                    while served < len(arrival_times):
+                        departure = max(next_departure, arrival_times[served])
+                        if departure >= phase_end:
+                            break
+                        delays[served] = departure - arrival_times[served]
+                        served += 1
+                        next_departure = departure + self.headway
+                else:
+                    discharging = False
+
+                clock.sleep(phase_end - phase_start)
+                arrived = int(np.searchsorted(arrival_times, clock.time(), side='right'))
+                max_queue = max(max_queue, arrived - served)
+                if clock.time() >= end:
+                    break
+
+        # Vehicles still queued at the end have waited until the end
+        arrived = int(np.searchsorted(arrival_times, end, side='left'))
+        waiting = end - arrival_times[served:arrived]
+        all_delays = np.concatenate([delays[:served], waiting])
+        served_delays = delays[:served]
+
+        return {
+            'duration_hours': duration / 3600,
+            'arrivals': arrived,
+            'departures': served,
+            'queue_at_end': arrived - served,
+            'throughput_per_hour': served / duration * 3600,
+            'avg_delay': float(served_delays.mean()) if served else 0.0,
+            'p95_delay': float(np.percentile(served_delays, 95)) if served else 0.0,
+            'max_delay': float(all_delays.max()) if len(all_delays) else 0.0,
+            'avg_queue': float(all_delays.sum() / duration),  # Little's law: total wait / time
+            'max_queue': max_queue,
+            'cycles': cycles,
+            'green_share': green_seconds / duration
+        }
+
+
+def compare_policies(policies, arrivals_factory, duration, start=0.0):
+    """
+    Run each policy against identical arrivals
+    policies: name -> policy
+    arrivals_factory: callable returning a fresh arrivals generator (same seed)
+    Returns: name -> results
+    """
+    return {name: TrafficSimulator(policy, arrivals_factory()).run(duration, start)
+            for name, policy in policies.items()}
+
+
+def print_comparison(results):
+    """Print a results table, one row per policy"""
+    print(f"{'policy':<15} {'veh/h':>7} {'avg delay':>10} {'p95 delay':>10} {'max delay':>10} "
+          f"{'avg queue':>10} {'max queue':>10} {'green':>6}")
+    for name, r in results.items():
+        print(f"{name:<15} {r['throughput_per_hour']:7.0f} {r['avg_delay']:9.1f}s {r['p95_delay']:9.1f}s "
+              f"{r['max_delay']:9.1f}s {r['avg_queue']:10.1f} {r['max_queue']:10d} {r['green_share']:6.0%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare signal timing policies in simulation")
+    parser.add_argument('--days', type=float, default=1.0)
+    parser.add_argument('--rate', type=float, default=600, help="average arrivals per hour")
+    parser.add_argument('--constant', action='store_true', help="no time-of-day profile")
+    parser.add_argument('--replay', help="history database to replay detections from")
+    parser.add_argument('--camera', help="camera id to replay")
+    parser.add_argument('--dwell', type=float, default=8.0, help="seconds a vehicle stays in view")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--policies', nargs='+', default=list(POLICIES), choices=list(POLICIES))
+    args = parser.parse_args()
+
+    if args.replay:
+        recorded = ReplayArrivals.from_history(args.replay, args.camera, dwell_time=args.dwell)
+        make_arrivals = lambda: ReplayArrivals(recorded.vehicle_counts, args.dwell, seed=args.seed)
+        print(f"Replaying {len(recorded.recorded_rates)} s of recorded detections from {args.replay}")
+    else:
+        profile = None if args.constant else DAILY_PROFILE
+        make_arrivals = lambda: PoissonArrivals(args.rate, profile, seed=args.seed)
+        print(f"Poisson arrivals: {args.rate:.0f} vehicles/hour average")
+
+    duration = args.days * 86400
+    wall_start = time.perf_counter()
+    results = compare_policies({name: POLICIES[name]() for name in args.policies},
+                               make_arrivals, duration)
+    elapsed = time.perf_counter() - wall_start
+
+    print(f"Simulated {args.days:g} day(s) x {len(results)} policies in {elapsed:.2f} s\n")
+    print_comparison(results)
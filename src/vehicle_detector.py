@@ -3,53 +3,277 @@ Vehicle Detection using YOLOv8
 This script detects vehicles in a video and counts them
 """
 
+import os
+
 import cv2
-from ultralytics import YOLO
 import numpy as np
 
+def make_tiles(frame_shape, roi, tile_size=320, overlap=0.25):
+    """
+    Cover a region of interest with overlapping square tiles
+    roi: (x1, y1, x2, y2) as fractions of the frame
+    Returns: N x 4 array of tiles (x1, y1, x2, y2) in pixels
+    """
+    height, width = frame_shape[:2]
+    x1, y1 = int(roi[0] * width), int(roi[1] * height)
+    x2, y2 = int(roi[2] * width), int(roi[3] * height)
+    stride = max(int(tile_size * (1 - overlap)), 1)
+    
+    def starts(low, high):
+        # Tile origins along one axis; the last tile is aligned to the ROI edge
+        if high - low <= tile_size:
+            return np.array([low])
+        positions = np.arange(low, high - tile_size, stride)
+        return np.append(positions, high - tile_size)
+    
+    xs, ys = np.meshgrid(starts(x1, x2), starts(y1, y2))
+    tiles = np.stack([xs.ravel(), ys.ravel(), xs.ravel() + tile_size, ys.ravel() + tile_size], axis=1)
+    # Tiles larger than the ROI are clipped to the frame
+    tiles[:, 2] = np.minimum(tiles[:, 2], width)
+    tiles[:, 3] = np.minimum(tiles[:, 3], height)
+    return tiles
+
+def non_max_suppression(boxes, scores, class_ids, threshold=0.5):
+    """
+    Class-aware NMS across tiles, matching on intersection over the smaller box
+    (so a vehicle cut by a tile edge is merged into its complete box)
+    Returns: indexes of the boxes to keep
+    """
+    if len(boxes) == 0:
+        return np.zeros(0, dtype=np.int64)
+    order = np.argsort(-scores)
+    boxes = boxes[order]
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    
+    # Pairwise overlap of every box with every other, computed once
+    ix1 = np.maximum(boxes[:, None, 0], boxes[None, :, 0])
+    iy1 = np.maximum(boxes[:, None, 1], boxes[None, :, 1])
+    ix2 = np.minimum(boxes[:, None, 2], boxes[None, :, 2])
+    iy2 = np.minimum(boxes[:, None, 3], boxes[None, :, 3])
+    intersection = np.clip(ix2 - ix1, 0, None) * np.clip(iy2 - iy1, 0, None)
+    overlap = intersection / np.maximum(np.minimum(areas[:, None], areas[None, :]), 1e-6)
+    same_class = class_ids[order][:, None] == class_ids[order][None, :]
+    suppresses = (overlap > threshold) & same_class
+    
+    # Greedy pass in score order: a box survives if no kept box suppresses it
+    keep = np.ones(len(boxes), dtype=bool)
+    for i in range(len(boxes)):
+        if keep[i]:
+            keep[i + 1:] &= ~suppresses[i, i + 1:]
+    return np.sort(order[keep])
+
+# Default model and input size (model_tuner.py picks others per host)
+DEFAULT_MODEL = 'yolov8n.pt'
+DEFAULT_IMGSZ = 640
+
+def detector_config(model_path=DEFAULT_MODEL, imgsz=DEFAULT_IMGSZ, tile_roi=None):
+    """
+    Describe the settings that change detections (part of the detection cache key)
+    Returns: string, or None for the default settings
+    """
+    parts = []
+    if model_path != DEFAULT_MODEL or imgsz != DEFAULT_IMGSZ:
+        parts.append(f"model={os.path.basename(model_path)}@{imgsz}")
+    if tile_roi:
+        parts.append(f"tiles={tile_roi}")
+    return "|".join(parts) or None
+
 class VehicleDetector:
-    def __init__(self):
+    # Analytics sharing each inference (see detection_consumers.py)
+    consumers = ()
+    # FramePool the annotated output frames come from (None = plain arrays)
+    pool = None
+    
+    def __init__(self, cache=None, tile_roi=None, tile_size=320, tile_overlap=0.25,
+                 model_path=DEFAULT_MODEL, imgsz=DEFAULT_IMGSZ, pool=None):
+        """
+        cache: optional DetectionCache; frames passed with a frame index (or
+               recognised by content) are then only analyzed once
+        tile_roi: optional far-field region (x1, y1, x2, y2 as fractions of the
+                  frame) that is also analyzed as overlapping full-resolution
+                  tiles, so distant small vehicles are found
+        model_path: YOLOv8 weights or an exported model (ONNX, OpenVINO, ...)
+        imgsz: model input size (pixels)
+        pool: FramePool for the annotated frames (the input frame is never drawn on)
+        """
+        # Imported here so that importing this module stays cheap
+        # (torch is only loaded when a detector is actually created)
+        from ultralytics import YOLO
+        
         # Load pre-trained YOLOv8 model
-        self.model = YOLO('yolov8n.pt')
+        self.model = YOLO(model_path, task='detect')
+        self.model.overrides['imgsz'] = imgsz  # Default for every model call
+        self.model_path = model_path
+        self.imgsz = imgsz
+        self.pool = pool
         
         # Vehicle class IDs in COCO dataset
         # 2: car, 3: motorcycle, 5: bus, 7: truck
         self.vehicle_classes = [2, 3, 5, 7]
+        self.cache = cache
         
-    def detect_vehicles(self, frame):
+        # Tiled inference (off by default)
+        self.tile_roi = tile_roi
+        self.tile_size = tile_size
+        self.tile_overlap = tile_overlap
+        self._tiles = None  # Cached for the current frame size
+        
+        # Vehicle detections of the last detect_vehicles() call (boxes, confidences, class IDs)
+        self.last_detections = (np.zeros((0, 4), np.float32), np.zeros(0, np.float32), np.zeros(0, np.int32))
+        
+        # Results of the registered consumers for the last frame (name -> result)
+        self.consumer_results = {}
+    
+    @property
+    def resizable(self):
+        """Whether set_input_size() works (PyTorch weights; exported models have a fixed size)"""
+        return str(self.model_path).endswith('.pt')
+    
+    def set_input_size(self, imgsz):
+        """Change the model input size for the following frames (load shedding)"""
+        self.imgsz = imgsz
+        self.model.overrides['imgsz'] = imgsz
+    
+    def add_consumer(self, consumer):
+        """Register an analytic that receives its classes from every inference"""
+        self.consumers = self.consumers + (consumer,)
+        return consumer
+        
+    def detect_vehicles(self, frame, frame_index=None):
         """
         Detect vehicles in a single frame
-        Returns: number of vehicles detected and annotated frame
+        frame_index: position in a video file, used as the cache key
+        Returns: number of vehicles detected and an annotated copy of the
+                 frame (the caller owns both; the frame itself stays clean)
         """
-        # Run detection
-        results = self.model(frame, verbose=False)
+        boxes, confidences, class_ids = self.detect_all(frame, frame_index)
+        if self.consumers:
+            # Same inference, other classes: post-processing only
+            self.consumer_results = {consumer.name: consumer.consume(boxes, confidences, class_ids, frame.shape)
+                                     for consumer in self.consumers}
+        boxes, confidences, class_ids = self.filter_vehicles(boxes, confidences, class_ids)
+        self.last_detections = (boxes, confidences, class_ids)
         
-        vehicle_count = 0
+        return len(class_ids), self.annotate(frame)
+    
+    def output_frame(self, frame):
+        """Copy of a frame to draw on (from the pool when set; the caller owns it)"""
+        output = self.pool.acquire(frame.shape, frame.dtype) if self.pool is not None else np.empty_like(frame)
+        np.copyto(output, frame)
+        return output
+    
+    def annotate(self, frame, detections=None):
+        """
+        Draw detections onto a copy of the frame
+        detections: (boxes, confidences, class IDs), default the last frame's
+        Returns: annotated frame (the caller owns it)
+        """
+        boxes, confidences, class_ids = self.last_detections if detections is None else detections
+        output = self.output_frame(frame)
+        self.draw_detections(output, boxes, confidences, class_ids, self.model.names)
+        return output
+    
+    def detect_all(self, frame, frame_index=None):
+        """
+        Get every detection in a frame (all classes), from the cache when possible
+        Returns: boxes (N x 4 xyxy), confidences (N), class IDs (N)
+        """
+        if self.cache is None:
+            return self.run_model(frame)
         
-        # Process detections
-        for result in results:
-            boxes = result.boxes
-            for box in boxes:
-                # Get class ID
-                cls_id = int(box.cls[0])
-                
-                # Check if it's a vehicle
-                if cls_id in self.vehicle_classes:
-                    vehicle_count += 1
-                    
-                    # Get bounding box coordinates
-                    x1, y1, x2, y2 = map(int, box.xyxy[0])
-                    confidence = float(box.conf[0])
-                    
-                    # Draw bounding box
-                    cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                    
-                    # Add label
-                    label = f"{result.names[cls_id]}: {confidence:.2f}"
-                    cv2.putText(frame, label, (x1, y1-10), 
-                              cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+        detections, content_hash = self.cache.get(frame_index, frame)
+        if detections is None:
+            detections = self.run_model(frame)
+            self.cache.put(detections, frame_index, content_hash=content_hash)
+        return detections
+    
+    def run_model(self, frame):
+        """
+        Run the model on one frame
+        Returns: boxes (N x 4 xyxy), confidences (N), class IDs (N)
+        """
+        if self.tile_roi is not None:
+            return self.run_model_tiled(frame)
+        result = self.model(frame, verbose=False)[0]
+        return self.extract_detections(result)
+    
+    def get_tiles(self, frame_shape):
+        """Get the ROI tiles for a frame size (computed once per size)"""
+        if self._tiles is None or self._tiles[0] != frame_shape[:2]:
+            self._tiles = (frame_shape[:2], make_tiles(frame_shape, self.tile_roi,
+                                                       self.tile_size, self.tile_overlap))
+        return self._tiles[1]
+    
+    def run_model_tiled(self, frame):
+        """
+        Run the model on the downscaled full frame plus the ROI tiles in one batch,
+        then merge everything into full-frame coordinates
+        Returns: boxes (N x 4 xyxy), confidences (N), class IDs (N)
+        """
+        tiles = self.get_tiles(frame.shape)
+        images = [frame] + [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in tiles]
+        results = self.model(images, verbose=False)
+        
+        offsets = np.vstack([np.zeros((1, 4)), np.tile(tiles[:, :2], 2)]).astype(np.float32)
+        all_boxes, all_confidences, all_class_ids = [], [], []
+        for result, offset in zip(results, offsets):
+            boxes, confidences, class_ids = self.extract_detections(result)
+            all_boxes.append(boxes + offset)
+            all_confidences.append(confidences)
+            all_class_ids.append(class_ids)
+        
+        boxes = np.concatenate(all_boxes)
+        confidences = np.concatenate(all_confidences)
+        class_ids = np.concatenate(all_class_ids)
+        keep = non_max_suppression(boxes, confidences, class_ids)
+        return boxes[keep], confidences[keep], class_ids[keep]
+    
+    def detect_batch(self, frames):
+        """
+        Detect vehicles in several frames with one model call
+        Returns: list of vehicle counts (frames are not annotated)
+        """
+        results = self.model(frames, verbose=False)
         
-        return vehicle_count, frame
+        counts = []
+        for result in results:
+            boxes, confidences, class_ids = self.extract_detections(result)
+            counts.append(int(np.isin(class_ids, self.vehicle_classes).sum()))
+        return counts
+    
+    @staticmethod
+    def extract_detections(result):
+        """
+        Convert a YOLO result into numpy arrays
+        Returns: boxes (N x 4 xyxy), confidences (N), class IDs (N)
+        """
+        boxes = result.boxes
+        return (boxes.xyxy.cpu().numpy(),
+                boxes.conf.cpu().numpy(),
+                boxes.cls.cpu().numpy().astype(np.int32))
+    
+    def filter_vehicles(self, boxes, confidences, class_ids):
+        """
+        Keep only vehicle detections (vectorized)
+        Returns: filtered boxes, confidences, class IDs
+        """
+        mask = np.isin(class_ids, self.vehicle_classes)
+        return boxes[mask], confidences[mask], class_ids[mask]
+    
+    @staticmethod
+    def draw_detections(frame, boxes, confidences, class_ids, names):
+        """
+        Draw bounding boxes and labels onto the frame
+        """
+        for (x1, y1, x2, y2), confidence, cls_id in zip(boxes.astype(int), confidences, class_ids):
+            # Draw bounding box
+            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+            
+            # Add label
+            label = f"{names[cls_id]}: {confidence:.2f}"
+            cv2.putText(frame, label, (x1, y1-10), 
+                      cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+        return frame
 
 # Test the detector
 if __name__ == "__main__":
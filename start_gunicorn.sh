@@ -11,4 +11,4 @@ echo "Dashboard will be available at: http://localhost:8000"
 echo ""
 
 cd dashboard
-gunicorn --bind 0.0.0.0:8000 --workers 1 --threads 2 --timeout 120 app:app
+gunicorn --config gunicorn.conf.py app_production:app